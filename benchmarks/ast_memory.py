@@ -0,0 +1,49 @@
+"""Compare the memory held by an AST as slotted node objects vs a NodeArena.
+
+Usage: python benchmarks/ast_memory.py [statements]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ast_arena import NodeArena
+from lexer import lexer
+from parser import Parser
+
+def generate_source(statements):
+    lines = []
+    for i in range(statements // 4):
+        lines.append(f"local v{i} = {i} * 2 + v{i} / 3")
+        lines.append(f"t.f{i} = {{{i}, 'k{i}', x = {i}}}")
+        lines.append(f"if v{i} > {i} then print(v{i}) end")
+        lines.append(f"function g{i}(a, b) return a .. b end")
+    return "\n".join(lines)
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tokens = lexer(generate_source(statements))
+
+    objects, object_bytes = measure(lambda: Parser(tokens).parse())
+    del objects
+    arena, arena_bytes = measure(lambda: Parser(tokens).parse_into(NodeArena()))
+
+    print(f"statements:      {statements}")
+    print(f"AST nodes:       {len(arena)}")
+    print(f"object layout:   {object_bytes / 1e6:8.2f} MB  ({object_bytes / len(arena):6.1f} B/node)")
+    print(f"arena layout:    {arena_bytes / 1e6:8.2f} MB  ({arena_bytes / len(arena):6.1f} B/node)")
+    print(f"arena / objects: {arena_bytes / object_bytes:8.2%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measure the speed and peak memory of each compiler phase on synthetic Lua.
+
+Usage: python benchmarks/compile_speed.py [--shape SHAPE] [--lines N] [--repeat N] [--json]
+
+For every corpus shape (see corpus.py) reports tokens/s for the lexer,
+statements/s for the parser, nodes/s for resolution and constant folding,
+and output bytes/s for translation, each with the peak memory the phase
+allocated. Times are the best of --repeat runs; memory is traced in a
+separate run, since tracemalloc slows allocation down.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ast_nodes import walk
+from corpus import SHAPES, generate
+from emitter import STATEMENT_TYPES, Emitter
+from lexer import lexer
+from optimizer import Optimizer
+from parser import Parser
+from resolver import Resolver
+
+PHASES = ("lex", "parse", "resolve", "optimize", "emit")
+UNITS = {"lex": "tokens", "parse": "statements", "resolve": "nodes", "optimize": "nodes", "emit": "bytes"}
+
+def run_phases(source, phase_hook):
+    """Run the pipeline once, calling phase_hook(name, function) for each phase."""
+    tokens = phase_hook("lex", lambda: lexer(source))
+    parser = Parser(tokens)
+    ast = phase_hook("parse", parser.parse)
+    nodes = list(walk(ast))
+    phase_hook("resolve", lambda: Resolver(parser.symbol_table).resolve(ast))
+    ast = phase_hook("optimize", lambda: Optimizer().optimize(ast))
+    code = phase_hook("emit", lambda: Emitter().emit(ast))
+    statements = sum(1 for node in nodes if type(node) in STATEMENT_TYPES)
+    return {"lex": len(tokens), "parse": statements, "resolve": len(nodes),
+            "optimize": len(nodes), "emit": len(code.encode("utf-8"))}
+
+def time_phases(source):
+    times = {}
+    def timed(name, function):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        times[name] = time.perf_counter() - start
+        return result
+    counts = run_phases(source, timed)
+    return times, counts
+
+def trace_phases(source):
+    peaks = {}
+    def traced(name, function):
+        gc.collect()
+        tracemalloc.start()
+        result = function()
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result
+    run_phases(source, traced)
+    return peaks
+
+def benchmark(shape, lines, repeat):
+    source = generate(shape, lines)
+    best = None
+    for _ in range(repeat):
+        times, counts = time_phases(source)
+        best = times if best is None else {name: min(best[name], times[name]) for name in PHASES}
+    peaks = trace_phases(source)
+    phases = {}
+    for name in PHASES:
+        phases[name] = {
+            "seconds": best[name],
+            UNITS[name]: counts[name],
+            f"{UNITS[name]}_per_second": counts[name] / best[name] if best[name] else None,
+            "peak_bytes": peaks[name],
+        }
+    return {"shape": shape, "lines": source.count("\n"), "source_bytes": len(source.encode("utf-8")),
+            "total_seconds": sum(best.values()), "phases": phases}
+
+def print_result(result):
+    print(f"{result['shape']}: {result['lines']} lines, {result['source_bytes'] / 1e6:.2f} MB, "
+          f"{result['total_seconds']:.3f} s")
+    for name in PHASES:
+        phase = result["phases"][name]
+        unit = UNITS[name]
+        rate = phase[f"{unit}_per_second"]
+        print(f"  {name:<9} {phase['seconds']:8.3f} s  {rate or 0:14,.0f} {unit}/s"
+              f"  peak {phase['peak_bytes'] / 1e6:8.2f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Lora compiler phases")
+    parser.add_argument("--shape", choices=SHAPES, action="append",
+                        help="corpus shape to run (repeatable; default: all)")
+    parser.add_argument("--lines", type=int, default=10_000, help="program size in source lines")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per shape (best is kept)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for shape in args.shape or SHAPES:
+        result = benchmark(shape, args.lines, args.repeat)
+        results.append(result)
+        if not args.json:
+            print_result(result)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Generate synthetic Lua programs of a given size and shape for benchmarks.
+
+Usage: python benchmarks/corpus.py shape [lines] [seed] > program.lua
+
+Shapes: nested (deeply nested blocks), tables (huge table constructors),
+functions (many small functions), expressions (long operator chains) and
+mixed (all of them interleaved). Size is measured in source lines. The
+programs parse without errors (they are not meant to run), and the same
+arguments always give the same text.
+"""
+import random
+import sys
+
+BINARY_OPERATORS = ["+", "-", "*", "/", "%", "..", "==", "<", "and", "or"]
+
+class Generator:
+    def __init__(self, seed=0, depth=16, table_size=500, chain_length=50):
+        self.random = random.Random(seed)
+        self.depth = depth
+        self.table_size = table_size
+        self.chain_length = chain_length
+        self.counter = 0
+
+    def name(self, prefix="v"):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def atom(self, names):
+        roll = self.random.random()
+        if roll < 0.4 and names:
+            return self.random.choice(names)
+        if roll < 0.7:
+            return str(self.random.randint(0, 1000))
+        if roll < 0.85:
+            return f'"s{self.random.randint(0, 99)}"'
+        return self.random.choice(["true", "false", "nil"])
+
+    def expression(self, names, length=4):
+        parts = [self.atom(names)]
+        for _ in range(length - 1):
+            parts.append(self.random.choice(BINARY_OPERATORS))
+            parts.append(self.atom(names))
+        return " ".join(parts)
+
+    # Shapes: each returns the lines of one unit of the shape
+    def nested(self):
+        lines, indent = [], ""
+        loop = self.name("i")
+        names = [loop]
+        lines.append(f"for {loop} = 1, 10 do")
+        for level in range(self.depth):
+            indent += "  "
+            local = self.name()
+            lines.append(f"{indent}local {local} = {self.expression(names)}")
+            names.append(local)
+            kind = level % 3
+            if kind == 0:
+                lines.append(f"{indent}if {local} then")
+            elif kind == 1:
+                lines.append(f"{indent}while {local} do")
+            else:
+                lines.append(f"{indent}do")
+        lines.append(f"{indent}  print({', '.join(names[-3:])})")
+        for level in reversed(range(self.depth)):
+            if level % 3 == 1:
+                lines.append(f"{indent}  break")
+            lines.append(f"{indent}end")
+            indent = indent[:-2]
+        lines.append("end")
+        return lines
+
+    def tables(self):
+        name = self.name("t")
+        lines = [f"local {name} = {{"]
+        for index in range(self.table_size):
+            if index % 3 == 0:
+                lines.append(f"  k{index} = {self.atom([])},")
+            elif index % 3 == 1:
+                lines.append(f"  [{index}] = {{x = {index}, y = {self.atom([])}}},")
+            else:
+                lines.append(f"  {self.atom([])},")
+        lines.append("}")
+        lines.append(f"print(#{name})")
+        return lines
+
+    def functions(self):
+        name = self.name("f")
+        a, b = self.name("a"), self.name("b")
+        lines = [
+            f"local function {name}({a}, {b})",
+            f"  local r = {self.expression([a, b])}",
+            f"  if r then return {a} else return {b} end",
+            "end",
+            f"print({name}({self.atom([])}, {self.atom([])}))",
+        ]
+        return lines
+
+    def expressions(self):
+        name = self.name()
+        return [f"local {name} = {self.expression([], self.chain_length)}", f"print({name})"]
+
+    def mixed(self):
+        shape = self.random.choice([self.nested, self.tables, self.functions, self.expressions])
+        return shape()
+
+SHAPES = ("nested", "tables", "functions", "expressions", "mixed")
+
+def generate(shape, lines, seed=0, **options):
+    """Return a Lua program of at least the given number of lines."""
+    if shape not in SHAPES:
+        raise ValueError(f"unknown shape {shape!r} (expected one of {', '.join(SHAPES)})")
+    generator = Generator(seed, **options)
+    unit = getattr(generator, shape)
+    program = []
+    while len(program) < lines:
+        program.extend(unit())
+    return "\n".join(program) + "\n"
+
+if __name__ == "__main__":
+    shape = sys.argv[1] if len(sys.argv) > 1 else "mixed"
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    sys.stdout.write(generate(shape, lines, seed))
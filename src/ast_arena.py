@@ -0,0 +1,161 @@
+# ast_arena.py
+from array import array
+import ast_nodes
+from ast_nodes import ASTNode
+
+# Every concrete node class, in a fixed order; a node's kind is its index here.
+NODE_TYPES = tuple(
+    cls for cls in vars(ast_nodes).values()
+    if isinstance(cls, type) and issubclass(cls, ASTNode) and cls is not ASTNode
+)
+NODE_KINDS = {cls: kind for kind, cls in enumerate(NODE_TYPES)}
+
+def node_fields(cls):
+    """Return the slot names of cls, base class slots first."""
+    fields = []
+    for klass in reversed(cls.__mro__):
+        fields.extend(klass.__dict__.get('__slots__', ()))
+    return tuple(fields)
+
+NODE_FIELDS = tuple(node_fields(cls) for cls in NODE_TYPES)
+
+# Field values are packed into one signed 32-bit integer: (payload << 2) | tag.
+TAG_NODE, TAG_CONST, TAG_LIST, TAG_TUPLE = range(4)
+
+class NodeArena:
+    """Flat, array-backed storage for an AST.
+
+    Node ids index into parallel arrays: kinds holds the node class index and
+    offsets points at the node's encoded fields in the shared fields array.
+    Child nodes are stored as ids, lists and tuples as runs in the sequences
+    array, and everything else (names, literals, line numbers) as indexes
+    into a deduplicated constants list. Nodes are appended children-first,
+    so a linear scan over the arrays visits every node.
+    """
+    __slots__ = ('kinds', 'offsets', 'fields', 'sequences', 'constants', '_constant_ids', 'roots')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.offsets = array('I')
+        self.fields = array('i')
+        self.sequences = array('i')
+        self.constants = []
+        self._constant_ids = {}
+        self.roots = array('i')
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        arena = cls()
+        for node in nodes:
+            arena.add_root(node)
+        return arena
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add(self, node):
+        """Store node and its subtree, returning the id of node."""
+        return self._encode(node) >> 2
+
+    def add_root(self, node):
+        """Store a top-level statement (which may be None after a parse error)."""
+        self.roots.append(self._encode(node))
+
+    def _encode(self, value):
+        # Post-order with an explicit stack, so deep expressions cannot
+        # overflow: children are encoded (in field order) before their parent
+        codes = []
+        stack = [(value, False)]
+        while stack:
+            value, ready = stack.pop()
+            if isinstance(value, ASTNode):
+                kind = NODE_KINDS[type(value)]
+                names = NODE_FIELDS[kind]
+                if not ready:
+                    stack.append((value, True))
+                    stack.extend((getattr(value, name, None), False) for name in reversed(names))
+                    continue
+                node_id = len(self.kinds)
+                self.kinds.append(kind)
+                self.offsets.append(len(self.fields))
+                self.fields.extend(codes[len(codes) - len(names):])
+                del codes[len(codes) - len(names):]
+                codes.append(node_id << 2 | TAG_NODE)
+            elif isinstance(value, (list, tuple)):
+                if not ready:
+                    stack.append((value, True))
+                    stack.extend((item, False) for item in reversed(value))
+                    continue
+                start = len(self.sequences)
+                self.sequences.append(len(value))
+                self.sequences.extend(codes[len(codes) - len(value):])
+                del codes[len(codes) - len(value):]
+                codes.append(start << 2 | (TAG_TUPLE if isinstance(value, tuple) else TAG_LIST))
+            else:
+                # 1, 1.0 and True compare equal, so constants are deduplicated per type
+                ids = self._constant_ids.get(type(value))
+                if ids is None:
+                    ids = self._constant_ids[type(value)] = {}
+                index = ids.get(value)
+                if index is None:
+                    index = ids[value] = len(self.constants)
+                    self.constants.append(value)
+                codes.append(index << 2 | TAG_CONST)
+        return codes[0]
+
+    def kind(self, node_id):
+        return NODE_TYPES[self.kinds[node_id]]
+
+    def field(self, node_id, name):
+        """Decode a single field of node_id without building the node."""
+        index = NODE_FIELDS[self.kinds[node_id]].index(name)
+        return self._decode(self.fields[self.offsets[node_id] + index])
+
+    def node(self, node_id):
+        """Materialise node_id (and its subtree) as ASTNode objects."""
+        return self._decode(node_id << 2 | TAG_NODE)
+
+    def to_nodes(self):
+        return [self._decode(root) for root in self.roots]
+
+    def _decode(self, encoded):
+        # Iterative like _encode: a value is built once its children are
+        values = []
+        stack = [(encoded, False)]
+        while stack:
+            encoded, ready = stack.pop()
+            tag, payload = encoded & 3, encoded >> 2
+            if tag == TAG_CONST:
+                values.append(self.constants[payload])
+                continue
+            if tag == TAG_NODE:
+                kind = self.kinds[payload]
+                offset = self.offsets[payload]
+                names = NODE_FIELDS[kind]
+                if not ready:
+                    stack.append((encoded, True))
+                    stack.extend((self.fields[offset + index], False) for index in reversed(range(len(names))))
+                    continue
+                cls = NODE_TYPES[kind]
+                node = cls.__new__(cls)
+                for name, value in zip(names, values[len(values) - len(names):]):
+                    setattr(node, name, value)
+                del values[len(values) - len(names):]
+                values.append(node)
+                continue
+            length = self.sequences[payload]
+            if not ready:
+                stack.append((encoded, True))
+                stack.extend((item, False) for item in reversed(self.sequences[payload + 1:payload + 1 + length]))
+                continue
+            items = values[len(values) - length:]
+            del values[len(values) - length:]
+            values.append(tuple(items) if tag == TAG_TUPLE else items)
+        return values[0]
+
+    def count_by_kind(self):
+        counts = {}
+        for kind in self.kinds:
+            name = NODE_TYPES[kind].__name__
+            counts[name] = counts.get(name, 0) + 1
+        return counts
@@ -0,0 +1,325 @@
+# ast_emitter.py
+import ast
+from ast_nodes import *
+from emitter import STATEMENT_TYPES, python_name
+from resolver import UPVALUE
+
+# Python ast operator for each Lua operator, by the node that carries it
+BINARY_OPERATORS = {
+    "+": ast.Add, "-": ast.Sub, "*": ast.Mult, "/": ast.Div, "//": ast.FloorDiv,
+    "%": ast.Mod, "^": ast.Pow, "|": ast.BitOr, "~": ast.BitXor, "&": ast.BitAnd,
+    "<<": ast.LShift, ">>": ast.RShift,
+}
+COMPARISON_OPERATORS = {
+    "<": ast.Lt, ">": ast.Gt, "<=": ast.LtE, ">=": ast.GtE, "==": ast.Eq, "~=": ast.NotEq,
+}
+LOGICAL_OPERATORS = {"and": ast.And, "or": ast.Or}
+UNARY_OPERATORS = {"not": ast.Not, "-": ast.USub, "~": ast.Invert}
+# Expression contexts carry no state, so one instance of each is shared
+LOAD, STORE = ast.Load(), ast.Store()
+# Fields newer Pythons require on a FunctionDef (type parameters, 3.12+)
+FUNCTION_DEF_EXTRAS = {"type_params": []} if "type_params" in ast.FunctionDef._fields else {}
+
+# Fields of each node class that hold child nodes (or lists of them)
+CHILD_FIELDS = {
+    VariableDeclarationNode: ("initializers",),
+    FunctionNode: ("body",),
+    IfNode: ("condition", "then_branch", "elif_branches", "else_branch"),
+    WhileNode: ("condition", "body"),
+    RepeatNode: ("body", "condition"),
+    BlockNode: ("body",),
+    BreakNode: (),
+    ForNumericNode: ("start", "end", "step", "body"),
+    ForGenericNode: ("iter_exprs", "body"),
+    ReturnNode: ("values",),
+    AssignmentNode: ("value",),
+    IndexAssignmentNode: ("target", "value"),
+    ExpressionStatementNode: ("expression",),
+    BinaryOpNode: ("left", "right"),
+    LogicalNode: ("left", "right"),
+    UnaryOpNode: ("right",),
+    LiteralNode: (),
+    VariableNode: (),
+    VarargNode: (),
+    GroupingNode: ("expression",),
+    IndexNode: ("obj", "key"),
+    CallNode: ("callee", "args"),
+    MethodCallNode: ("obj", "args"),
+    TableNode: ("elements",),
+    TableKeyNode: ("key", "value"),
+    TableValueNode: ("value",),
+}
+
+class AstEmitter:
+    """Translate an AST straight to a Python ast.Module, ready for compile().
+
+    The module has the same meaning as the source Emitter writes, but it
+    skips the text round trip: no formatting here and no tokenizing or
+    parsing in CPython. Every statement carries its Lua line (expressions
+    take their statement's), so tracebacks point into the Lua file.
+
+    Nodes are converted children first from an explicit stack, and each
+    conversion looks its children up in results. Anonymous functions are
+    hoisted to defs placed before the statement that contains them.
+    """
+    def __init__(self):
+        self.line = 1
+        self.results = {}
+        self.pending = []  # hoisted defs not yet placed before a statement
+        self.hoisted = 0
+        self.handlers = {
+            VariableDeclarationNode: self.variable_declaration,
+            FunctionNode: self.function,
+            IfNode: self.if_statement,
+            WhileNode: lambda node: [self.at(ast.While(self.value(node.condition), self.body(node.body), []))],
+            RepeatNode: self.repeat_statement,
+            BlockNode: lambda node: [self.at(ast.If(self.at(ast.Constant(True)), self.body(node.body), []))],
+            BreakNode: lambda node: [self.at(ast.Break())],
+            ForNumericNode: self.for_numeric,
+            ForGenericNode: self.for_generic,
+            ReturnNode: self.return_statement,
+            AssignmentNode: lambda node: [self.at(ast.Assign([self.name(node.name, STORE)],
+                                                             self.value(node.value)))],
+            IndexAssignmentNode: self.index_assignment,
+            ExpressionStatementNode: lambda node: [self.at(ast.Expr(self.value(node.expression)))],
+            BinaryOpNode: self.binary,
+            LogicalNode: lambda node: self.at(ast.BoolOp(LOGICAL_OPERATORS[node.operator](),
+                                                         [self.value(node.left), self.value(node.right)])),
+            UnaryOpNode: self.unary,
+            LiteralNode: lambda node: self.at(ast.Constant(node.value)),
+            VariableNode: lambda node: self.name(node.name),
+            VarargNode: lambda node: self.first_vararg(),
+            GroupingNode: lambda node: self.value(node.expression),
+            IndexNode: lambda node: self.at(ast.Subscript(self.value(node.obj), self.value(node.key), LOAD)),
+            CallNode: lambda node: self.at(ast.Call(self.value(node.callee), self.arguments(node.args), [])),
+            MethodCallNode: self.method_call,
+            TableNode: self.table,
+            TableKeyNode: lambda node: None,
+            TableValueNode: lambda node: None,
+        }
+
+    def emit(self, statements):
+        """Return an ast.Module for a list of top-level statements."""
+        module = ast.Module([], [])
+        for statement in statements:
+            if statement is not None:
+                self.convert(statement)
+                module.body.extend(self.results.pop(id(statement)))
+        if not module.body:
+            self.line = 1
+            module.body.append(self.at(ast.Pass()))
+        return module
+
+    def convert(self, root):
+        results = self.results
+        handlers = self.handlers
+        pending = self.pending
+        stack = [(root, False, root.start_line or self.line)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            node, ready, line = pop()
+            if ready is not False:
+                self.line = line
+                converted = handlers[node.__class__](node)
+                if ready is not True:
+                    # A statement: defs hoisted out of it since expansion go first
+                    converted = pending[ready:] + converted
+                    del pending[ready:]
+                results[id(node)] = converted
+                continue
+            cls = node.__class__
+            statement = cls in STATEMENT_TYPES and (cls is not FunctionNode or node.name is not None)
+            push((node, len(pending) if statement else True, line))
+            for name in CHILD_FIELDS[cls]:
+                value = getattr(node, name)
+                if value.__class__ is not list:
+                    if value is not None:
+                        push((value, False, value.start_line or line))
+                    continue
+                for item in value:
+                    if item.__class__ is tuple:  # an elif's (condition, body)
+                        condition, body = item
+                        push((condition, False, line))
+                        for child in body:
+                            if child is not None:
+                                push((child, False, child.start_line or line))
+                    elif item is not None:
+                        push((item, False, item.start_line or line))
+
+    # Helpers
+    def at(self, node):
+        node.lineno = self.line
+        node.col_offset = 0
+        return node
+
+    def value(self, node):
+        return self.results.pop(id(node))
+
+    def statements(self, statements):
+        converted = []
+        for statement in statements:
+            if statement is not None:
+                converted.extend(self.value(statement))
+        return converted
+
+    def body(self, statements):
+        return self.statements(statements) or [self.at(ast.Pass())]
+
+    def name(self, name, context=LOAD):
+        return self.at(ast.Name(python_name(name), context))
+
+    def call(self, name, *args):
+        return self.at(ast.Call(self.name(name), list(args), []))
+
+    def first_vararg(self):
+        args = self.name("args")
+        first = self.at(ast.Subscript(self.name("args"), self.at(ast.Constant(0)), LOAD))
+        return self.at(ast.IfExp(args, first, self.at(ast.Constant(None))))
+
+    def values(self, nodes, varargs=False):
+        # ... expands to every extra argument inside calls and tables
+        converted = []
+        for node in nodes:
+            if varargs and isinstance(node, VarargNode):
+                self.value(node)
+                converted.append(self.at(ast.Starred(self.name("args"), LOAD)))
+            else:
+                converted.append(self.value(node))
+        return converted
+
+    def arguments(self, nodes):
+        return self.values(nodes, varargs=True)
+
+    def targets(self, names):
+        if len(names) == 1:
+            return self.name(names[0], STORE)
+        return self.at(ast.Tuple([self.name(name, STORE) for name in names], STORE))
+
+    # Statements
+    def variable_declaration(self, node):
+        if not node.initializers:
+            return [self.at(ast.Assign([self.name(name, STORE)], self.at(ast.Constant(None))))
+                    for name in node.names]
+        # Missing values are nil; surplus values are dropped
+        values = self.values(node.initializers)[:len(node.names)]
+        values += [self.at(ast.Constant(None)) for _ in range(len(node.names) - len(values))]
+        value = values[0] if len(values) == 1 else self.at(ast.Tuple(values, LOAD))
+        return [self.at(ast.Assign([self.targets(node.names)], value))]
+
+    def function(self, node):
+        if node.name is None:
+            self.hoisted += 1
+            name = f"_fn{self.hoisted}"
+        else:
+            name = python_name(node.name)
+        arguments = ast.arguments([], [], None, [], [], None, [])
+        for parameter in node.parameters:
+            if parameter == "...":
+                arguments.vararg = self.at(ast.arg("args"))
+            else:
+                arguments.args.append(self.at(ast.arg(python_name(parameter))))
+        body = self.outer_declarations(node) + self.body(node.body)
+        definition = self.at(ast.FunctionDef(name=name, args=arguments, body=body, decorator_list=[],
+                                             returns=None, **FUNCTION_DEF_EXTRAS))
+        if node.name is None:
+            self.pending.append(definition)
+            return self.name(name)
+        return [definition]
+
+    def outer_declarations(self, node):
+        names = {ast.Global: [], ast.Nonlocal: []}
+        for binding in node.outer_writes:
+            statement = ast.Nonlocal if binding.kind == UPVALUE and binding.depth > 0 else ast.Global
+            names[statement].append(python_name(binding.name))
+        return [self.at(statement(declared)) for statement, declared in names.items() if declared]
+
+    def if_statement(self, node):
+        else_branch = self.body(node.else_branch) if node.else_branch else []
+        # elif chains nest as ifs in orelse, built from the last one back
+        for condition, body in reversed(node.elif_branches):
+            else_branch = [self.at(ast.If(self.value(condition), self.body(body), else_branch))]
+        return [self.at(ast.If(self.value(node.condition), self.body(node.then_branch), else_branch))]
+
+    def repeat_statement(self, node):
+        until = self.at(ast.If(self.value(node.condition), [self.at(ast.Break())], []))
+        body = self.statements(node.body) + [until]
+        return [self.at(ast.While(self.at(ast.Constant(True)), body, []))]
+
+    def for_numeric(self, node):
+        step = node.step
+        descending = (isinstance(step, UnaryOpNode) and step.operator == "-") or \
+            (isinstance(step, LiteralNode) and isinstance(step.value, (int, float)) and step.value < 0)
+        end = self.at(ast.BinOp(self.call("int", self.value(node.end)),
+                                ast.Sub() if descending else ast.Add(), self.at(ast.Constant(1))))
+        args = [self.call("int", self.value(node.start)), end]
+        if step is not None:
+            args.append(self.call("int", self.value(step)))
+        loop = ast.For(self.name(node.var_name, STORE), self.call("range", *args),
+                       self.body(node.body), [])
+        return [self.at(loop)]
+
+    def for_generic(self, node):
+        values = self.values(node.iter_exprs)
+        iterator = values[0] if len(values) == 1 else self.at(ast.Tuple(values, LOAD))
+        return [self.at(ast.For(self.targets(node.vars), iterator, self.body(node.body), []))]
+
+    def return_statement(self, node):
+        if not node.values:
+            return [self.at(ast.Return(self.at(ast.Constant(None))))]
+        if len(node.values) == 1 and isinstance(node.values[0], VarargNode):
+            self.value(node.values[0])
+            return [self.at(ast.Return(self.name("args")))]
+        values = self.values(node.values)
+        value = values[0] if len(values) == 1 else self.at(ast.Tuple(values, LOAD))
+        return [self.at(ast.Return(value))]
+
+    def index_assignment(self, node):
+        target = self.value(node.target)
+        target.ctx = STORE
+        return [self.at(ast.Assign([target], self.value(node.value)))]
+
+    # Expressions
+    def binary(self, node):
+        left, right = self.value(node.left), self.value(node.right)
+        operator = node.operator
+        if operator == "..":
+            # A runtime call, as in Emitter.binary
+            return self.call("_concat", left, right)
+        if operator in COMPARISON_OPERATORS:
+            return self.at(ast.Compare(left, [COMPARISON_OPERATORS[operator]()], [right]))
+        return self.at(ast.BinOp(left, BINARY_OPERATORS[operator](), right))
+
+    def unary(self, node):
+        operand = self.value(node.right)
+        if node.operator == "#":
+            # A runtime call, as in Emitter.unary
+            return self.call("_len", operand)
+        return self.at(ast.UnaryOp(UNARY_OPERATORS[node.operator](), operand))
+
+    def method_call(self, node):
+        obj = self.value(node.obj)
+        # _method evaluates the object once, as in Emitter.method_call
+        method = self.at(ast.Constant(node.method))
+        return self.at(ast.Call(self.name("_method"), [obj, method] + self.arguments(node.args), []))
+
+    def table(self, node):
+        # As Emitter.table: positional-only tables take a list, others
+        # go through LuaTable.from_fields with fields in source order
+        elements = node.elements
+        for element in elements:
+            self.value(element)
+        if not any(isinstance(element, TableKeyNode) for element in elements):
+            args = [self.at(ast.List(self.arguments([element.value for element in elements]), LOAD))]
+            return self.at(ast.Call(self.name("LuaTable"), args if elements else [], []))
+        fields, keywords = [], []
+        for index, element in enumerate(elements):
+            if isinstance(element, TableKeyNode):
+                fields.append(self.at(ast.Tuple([self.value(element.key), self.value(element.value)], LOAD)))
+            elif index == len(elements) - 1 and isinstance(element.value, VarargNode):
+                self.value(element.value)
+                keywords.append(self.at(ast.keyword("rest", self.name("args"))))
+            else:
+                fields.append(self.at(ast.Tuple([self.value(element.value)], LOAD)))
+        from_fields = self.at(ast.Attribute(self.name("LuaTable"), "from_fields", LOAD))
+        return self.at(ast.Call(from_fields, fields, keywords))
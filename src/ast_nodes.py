@@ -1,269 +1,258 @@
 # ast_nodes.py
 class ASTNode:
+    __slots__ = ('start_line', 'end_line')
+    
     def __init__(self, start_line=None, end_line=None):
         self.start_line = start_line
         self.end_line = end_line
     
     def translate(self, symbol_table=None):
-        raise NotImplementedError("Must be implemented in subclass.")
+        from emitter import Emitter
+        return Emitter().emit_node(self)
 
 class VariableDeclarationNode(ASTNode):
-    def translate(self, symbol_table=None):
-        if not self.initializers:
-            if symbol_table:
-                # Check if any variables are unused
-                for name in self.names:
-                    sym = symbol_table.lookup(name, mark_used=False)
-                    if not sym.is_used:
-                        print(f"Warning: Variable '{name}' declared but never used")
-            
-            return "\n".join(f"{name} = None" for name in self.names)
-        
-        if len(self.names) == len(self.initializers):
-            return ", ".join(self.names) + " = " + ", ".join(
-                init.translate(symbol_table) for init in self.initializers
-            )
-        else:
-            return f"{', '.join(self.names)} = unpack({{{', '.join(init.translate(symbol_table) for init in self.initializers)}}})"
-
-class VariableNode(ASTNode):
-    def translate(self, symbol_table=None):
-        if symbol_table:
-            try:
-                symbol = symbol_table.lookup(self.name)
-                if symbol.is_local:
-                    return f"_{self.name}"  # Prefix locals for clarity
-            except NameError:
-                pass  # Use original name if not found
-        return self.name
+    __slots__ = ('names', 'initializers', 'bindings')
+    
+    def __init__(self, names, initializers, start_line=None):
+        super().__init__(start_line)
+        self.names = names
+        self.initializers = initializers
+        self.bindings = None
 
 class FunctionNode(ASTNode):
+    # binding and outer_writes are filled in by resolver.Resolver
+    __slots__ = ('name', 'parameters', 'body', 'is_local', 'binding', 'outer_writes')
+    
     def __init__(self, name, parameters, body, is_local=False, start_line=None, end_line=None):
         super().__init__(start_line, end_line)
         self.name = name
         self.parameters = parameters
         self.body = body
         self.is_local = is_local
-    
-    def translate(self, symbol_table=None):
-        # Handle varargs
-        params = []
-        for p in self.parameters:
-            if p == "...":
-                params.append("*args")  # Python varargs
-            else:
-                params.append(p)
-        
-        body_lines = []
-        if symbol_table:
-            # Create new symbol table for function body
-            func_symbol_table = SymbolTable()
-            func_symbol_table.enter_scope(is_function=True)
-            
-            # Add parameters
-            for param in self.parameters:
-                if param != "...":
-                    func_symbol_table.declare(param, "any", is_param=True)
-            
-            # Translate body
-            for stmt in self.body:
-                translated = stmt.translate(func_symbol_table)
-                if translated:  # Skip None statements (like parse errors)
-                    body_lines.append(f"    {translated}")
-            
-            func_symbol_table.exit_scope()
-        else:
-            body_lines = [f"    {stmt.translate()}" for stmt in self.body if stmt.translate()]
-        
-        # Add function header comment
-        header_comment = f"  # line {self.start_line}" if self.start_line else ""
-        
-        prefix = "def " if not self.is_local else "def _local_"
-        return (f"{prefix}{self.name}({', '.join(params)}):{header_comment}\n" +
-                "\n".join(body_lines))
+        self.binding = None
+        self.outer_writes = ()
 
 class IfNode(ASTNode):
-    def __init__(self, condition, then_branch, elif_branches=None, else_branch=None):
+    __slots__ = ('condition', 'then_branch', 'elif_branches', 'else_branch')
+    
+    def __init__(self, condition, then_branch, elif_branches=None, else_branch=None,
+                 start_line=None, end_line=None):
+        super().__init__(start_line, end_line)
         self.condition = condition
         self.then_branch = then_branch
         self.elif_branches = elif_branches or []
         self.else_branch = else_branch
-    
-    def translate(self):
-        parts = []
-        parts.append(f"if {self.condition.translate()}:\n    {self.then_branch.translate()}")
-        
-        for cond, body in self.elif_branches:
-            parts.append(f"elif {cond.translate()}:\n    {body.translate()}")
-        
-        if self.else_branch:
-            parts.append(f"else:\n    {self.else_branch.translate()}")
-        
-        return "\n".join(parts)
 
 class WhileNode(ASTNode):
-    def __init__(self, condition, body):
+    __slots__ = ('condition', 'body')
+    
+    def __init__(self, condition, body, start_line=None):
+        super().__init__(start_line)
         self.condition = condition
         self.body = body
+
+class RepeatNode(ASTNode):
+    __slots__ = ('body', 'condition')
     
-    def translate(self):
-        body_lines = "\n".join(f"    {stmt.translate()}" for stmt in self.body)
-        return f"while {self.condition.translate()}:\n{body_lines}"
+    def __init__(self, body, condition, start_line=None):
+        super().__init__(start_line)
+        self.body = body
+        self.condition = condition
+
+class BlockNode(ASTNode):
+    __slots__ = ('body',)
+    
+    def __init__(self, body, start_line=None):
+        super().__init__(start_line)
+        self.body = body
+
+class BreakNode(ASTNode):
+    __slots__ = ()
 
 class ForNumericNode(ASTNode):
-    def __init__(self, var_name, start, end, step, body):
+    __slots__ = ('var_name', 'start', 'end', 'step', 'body')
+    
+    def __init__(self, var_name, start, end, step, body, start_line=None):
+        super().__init__(start_line)
         self.var_name = var_name
         self.start = start
         self.end = end
         self.step = step
         self.body = body
-    
-    def translate(self):
-        step = self.step.translate() if self.step else "1"
-        body_lines = "\n".join(f"    {stmt.translate()}" for stmt in self.body)
-        return (
-            f"for {self.var_name} in range(int({self.start.translate()}), "
-            f"int({self.end.translate()})+1, int({step})):\n{body_lines}"
-        )
 
 class ForGenericNode(ASTNode):
-    def __init__(self, vars, iter_exprs, body):
+    __slots__ = ('vars', 'iter_exprs', 'body')
+    
+    def __init__(self, vars, iter_exprs, body, start_line=None):
+        super().__init__(start_line)
         self.vars = vars
         self.iter_exprs = iter_exprs
         self.body = body
-    
-    def translate(self):
-        iter_str = ", ".join(expr.translate() for expr in self.iter_exprs)
-        vars_str = ", ".join(self.vars)
-        body_lines = "\n".join(f"    {stmt.translate()}" for stmt in self.body)
-        return f"for {vars_str} in {iter_str}:\n{body_lines}"
 
 class ReturnNode(ASTNode):
+    __slots__ = ('values',)
+    
     def __init__(self, values, start_line=None):
         super().__init__(start_line)
         self.values = values
-    
-    def translate(self, symbol_table=None):
-        if not self.values:
-            return "return None"
-        if len(self.values) == 1:
-            return f"return {self.values[0].translate(symbol_table)}"
-        
-        # Multiple returns become a tuple
-        values_str = ", ".join(v.translate(symbol_table) for v in self.values)
-        return f"return ({values_str})"
 
 class AssignmentNode(ASTNode):
-    def __init__(self, name, value):
+    __slots__ = ('name', 'value', 'binding')
+    
+    def __init__(self, name, value, start_line=None):
+        super().__init__(start_line)
         self.name = name
         self.value = value
+        self.binding = None
+
+class IndexAssignmentNode(ASTNode):
+    __slots__ = ('target', 'value')
     
-    def translate(self):
-        return f"{self.name} = {self.value.translate()}"
+    def __init__(self, target, value, start_line=None):
+        super().__init__(start_line)
+        self.target = target
+        self.value = value
 
 class ExpressionStatementNode(ASTNode):
-    def __init__(self, expression):
-        self.expression = expression
+    __slots__ = ('expression',)
     
-    def translate(self):
-        return self.expression.translate()
+    def __init__(self, expression, start_line=None):
+        super().__init__(start_line)
+        self.expression = expression
 
 class BinaryOpNode(ASTNode):
+    __slots__ = ('left', 'operator', 'right')
+    
     def __init__(self, left, operator, right):
+        super().__init__()
         self.left = left
         self.operator = operator
         self.right = right
-    
-    def translate(self):
-        op = self.operator
-        if op == "~=":
-            op = "!="
-        return f"{self.left.translate()} {op} {self.right.translate()}"
 
 class LogicalNode(ASTNode):
+    __slots__ = ('left', 'operator', 'right')
+    
     def __init__(self, left, operator, right):
+        super().__init__()
         self.left = left
         self.operator = operator
         self.right = right
-    
-    def translate(self):
-        return f"{self.left.translate()} {self.operator} {self.right.translate()}"
 
 class UnaryOpNode(ASTNode):
+    __slots__ = ('operator', 'right')
+    
     def __init__(self, operator, right):
+        super().__init__()
         self.operator = operator
         self.right = right
-    
-    def translate(self):
-        op = self.operator
-        if op == "not":
-            op = "not "
-        return f"{op}{self.right.translate()}"
 
 class LiteralNode(ASTNode):
+    __slots__ = ('value',)
+    
     def __init__(self, value):
+        super().__init__()
         self.value = value
-    
-    def translate(self):
-        if isinstance(self.value, str):
-            return f'"{self.value}"'
-        return str(self.value)
 
 class VariableNode(ASTNode):
+    __slots__ = ('name', 'binding')
+    
     def __init__(self, name):
+        super().__init__()
         self.name = name
-    
-    def translate(self):
-        return self.name
+        self.binding = None
+
+class VarargNode(ASTNode):
+    __slots__ = ()
 
 class GroupingNode(ASTNode):
+    __slots__ = ('expression',)
+    
     def __init__(self, expression):
+        super().__init__()
         self.expression = expression
+
+class IndexNode(ASTNode):
+    __slots__ = ('obj', 'key')
     
-    def translate(self):
-        return f"({self.expression.translate()})"
+    def __init__(self, obj, key):
+        super().__init__()
+        self.obj = obj
+        self.key = key
 
-class TableNode(ASTNode):
-    def __init__(self, elements):
-        self.elements = elements
+class CallNode(ASTNode):
+    __slots__ = ('callee', 'args')
     
-    def translate(self):
-        items = []
-        for element in self.elements:
-            if isinstance(element, TableKeyNode):
-                items.append(f"{element.key.translate()}: {element.value.translate()}")
-            else:
-                items.append(element.value.translate())
-        return "{" + ", ".join(items) + "}"
+    def __init__(self, callee, args):
+        super().__init__()
+        self.callee = callee
+        self.args = args
+
+class MethodCallNode(ASTNode):
+    __slots__ = ('obj', 'method', 'args')
+    
+    def __init__(self, obj, method, args):
+        super().__init__()
+        self.obj = obj
+        self.method = method
+        self.args = args
 
 class TableNode(ASTNode):
+    __slots__ = ('elements',)
+    
     def __init__(self, elements, start_line=None, end_line=None):
         super().__init__(start_line, end_line)
         self.elements = elements
-    
-    def translate(self, symbol_table=None):
-        items = []
-        for element in self.elements:
-            if isinstance(element, TableKeyNode):
-                key = element.key.translate(symbol_table)
-                val = element.value.translate(symbol_table)
-                # Handle string keys specially for Python dicts
-                if isinstance(element.key, LiteralNode) and isinstance(element.key.value, str):
-                    items.append(f"'{key}': {val}")
-                else:
-                    items.append(f"{key}: {val}")
-            else:
-                items.append(element.value.translate(symbol_table))
-        
-        # Add line comment if available
-        line_comment = f"  # line {self.start_line}" if self.start_line else ""
-        return "{" + ", ".join(items) + "}" + line_comment
 
 class TableKeyNode(ASTNode):
+    __slots__ = ('key', 'value')
+    
     def __init__(self, key, value):
+        super().__init__()
         self.key = key
         self.value = value
 
 class TableValueNode(ASTNode):
+    __slots__ = ('value',)
+    
     def __init__(self, value):
-        self.value = value
\ No newline at end of file
+        super().__init__()
+        self.value = value
+
+# Fields that can hold child nodes, per node class (see child_fields)
+_CHILD_FIELDS = {}
+
+def child_fields(cls):
+    """The slot names of cls, most derived first, without the line numbers."""
+    fields = _CHILD_FIELDS.get(cls)
+    if fields is None:
+        fields = _CHILD_FIELDS[cls] = tuple(
+            name for klass in cls.__mro__ if klass is not ASTNode
+            for name in klass.__dict__.get('__slots__', ()))
+    return fields
+
+def iter_child_nodes(node):
+    """Yield the direct child nodes of node, looking inside list and tuple fields."""
+    fields = _CHILD_FIELDS.get(node.__class__)
+    if fields is None:
+        fields = child_fields(node.__class__)
+    for name in fields:
+        value = getattr(node, name, None)
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            stack = [value]
+            while stack:
+                for item in stack.pop():
+                    if isinstance(item, ASTNode):
+                        yield item
+                    elif isinstance(item, (list, tuple)):
+                        stack.append(item)
+
+def walk(nodes):
+    """Yield every node reachable from nodes (a node or a list of nodes),
+    using an explicit stack so deeply nested trees cannot overflow."""
+    stack = [nodes] if isinstance(nodes, ASTNode) else [node for node in reversed(nodes) if node is not None]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(iter_child_nodes(node))))
@@ -0,0 +1,96 @@
+# cache.py
+import hashlib
+import os
+import pickle
+import tempfile
+from compiler import COMPILER_VERSION
+
+class CompileCache:
+    """On-disk cache of compile results keyed by a hash of the source.
+
+    Each entry is one pickle file named by sha256(compiler version + source
+    bytes), so any change to either misses. Reads refresh the file's mtime,
+    and once the directory grows past max_bytes the least recently used
+    entries are deleted.
+    """
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+    
+    def key(self, source):
+        digest = hashlib.sha256(COMPILER_VERSION.encode('ascii') + b'\0')
+        digest.update(source.encode('utf-8') if isinstance(source, str) else source)
+        return digest.hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+    
+    def get(self, source):
+        path = self._path(self.key(source))
+        try:
+            with open(path, 'rb') as file:
+                result = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return result
+    
+    def put(self, source, result):
+        path = self._path(self.key(source))
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            # pickle recurses into the AST; very deep expressions go uncached
+            return
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.total_bytes += len(data) - previous
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+    
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, stat.st_mtime, stat.st_size
+    
+    def evict(self):
+        """Delete least recently used entries until well under max_bytes."""
+        # Evicting to a low-water mark keeps the next few puts from rescanning
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+    
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            os.remove(path)
+        self.total_bytes = 0
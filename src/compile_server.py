@@ -0,0 +1,155 @@
+# compile_server.py
+"""A long-running compile service, so clients skip interpreter start-up.
+
+Clients connect over a Unix socket or localhost TCP and send one JSON
+request per line:
+
+    {"id": 1, "source": "local x = 1", "optimize": true, "max_errors": null}
+
+Only source is required. Requests on a connection are handled
+concurrently and each reply is written, one JSON object per line, as soon
+as its compile finishes, so replies can arrive out of order; match them
+by id:
+
+    {"id": 1, "ok": true, "python_code": "...", "mappings": "...",
+     "errors": [], "error_count": 0}
+
+A request that cannot be read gets {"id": ..., "error": "..."}. Compiling
+happens in a process pool, and identical requests in flight at the same
+time (from any connections) share one compile.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from compiler import compile_snippet
+
+# Longest request line accepted, in bytes
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+class CompileServer:
+    """Serve compile requests from a pool of jobs worker processes.
+
+    Counters: requests received, compiles run, and requests that joined a
+    compile already in flight (deduplicated).
+    """
+    def __init__(self, jobs=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.executor = None
+        self.server = None
+        self.in_flight = {}
+        self.connections = set()
+        self.requests = 0
+        self.compiles = 0
+        self.deduplicated = 0
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """Listen on the Unix socket path, or else on host:port (0 picks a port)."""
+        self.executor = ProcessPoolExecutor(self.jobs)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path,
+                                                          limit=MAX_REQUEST_BYTES)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port,
+                                                     limit=MAX_REQUEST_BYTES)
+        return self.address
+
+    @property
+    def address(self):
+        """The socket path, or the (host, port) actually bound."""
+        if self.server is None:
+            return None
+        name = self.server.sockets[0].getsockname()
+        return name if isinstance(name, str) else name[:2]
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Stop listening, drop open connections and shut the pool down."""
+        if self.server is not None:
+            self.server.close()
+            for task in self.connections:
+                task.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def handle_connection(self, reader, writer):
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # request over MAX_REQUEST_BYTES, or the client went away
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.handle_request(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    async def handle_request(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get("id")
+            source = request["source"]
+            max_errors = request.get("max_errors")
+            if not isinstance(source, str):
+                raise ValueError("source must be a string")
+            if max_errors is not None and (type(max_errors) is not int or max_errors < 1):
+                raise ValueError("max_errors must be a positive integer or null")
+            result = await self.compile(source, bool(request.get("optimize", True)), max_errors)
+            reply = {"id": request_id, "ok": result.ok, "python_code": result.python_code,
+                     "mappings": result.mappings, "errors": result.errors,
+                     "error_count": result.error_count}
+        except KeyError as error:
+            reply = {"id": request_id, "error": f"missing field {error}"}
+        except Exception as error:
+            reply = {"id": request_id, "error": f"{type(error).__name__}: {error}"}
+        writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def compile(self, source, optimize=True, max_errors=None):
+        """Compile source in the pool, sharing the work with identical requests."""
+        self.requests += 1
+        key = (source, optimize, max_errors)
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+        self.compiles += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, compile_snippet, source, optimize, max_errors)
+        self.in_flight[key] = future
+        future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # shield: one client disconnecting must not cancel the others' compile
+        return await asyncio.shield(future)
+
+async def serve(path=None, host='127.0.0.1', port=0, jobs=None, ready=None):
+    """Run a CompileServer until cancelled; ready(address) is called once listening."""
+    server = CompileServer(jobs)
+    address = await server.start(path, host, port)
+    if ready is not None:
+        ready(address)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
@@ -0,0 +1,227 @@
+# compiler.py
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from ast_nodes import walk
+from lexer import lexer
+from parser import Parser
+from resolver import Resolver
+from optimizer import Optimizer
+from emitter import Emitter
+from ast_emitter import AstEmitter
+from source_map import SourceMap, encode, register
+
+# Part of every cache key; bump whenever generated code changes.
+COMPILER_VERSION = "0.13.7"
+
+# Written ahead of every generated module (see project.install_runtime)
+PYTHON_PRELUDE = """
+# Lua runtime: tables, print and the table library; tracebacks at Lua lines
+from lua_runtime import *
+from source_map import install as _install_source_map
+_install_source_map()
+"""
+
+class CompileResult:
+    """Tokens, AST and Python source of one compile.
+    
+    mappings is the python_code line -> Lua line map, encoded by
+    source_map.encode(). errors lists parse errors (the first error_count
+    entries) followed by resolver warnings, as in CodeResult.
+    """
+    __slots__ = ('tokens', 'ast', 'python_code', 'symbol_table', 'mappings', 'error_count')
+    
+    def __init__(self, tokens, ast, python_code, symbol_table, mappings="", error_count=0):
+        self.tokens = tokens
+        self.ast = ast
+        self.python_code = python_code
+        self.symbol_table = symbol_table
+        self.mappings = mappings
+        self.error_count = error_count
+    
+    @property
+    def errors(self):
+        return self.symbol_table.errors
+
+class CodeResult:
+    """The result of compile_code: a code object instead of Python source.
+    
+    errors lists parse errors (the first error_count entries) followed by
+    resolver warnings such as unused locals. mappings is None when the
+    code's line numbers are Lua lines; otherwise they are lines of the
+    generated Python it was compiled from, and mappings (encoded by
+    source_map.encode()) maps them back to Lua lines.
+    """
+    __slots__ = ('ast', 'code', 'symbol_table', 'error_count', 'mappings')
+    
+    def __init__(self, ast, code, symbol_table, error_count=0, mappings=None):
+        self.ast = ast
+        self.code = code
+        self.symbol_table = symbol_table
+        self.error_count = error_count
+        self.mappings = mappings
+    
+    @property
+    def errors(self):
+        return self.symbol_table.errors
+    
+    @property
+    def ok(self):
+        """True when the source parsed; warnings do not count."""
+        return not self.error_count
+
+class SnippetResult:
+    """What compile_many keeps of one snippet: its output and diagnostics.
+    
+    errors lists parse errors (the first error_count entries) followed by
+    resolver warnings, as in CodeResult. Tokens and AST are dropped, so
+    results are small and cheap to send back from worker processes.
+    """
+    __slots__ = ('python_code', 'mappings', 'errors', 'error_count')
+    
+    def __init__(self, python_code, mappings, errors, error_count=0):
+        self.python_code = python_code
+        self.mappings = mappings
+        self.errors = errors
+        self.error_count = error_count
+    
+    @property
+    def ok(self):
+        """True when the snippet parsed; warnings do not count."""
+        return not self.error_count
+
+def compile_source(source, cache=None, optimize=True, stats=None, max_errors=None):
+    """Lex, parse and translate Lua source, reusing a cached result if any.
+    
+    With optimize=False constants are left unfolded, and with max_errors
+    parsing stops after that many syntax errors; neither kind of result is
+    cached, since cache keys only cover the source. stats, an
+    instrument.Instrumentation, records per-phase timings and counters.
+    """
+    if not optimize or max_errors is not None:
+        cache = None
+    if cache is not None:
+        cached = cache.get(source)
+        if stats is not None:
+            stats.count('cache_hits' if cached is not None else 'cache_misses')
+        if cached is not None:
+            return cached
+    
+    phase = stats.phase if stats is not None else _untimed
+    with phase('lex'):
+        tokens = lexer(source)
+    parser = Parser(tokens, max_errors)
+    with phase('parse'):
+        ast = parser.parse()
+    error_count = len(parser.symbol_table.errors)
+    resolver = Resolver(parser.symbol_table)
+    with phase('resolve'):
+        resolver.resolve(ast)
+    if optimize:
+        with phase('optimize'):
+            ast = Optimizer().optimize(ast)
+    with phase('emit'):
+        emitter = Emitter()
+        python_code = emitter.emit(ast)
+        mappings = encode(emitter.line_map)
+    result = CompileResult(tokens, ast, python_code, parser.symbol_table, mappings, error_count)
+    if stats is not None:
+        _count(stats, source, result, resolver.lookups, error_count)
+    
+    if cache is not None:
+        cache.put(source, result)
+    return result
+
+def _untimed(name):
+    return nullcontext()
+
+def _count(stats, source, result, lookups, error_count):
+    stats.count('files')
+    stats.count('source_bytes', len(source))
+    stats.count('tokens', len(result.tokens))
+    stats.count('symbol_lookups', lookups)
+    stats.count('errors', error_count)
+    stats.count('warnings', len(result.errors) - error_count)
+    stats.count('output_bytes', len(result.python_code))
+    node_types = stats.node_types
+    nodes = 0
+    for node in walk(result.ast):
+        node_types[node.__class__.__name__] += 1
+        nodes += 1
+    stats.count('ast_nodes', nodes)
+
+def compile_file(file_path, cache=None, optimize=True, stats=None, max_errors=None):
+    with open(file_path, 'r') as file:
+        return compile_source(file.read(), cache, optimize, stats, max_errors)
+
+def compile_code(source, filename="<lua>", optimize=True):
+    """Lex, parse and compile Lua source straight to a Python code object.
+    
+    The AST is converted to Python ast nodes and passed to compile(), so no
+    Python source is written or parsed. The code expects PYTHON_PRELUDE's
+    names (LuaTable, print, ...) in the globals it is run with; line
+    numbers in its tracebacks are Lua lines of filename.
+    
+    Expressions nested too deeply for compile() to walk as ast nodes are
+    compiled from generated Python source instead. Line numbers are then
+    Python lines, and the result's mappings is set. The map is also
+    registered for filename with source_map, so tracebacks formatted there
+    (its excepthook and format_exception) still show Lua lines.
+    """
+    parser = Parser(lexer(source))
+    ast = parser.parse()
+    error_count = len(parser.symbol_table.errors)
+    Resolver(parser.symbol_table).resolve(ast)
+    if optimize:
+        ast = Optimizer().optimize(ast)
+    mappings = None
+    try:
+        code = compile(AstEmitter().emit(ast), filename, "exec")
+    except RecursionError:
+        # compile() walks ast nodes recursively, under the Python recursion
+        # limit; CPython's own parser nests about four times deeper
+        emitter = Emitter()
+        code = compile(emitter.emit(ast), filename, "exec")
+        mappings = encode(emitter.line_map)
+    register(filename, SourceMap(filename, mappings) if mappings is not None else None)
+    return CodeResult(ast, code, parser.symbol_table, error_count, mappings)
+
+def compile_many(sources, optimize=True, max_errors=None, jobs=None, executor=None):
+    """Compile many independent Lua snippets (strings) into SnippetResults.
+    
+    Results are in the order of sources. Each distinct source is compiled
+    once, so duplicates share one result. With jobs > 1 snippets are
+    compiled in worker processes, sent over in batches so that process
+    round trips stay rare. To reuse a pool, pass it as executor along with
+    its number of workers as jobs, which sizes the batches.
+    """
+    if executor is not None and jobs is None:
+        raise ValueError("compile_many needs jobs (the executor's worker count) with an executor")
+    unique = list(dict.fromkeys(sources))
+    compile_one = partial(compile_snippet, optimize=optimize, max_errors=max_errors)
+    if executor is None and (jobs is None or jobs <= 1 or len(unique) < 2):
+        compiled = map(compile_one, unique)
+    else:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(jobs)
+        try:
+            chunksize = max(1, len(unique) // (jobs * 4))
+            compiled = list(executor.map(compile_one, unique, chunksize=chunksize))
+        finally:
+            if own_executor:
+                executor.shutdown()
+    results = dict(zip(unique, compiled))
+    return [results[source] for source in sources]
+
+def compile_snippet(source, optimize=True, max_errors=None):
+    """Compile one Lua string to a SnippetResult (see compile_many)."""
+    parser = Parser(lexer(source), max_errors)
+    ast = parser.parse()
+    error_count = len(parser.symbol_table.errors)
+    Resolver(parser.symbol_table).resolve(ast)
+    if optimize:
+        ast = Optimizer().optimize(ast)
+    emitter = Emitter()
+    python_code = emitter.emit(ast)
+    return SnippetResult(python_code, encode(emitter.line_map), parser.symbol_table.errors, error_count)
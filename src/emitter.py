@@ -0,0 +1,390 @@
+# emitter.py
+import keyword
+from ast_nodes import *
+from resolver import UPVALUE
+
+# Control items on the work stack; strings are written and nodes expanded.
+NEWLINE, INDENT, DEDENT = range(3)
+
+class SourceLine:
+    """Work item marking output that comes from a Lua line but not a statement."""
+    __slots__ = ('line',)
+
+    def __init__(self, line):
+        self.line = line
+
+class TopLevel:
+    """Work item for a top-level statement, expanded only when it is reached.
+
+    Functions are hoisted as statements expand, so deferring each one keeps
+    the _fnN numbering in output order: everything hoisted from a statement
+    is numbered before anything from the next.
+    """
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+# Python operator and precedence for each Lua operator. Python chains
+# comparisons (a < b < c), so nested comparisons are always parenthesised.
+PYTHON_OPERATORS = {
+    "or": ("or", 1), "and": ("and", 2),
+    "<": ("<", 4), ">": (">", 4), "<=": ("<=", 4), ">=": (">=", 4),
+    "==": ("==", 4), "~=": ("!=", 4),
+    "|": ("|", 5), "~": ("^", 6), "&": ("&", 7), "<<": ("<<", 8), ">>": (">>", 8),
+    "..": ("+", 9), "+": ("+", 9), "-": ("-", 9),
+    "*": ("*", 10), "/": ("/", 10), "//": ("//", 10), "%": ("%", 10),
+    "^": ("**", 12),
+}
+UNARY_PRECEDENCE = {"not": 3, "-": 11, "~": 11}
+COMPARISON_PRECEDENCE = 4
+ATOM_PRECEDENCE = 100
+
+# Statement fields that hold expressions (as opposed to nested blocks). An
+# if's elseif conditions are expressions too, but not their bodies; see
+# Emitter.anonymous_functions.
+EXPRESSION_FIELDS = {
+    VariableDeclarationNode: ("initializers",),
+    IfNode: ("condition",),
+    WhileNode: ("condition",),
+    RepeatNode: ("condition",),
+    ForNumericNode: ("start", "end", "step"),
+    ForGenericNode: ("iter_exprs",),
+    ReturnNode: ("values",),
+    AssignmentNode: ("value",),
+    IndexAssignmentNode: ("target", "value"),
+    ExpressionStatementNode: ("expression",),
+}
+
+STATEMENT_TYPES = frozenset(EXPRESSION_FIELDS) | {FunctionNode, BlockNode, BreakNode}
+
+def python_precedence(node):
+    cls = type(node)
+    if cls is BinaryOpNode and node.operator == "..":
+        return ATOM_PRECEDENCE  # a call to _concat
+    if cls is BinaryOpNode or cls is LogicalNode:
+        return PYTHON_OPERATORS[node.operator][1]
+    if cls is UnaryOpNode:
+        return UNARY_PRECEDENCE.get(node.operator, ATOM_PRECEDENCE)
+    return ATOM_PRECEDENCE
+
+def python_name(name):
+    """Rename Lua identifiers that are reserved words in Python."""
+    if keyword.iskeyword(name):
+        return name + "_"
+    return name
+
+class Emitter:
+    """Translate an AST to Python source without recursion.
+
+    Work items (strings, layout controls and nodes) are kept on an explicit
+    stack; each node expands into the items it is made of, and strings are
+    appended to a single output list. Indentation is a counter applied when
+    a NEWLINE item is written, so nesting depth never re-indents text.
+
+    Anonymous functions cannot be expressed inline in Python, so each one is
+    hoisted to a def emitted just before the statement that contains it.
+    They are named _fn1, _fn2, ... in output order, or from
+    _fn{hoisted_before + 1} on when earlier output was emitted separately.
+
+    Each run also fills line_map with (python_line, lua_line) pairs, one
+    for every output line that starts a statement from a new Lua line;
+    source_map.encode() packs it for a SourceMap.
+    """
+    def __init__(self, indent="    ", hoisted_before=0):
+        self.indent = indent
+        self.hoisted = {}
+        self.hoisted_before = hoisted_before
+        self.line_map = []
+        self.handlers = {
+            VariableDeclarationNode: self.variable_declaration,
+            FunctionNode: self.function,
+            IfNode: self.if_statement,
+            WhileNode: self.while_statement,
+            RepeatNode: self.repeat_statement,
+            BlockNode: self.do_block,
+            BreakNode: lambda node: ["break"],
+            ForNumericNode: self.for_numeric,
+            ForGenericNode: self.for_generic,
+            ReturnNode: self.return_statement,
+            AssignmentNode: self.assignment,
+            IndexAssignmentNode: self.index_assignment,
+            ExpressionStatementNode: lambda node: [node.expression],
+            BinaryOpNode: self.binary,
+            LogicalNode: self.binary,
+            UnaryOpNode: self.unary,
+            LiteralNode: self.literal,
+            VariableNode: lambda node: [python_name(node.name)],
+            VarargNode: lambda node: ["(args[0] if args else None)"],
+            GroupingNode: lambda node: ["(", node.expression, ")"],
+            IndexNode: self.index,
+            CallNode: self.call,
+            MethodCallNode: self.method_call,
+            TableNode: self.table,
+            TopLevel: lambda item: self.statement(item.node),
+        }
+
+    def emit(self, statements):
+        """Return Python source for a list of top-level statements."""
+        items = []
+        for statement in statements:
+            if statement is not None:
+                if items:
+                    items.append(NEWLINE)
+                items.append(TopLevel(statement))
+        return self.run(items) + "\n"
+
+    def emit_node(self, node):
+        """Return Python source for a single statement or expression."""
+        if type(node) in STATEMENT_TYPES and not (type(node) is FunctionNode and node.name is None):
+            return self.run(self.statement(node))
+        return self.run(self.statement(ExpressionStatementNode(node)))
+
+    def run(self, items):
+        out = []
+        write = out.append
+        handlers = self.handlers
+        indent = self.indent
+        level = 0
+        line_map = self.line_map = []
+        mark = line_map.append
+        # Output line being written, and the last one given a Lua line
+        line = 1
+        marked = lua_line = 0
+        stack = list(reversed(items))
+        pop = stack.pop
+        push = stack.extend
+        while stack:
+            item = pop()
+            cls = item.__class__
+            if cls is str:
+                write(item)
+            elif cls is int:
+                if item == NEWLINE:
+                    write("\n" + indent * level)
+                    line += 1
+                elif item == INDENT:
+                    level += 1
+                else:
+                    level -= 1
+            elif cls is SourceLine:
+                if line != marked and item.line:
+                    marked = line
+                    if item.line != lua_line:
+                        lua_line = item.line
+                        mark((line, lua_line))
+            else:
+                # Only the first statement on a line counts: a statement
+                # nested in an expression (a function) shares its line
+                if line != marked and cls in STATEMENT_TYPES and item.start_line:
+                    marked = line
+                    if item.start_line != lua_line:
+                        lua_line = item.start_line
+                        mark((line, lua_line))
+                expanded = handlers[cls](item)
+                expanded.reverse()
+                push(expanded)
+        return "".join(out)
+
+    # Statements
+    def statement(self, node):
+        """Items for one statement, preceded by defs for hoisted functions."""
+        items = []
+        for function in self.anonymous_functions(node):
+            name = self.hoisted[function] = f"_fn{self.hoisted_before + len(self.hoisted) + 1}"
+            items.append(SourceLine(function.start_line))
+            items.extend(self.function(function, name))
+            items.append(NEWLINE)
+        items.append(node)
+        return items
+
+    def anonymous_functions(self, node):
+        fields = EXPRESSION_FIELDS.get(type(node), ())
+        stack = [getattr(node, name) for name in fields]
+        if type(node) is IfNode:
+            stack.extend(condition for condition, _ in node.elif_branches)
+        found = []
+        while stack:
+            value = stack.pop()
+            if isinstance(value, (list, tuple)):
+                stack.extend(value)
+            elif isinstance(value, FunctionNode):
+                if value not in self.hoisted:
+                    found.append(value)
+            elif isinstance(value, ASTNode):
+                stack.extend(iter_child_nodes(value))
+        found.reverse()
+        return found
+
+    def block(self, statements):
+        items = [":", INDENT]
+        for statement in statements:
+            if statement is not None:
+                items.append(NEWLINE)
+                items.extend(self.statement(statement))
+        if len(items) == 2:
+            items += [NEWLINE, "pass"]
+        items.append(DEDENT)
+        return items
+
+    def variable_declaration(self, node):
+        names = [python_name(name) for name in node.names]
+        if not node.initializers:
+            items = []
+            for name in names:
+                items += [NEWLINE, f"{name} = None"] if items else [f"{name} = None"]
+            return items
+        # Missing values are nil; surplus values are dropped
+        values = list(node.initializers[:len(names)])
+        values += [LiteralNode(None)] * (len(names) - len(values))
+        return [", ".join(names), " = "] + self.comma_separated(values)
+
+    def function(self, node, name=None):
+        if name is None:
+            if node.name is None:
+                # Anonymous functions were hoisted by the enclosing statement
+                return [self.hoisted[node]]
+            name = python_name(node.name)
+        params = ["*args" if p == "..." else python_name(p) for p in node.parameters]
+        block = self.block(node.body)
+        block[2:2] = self.outer_declarations(node)
+        return [f"def {name}({', '.join(params)})"] + block
+
+    def outer_declarations(self, node):
+        """global/nonlocal lines for the outer variables a function assigns.
+        
+        Lua's main-chunk locals are module globals in Python, so only locals
+        of an enclosing function need nonlocal.
+        """
+        names = {"global": [], "nonlocal": []}
+        for binding in node.outer_writes:
+            statement = "nonlocal" if binding.kind == UPVALUE and binding.depth > 0 else "global"
+            names[statement].append(python_name(binding.name))
+        items = []
+        for statement, declared in names.items():
+            if declared:
+                items += [NEWLINE, f"{statement} {', '.join(declared)}"]
+        return items
+
+    def if_statement(self, node):
+        items = ["if ", node.condition] + self.block(node.then_branch)
+        for condition, body in node.elif_branches:
+            items += [NEWLINE, "elif ", condition] + self.block(body)
+        if node.else_branch:
+            items += [NEWLINE, "else"] + self.block(node.else_branch)
+        return items
+
+    def while_statement(self, node):
+        return ["while ", node.condition] + self.block(node.body)
+
+    def repeat_statement(self, node):
+        until = IfNode(node.condition, [BreakNode()])
+        return ["while True"] + self.block(list(node.body) + [until])
+
+    def do_block(self, node):
+        return ["if True"] + self.block(node.body)
+
+    def for_numeric(self, node):
+        step = node.step
+        descending = (isinstance(step, UnaryOpNode) and step.operator == "-") or \
+            (isinstance(step, LiteralNode) and isinstance(step.value, (int, float)) and step.value < 0)
+        items = [f"for {python_name(node.var_name)} in range(int(", node.start, "), int(", node.end, ")"]
+        items.append(" - 1" if descending else " + 1")
+        if step is not None:
+            items += [", int(", step, ")"]
+        items.append(")")
+        return items + self.block(node.body)
+
+    def for_generic(self, node):
+        names = ", ".join(python_name(name) for name in node.vars)
+        return [f"for {names} in "] + self.comma_separated(node.iter_exprs) + self.block(node.body)
+
+    def return_statement(self, node):
+        if not node.values:
+            return ["return None"]
+        if len(node.values) == 1 and isinstance(node.values[0], VarargNode):
+            return ["return args"]
+        if len(node.values) == 1:
+            return ["return ", node.values[0]]
+        # Multiple returns become a tuple
+        return ["return ("] + self.comma_separated(node.values) + [")"]
+
+    def assignment(self, node):
+        return [python_name(node.name), " = ", node.value]
+
+    def index_assignment(self, node):
+        return [node.target, " = ", node.value]
+
+    # Expressions
+    def operand(self, node, precedence, same_level_ok):
+        child = python_precedence(node)
+        if child < precedence or (child == precedence and
+                                  (not same_level_ok or precedence == COMPARISON_PRECEDENCE)):
+            return ["(", node, ")"]
+        return [node]
+
+    def comma_separated(self, nodes, varargs=False):
+        items = []
+        for node in nodes:
+            if items:
+                items.append(", ")
+            # ... expands to every extra argument inside calls and tables
+            items.append("*args" if varargs and isinstance(node, VarargNode) else node)
+        return items
+
+    def binary(self, node):
+        if node.operator == "..":
+            # Lua concatenation formats numbers as tostring does and
+            # rejects other types, so it is a runtime call
+            return ["_concat(", node.left, ", ", node.right, ")"]
+        op, precedence = PYTHON_OPERATORS[node.operator]
+        right_assoc = node.operator == "^"
+        return (self.operand(node.left, precedence, not right_assoc) + [f" {op} "] +
+                self.operand(node.right, precedence, right_assoc))
+
+    def unary(self, node):
+        if node.operator == "#":
+            # Strings are measured in bytes, so this is a runtime call too
+            return ["_len(", node.right, ")"]
+        op = "not " if node.operator == "not" else node.operator
+        return [op] + self.operand(node.right, UNARY_PRECEDENCE[node.operator], True)
+
+    def literal(self, node):
+        value = node.value
+        if isinstance(value, float) and (value != value or value in (float("inf"), float("-inf"))):
+            return [f"float({str(value)!r})"]
+        return [repr(value)]
+
+    def index(self, node):
+        return self.operand(node.obj, ATOM_PRECEDENCE, True) + ["[", node.key, "]"]
+
+    def call(self, node):
+        return (self.operand(node.callee, ATOM_PRECEDENCE, True) + ["("] +
+                self.comma_separated(node.args, varargs=True) + [")"])
+
+    def method_call(self, node):
+        # A runtime helper, so the object expression is evaluated only once
+        args = [", "] + self.comma_separated(node.args, varargs=True) if node.args else []
+        return ["_method(", node.obj, f", {node.method!r}"] + args + [")"]
+
+    def table(self, node):
+        elements = node.elements
+        if not any(isinstance(element, TableKeyNode) for element in elements):
+            values = [element.value for element in elements]
+            if not values:
+                return ["LuaTable()"]
+            return ["LuaTable(["] + self.comma_separated(values, varargs=True) + ["])"]
+        # Keyed fields: (key, value) and (value,) tuples keep source order,
+        # and no dict display can merge keys such as true and 1
+        items = ["LuaTable.from_fields("]
+        for index, element in enumerate(elements):
+            if index:
+                items.append(", ")
+            if isinstance(element, TableKeyNode):
+                items += ["(", element.key, ", ", element.value, ")"]
+            elif index == len(elements) - 1 and isinstance(element.value, VarargNode):
+                items.append("rest=args")
+            else:
+                items += ["(", element.value, ",)"]
+        items.append(")")
+        return items
@@ -0,0 +1,286 @@
+# incremental.py
+import re
+import sys
+from bisect import bisect_left
+from ast_nodes import walk
+from emitter import Emitter
+from lexer import Token, STRING, NUMBER, scan
+from parser import Parser
+from source_map import encode
+from resolver import Resolver
+from symbol_table import SymbolTable
+
+# Line numbers inside our own diagnostics ("Line 4: ... at line 4")
+LINE_REFERENCE = re.compile(r'\b([Ll]ine )(\d+)')
+LONG_BRACKET_CLOSER = re.compile(r'\](=*)\]')
+
+class StatementRecord:
+    """One top-level statement and everything derived from it.
+
+    start/end are character offsets of its first and last token. errors
+    holds its parse errors and warnings its resolver diagnostics. Line
+    numbers of reused records are shifted lazily: edits above a record only
+    bump line_shift, which is applied the next time its nodes are read.
+    """
+    __slots__ = ('start', 'end', 'tokens', 'node', 'errors', 'warnings', 'line_shift', 'hoisted',
+                 '_python', '_line_map', '_hoisted_before')
+
+    def __init__(self, start, end, tokens, node, errors, warnings):
+        self.start = start
+        self.end = end
+        self.tokens = tokens
+        self.node = node
+        self.errors = errors
+        self.warnings = warnings
+        self.line_shift = 0
+        # Anonymous functions hoisted out of it (known once it is emitted)
+        self.hoisted = 0
+        self._python = None
+        self._line_map = None
+        self._hoisted_before = 0
+
+    def settle(self):
+        """Apply any pending line shift to tokens, nodes and diagnostics."""
+        shift = self.line_shift
+        if not shift:
+            return
+        self.line_shift = 0
+        for token in self.tokens:
+            token.lineno += shift
+        if self.node is not None:
+            for node in walk(self.node):
+                if node.start_line is not None:
+                    node.start_line += shift
+                if node.end_line is not None:
+                    node.end_line += shift
+        renumber = lambda m: f"{m.group(1)}{int(m.group(2)) + shift}"
+        self.errors = [LINE_REFERENCE.sub(renumber, error) for error in self.errors]
+        self.warnings = [LINE_REFERENCE.sub(renumber, warning) for warning in self.warnings]
+        self._python = None
+
+    def python_code(self, hoisted_before=0):
+        """The statement's Python, its hoisted functions numbered after hoisted_before."""
+        self.settle()
+        if self._python is None or self._hoisted_before != hoisted_before:
+            if self.node is None:
+                self._python, self._line_map = "", []
+            else:
+                emitter = Emitter(hoisted_before=hoisted_before)
+                self._python = emitter.emit([self.node])[:-1]
+                self._line_map = emitter.line_map
+                self.hoisted = len(emitter.hoisted)
+            self._hoisted_before = hoisted_before
+        return self._python
+
+    def line_map(self):
+        """(python_line, lua_line) pairs for python_code(), as Emitter.line_map."""
+        self.python_code(self._hoisted_before)
+        return self._line_map
+
+class IncrementalCompiler:
+    """Keep a parsed Lua file up to date across small text edits.
+
+    The file is held as a list of StatementRecords. An edit relexes from the
+    end of the last statement before it and reparses top-level statements
+    only until the parser lands on the (shifted) start of a statement that
+    lies wholly after the edit; from there the old tokens, nodes and
+    diagnostics are reused as they are.
+
+    Statements are compiled independently, so the output matches
+    compile_source(optimize=False): propagating constants would tie each
+    statement to the ones before it.
+    """
+    def __init__(self, source=""):
+        self.source = source
+        self.records = []
+        self.symbol_table = SymbolTable()
+        self.last_reparsed = 0
+        self._reparse(0, 0, 0, [])
+
+    def edit(self, start, end, text):
+        """Replace source[start:end] with text and update the parse."""
+        old_records = self.records
+        old_source = self.source
+        delta = len(text) - (end - start)
+        line_delta = text.count('\n') - old_source.count('\n', start, end)
+        self.source = old_source[:start] + text + old_source[end:]
+
+        # Reparse from the statement before the first one the edit touches:
+        # an edit just after a statement can extend it (x = f -> x = f(y)).
+        first = bisect_left([record.end for record in old_records], start)
+        first = self._safe_first(max(0, first - 1), start, len(text))
+        relex_start = old_records[first - 1].end if first else 0
+
+        # Statements starting on a later line than the edit can be reused once
+        # resynced; their columns are unaffected, only their lines shift.
+        line_end = old_source.find('\n', end)
+        if line_end == -1:
+            reusable = len(old_records)
+        else:
+            reusable = bisect_left([record.start for record in old_records], line_end, first)
+        tail = old_records[reusable:]
+        for record in tail:
+            record.start += delta
+            record.end += delta
+            record.line_shift += line_delta
+        self._reparse(first, relex_start, reusable, tail)
+
+    def set_source(self, source):
+        """Replace the whole text, editing only the span that differs."""
+        old = self.source
+        if source == old:
+            return
+        limit = min(len(old), len(source))
+        prefix = 0
+        while prefix < limit and old[prefix] == source[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == source[-1 - suffix]:
+            suffix += 1
+        self.edit(prefix, len(old) - suffix, source[prefix:len(source) - suffix])
+
+    def _safe_first(self, first, start, length):
+        """Move first back until relexing from it cannot miss a changed token.
+
+        Text before an edit only lexes differently when a token reaches into
+        it: a quoted string continued with a trailing backslash, a long
+        bracket opener cut by a statement boundary, or an unclosed [[ that
+        the edit has just closed.
+        """
+        source = self.source
+        records = self.records
+        line_start = source.rfind('\n', 0, start) + 1
+        while line_start > 1 and source[line_start - 2] == '\\':
+            line_start = source.rfind('\n', 0, line_start - 1) + 1
+        while first and (records[first - 1].end > line_start or
+                         source[records[first - 1].end - 1] in '[='):
+            first -= 1
+        if not first:
+            return 0
+
+        # Closers (]] or ]==]) that the edit may have formed
+        low, high = start, start + length
+        while low and source[low - 1] in ']=':
+            low -= 1
+        while high < len(source) and source[high] in ']=':
+            high += 1
+        relex_start = records[first - 1].end
+        for index in range(low, high):
+            closer = LONG_BRACKET_CLOSER.match(source, index)
+            if closer is None:
+                continue
+            level = len(closer.group()) - 2
+            opener = '[' + '=' * level + '['
+            opened = source.rfind(opener, 0, relex_start + level + 1)
+            if opened != -1 and source.find(closer.group(), opened + level + 2, relex_start) == -1:
+                return 0
+        return first
+
+    def _reparse(self, first, relex_start, reusable, tail):
+        source = self.source
+        offsets = []
+        parser = Parser(self._lex_from(relex_start, offsets))
+        parser.symbol_table = self.symbol_table
+        errors = self.symbol_table.errors
+
+        new_records = []
+        resync = 0
+        while not parser.is_at_end():
+            index = parser.current
+            statement_start = offsets[index][0]
+            while resync < len(tail) and tail[resync].start < statement_start:
+                resync += 1
+            if resync < len(tail) and tail[resync].start == statement_start:
+                break
+            error_count = len(errors)
+            node = parser.declaration()
+            # Each statement resolves on its own: main-chunk locals only
+            # change how a reference is classified, never the emitted code
+            # or the unused-local warnings
+            resolved = SymbolTable()
+            if node is not None:
+                Resolver(resolved).resolve([node])
+            new_records.append(StatementRecord(
+                statement_start, offsets[parser.current - 1][1],
+                parser.tokens[index:parser.current], node, errors[error_count:], resolved.errors
+            ))
+            del errors[error_count:]
+        else:
+            resync = len(tail)
+
+        self.records = self.records[:first] + new_records + tail[resync:]
+        self.last_reparsed = len(new_records)
+
+    def _lex_from(self, pos, offsets):
+        """Yield tokens from pos on, recording each token's offsets."""
+        source = self.source
+        intern = sys.intern
+        lineno = source.count('\n', 0, pos) + 1
+        line_start = source.rfind('\n', 0, pos) + 1
+        previous = pos
+        for kind, start, end in scan(source, pos):
+            newlines = source.count('\n', previous, start)
+            if newlines:
+                lineno += newlines
+                line_start = source.rfind('\n', previous, start) + 1
+            previous = start
+            value = source[start:end]
+            if kind != STRING and kind != NUMBER:
+                value = intern(value)
+            offsets.append((start, end))
+            yield Token(kind, value, lineno, start - line_start + 1)
+
+    @property
+    def ast(self):
+        nodes = []
+        for record in self.records:
+            record.settle()
+            nodes.append(record.node)
+        return nodes
+
+    @property
+    def tokens(self):
+        tokens = []
+        for record in self.records:
+            record.settle()
+            tokens.extend(record.tokens)
+        return tokens
+
+    @property
+    def errors(self):
+        # Parse errors first, then resolver warnings, as in a full compile
+        errors, warnings = [], []
+        for record in self.records:
+            record.settle()
+            errors.extend(record.errors)
+            warnings.extend(record.warnings)
+        return errors + warnings
+
+    def _compiled(self):
+        """Yield each record that emits code, with that code.
+
+        Hoisted functions are numbered across the whole file, so each
+        record is told how many came before it (and re-emitted if that
+        changed).
+        """
+        hoisted = 0
+        for record in self.records:
+            code = record.python_code(hoisted)
+            hoisted += record.hoisted
+            if code:
+                yield record, code
+
+    def python_code(self):
+        return "\n".join(code for _, code in self._compiled()) + "\n"
+
+    def mappings(self):
+        """The encoded line map of python_code() (see source_map.encode)."""
+        line_map = []
+        offset = 0
+        for record, code in self._compiled():
+            for line, lua_line in record.line_map():
+                # As in one Emitter run, a pair is only recorded when the Lua line changes
+                if not line_map or line_map[-1][1] != lua_line:
+                    line_map.append((line + offset, lua_line))
+            offset += code.count('\n') + 1
+        return encode(line_map)
@@ -0,0 +1,80 @@
+# instrument.py
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+class Instrumentation:
+    """Opt-in per-phase timings and counters, collected across compiles.
+
+    Pass one to compile_source (or call compile_project with
+    instrument=True) and it records wall time per phase (lex, parse,
+    resolve, optimize, emit) and counters such as tokens, AST nodes by
+    type, symbol lookups and errors.
+    With trace_memory, each phase also records the bytes it allocated and
+    its peak, using tracemalloc; that slows compiles down, so it is off by
+    default.
+
+    to_dict() gives plain dicts that pickle and merge, so results from
+    worker processes can be summed into one report.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = Counter()
+        self.node_types = Counter()
+
+    @contextmanager
+    def phase(self, name):
+        tracing = self.trace_memory
+        started_tracing = tracing and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            record = self.phases.get(name)
+            if record is None:
+                record = self.phases[name] = {"seconds": 0.0, "calls": 0}
+            record["seconds"] += elapsed
+            record["calls"] += 1
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record["allocated_bytes"] = record.get("allocated_bytes", 0) + max(0, current - before)
+                record["peak_bytes"] = max(record.get("peak_bytes", 0), peak - before)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def to_dict(self):
+        return {
+            "phases": {name: dict(record) for name, record in self.phases.items()},
+            "counters": dict(self.counters),
+            "node_types": dict(self.node_types),
+        }
+
+    def merge(self, stats):
+        """Add in another Instrumentation or a to_dict() of one."""
+        if isinstance(stats, Instrumentation):
+            stats = stats.to_dict()
+        for name, other in stats["phases"].items():
+            record = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            record["seconds"] += other["seconds"]
+            record["calls"] += other["calls"]
+            if "allocated_bytes" in other:
+                record["allocated_bytes"] = record.get("allocated_bytes", 0) + other["allocated_bytes"]
+                record["peak_bytes"] = max(record.get("peak_bytes", 0), other["peak_bytes"])
+        self.counters.update(stats["counters"])
+        self.node_types.update(stats["node_types"])
+        return self
+
+    def to_json(self, indent=4):
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
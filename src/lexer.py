@@ -1,52 +1,281 @@
 # lexer.py
 
+import mmap
 import re
+import sys
 
-def lexer(source_code, include_lines=False):
-    tokens = []
-    lineno = 1  # Track line numbers
-    keywords = {
-        'and', 'break', 'do', 'else', 'elseif', 'end', 'false', 'for',
-        'function', 'if', 'in', 'local', 'nil', 'not', 'or', 'repeat',
-        'return', 'then', 'true', 'until', 'while'
-    }
-
-    token_spec = [
-        ('NUMBER',   r'\b\d+(\.\d+)?\b'),
-        ('STRING',   r'\".*?\"|\'.*?\''),
-        ('BOOLEAN',  r'\btrue\b|\bfalse\b'),
-        ('NIL',      r'\bnil\b'),
-        ('OP',       r'==|~=|<=|>=|[+\-*/%^#=<>;:.,()]'),
-        ('NAME',     r'[a-zA-Z_][a-zA-Z0-9_]*'),
-        ('SKIP',     r'[ \t\n]+'),
-        ('MISMATCH', r'.')
-    ]
-
-    tok_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_spec)
-
-    for match in re.finditer(tok_regex, source_code):
+KEYWORDS = frozenset({
+    'and', 'break', 'do', 'else', 'elseif', 'end', 'false', 'for',
+    'function', 'if', 'in', 'local', 'nil', 'not', 'or', 'repeat',
+    'return', 'then', 'true', 'until', 'while'
+})
+
+# Integer token kinds; TOKEN_TYPES maps them back to the report names.
+NUMBER, STRING, BOOLEAN, NIL, KEYWORD, OP, NAME, EOF = range(8)
+TOKEN_TYPES = ('NUMBER', 'STRING', 'BOOLEAN', 'NIL', 'KEYWORD', 'OP', 'NAME', 'EOF')
+KIND_CODES = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+# Long brackets ([[ ]], [==[ ]==]) and quoted strings may span lines, so the
+# whole file is scanned in one pass and lines are counted from the newlines
+# inside the matches. Whitespace and names are by far the most common
+# matches, so they are tried first; keywords, true/false and nil are then
+# told apart from names by WORDS.
+TOKEN_SPEC = [
+    ('SKIP',     r'[ \t\r\n\f\v]+'),
+    ('NAME',     r'[a-zA-Z_][a-zA-Z0-9_]*'),
+    ('COMMENT',  r'--\[(?P<comment_level>=*)\[.*?\](?P=comment_level)\]|--[^\n]*'),
+    ('NUMBER',   r'0[xX][0-9a-fA-F]+(?:\.[0-9a-fA-F]*)?(?:[pP][+-]?\d+)?'
+                 r'|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?'),
+    ('STRING',   r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+                 r'|\[(?P<string_level>=*)\[.*?\](?P=string_level)\]'),
+    ('OP',       r'\.\.\.|\.\.|==|~=|<=|>=|//|::|<<|>>|[+\-*/%^#&~|<>=(){}\[\];:,.]'),
+    ('MISMATCH', r'.')
+]
+IGNORED = frozenset({'COMMENT', 'SKIP', 'MISMATCH'})
+
+# Compiled once at import time; every call to lexer() and lex_stream() reuses it.
+TOKEN_REGEX = re.compile(
+    '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPEC),
+    re.DOTALL
+)
+# The same scanner over bytes, for memory-mapped input (see lex_file)
+BYTES_TOKEN_REGEX = re.compile(TOKEN_REGEX.pattern.encode('ascii'), re.DOTALL)
+
+# Token kinds of the reserved words; any other NAME match is a NAME
+WORDS = dict.fromkeys(KEYWORDS, KEYWORD)
+WORDS.update({'true': BOOLEAN, 'false': BOOLEAN, 'nil': NIL})
+BYTES_WORDS = {word.encode('ascii'): kind for word, kind in WORDS.items()}
+
+_ESCAPES = {
+    'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t',
+    'v': '\v', '\\': '\\', '"': '"', "'": "'", '\n': '\n'
+}
+_ESCAPE_REGEX = re.compile(r'\\(?:(\d{1,3})|x([0-9a-fA-F]{2})|u\{([0-9a-fA-F]+)\}|z\s*|(.))', re.DOTALL)
+_LONG_BRACKET_REGEX = re.compile(r'\[(=*)\[\n?(.*)\]\1\]\Z', re.DOTALL)
+
+
+def _unescape(match):
+    decimal, hex_code, codepoint, other = match.groups()
+    if decimal is not None:
+        return chr(int(decimal))
+    if hex_code is not None:
+        return chr(int(hex_code, 16))
+    if codepoint is not None:
+        return chr(int(codepoint, 16))
+    if other is None:  # \z skips following whitespace
+        return ''
+    return _ESCAPES.get(other, other)
+
+
+def string_value(raw):
+    """Return the contents of a STRING token with quotes and escapes resolved."""
+    long_match = _LONG_BRACKET_REGEX.match(raw)
+    if long_match:
+        # A newline directly after the opening bracket is not part of the string
+        return long_match.group(2)
+    return _ESCAPE_REGEX.sub(_unescape, raw[1:-1])
+
+
+def number_value(raw):
+    """Return the float value of a NUMBER token, including hex forms."""
+    if raw[:2] in ('0x', '0X'):
+        if '.' in raw or 'p' in raw or 'P' in raw:
+            return float.fromhex(raw)
+        return float(int(raw, 16))
+    return float(raw)
+
+
+class Token:
+    """A single lexed token.
+
+    Supports item access (token['type'], token.get('lineno')) so code written
+    against the old dict tokens keeps working.
+    """
+    __slots__ = ('kind', 'value', 'lineno', 'col')
+
+    def __init__(self, kind, value, lineno, col=None):
+        self.kind = kind
+        self.value = value
+        self.lineno = lineno
+        self.col = col
+
+    @property
+    def type(self):
+        return TOKEN_TYPES[self.kind]
+
+    @property
+    def raw(self):
+        return self.value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.kind, self.value, self.lineno) == (other.kind, other.value, other.lineno)
+
+    def __hash__(self):
+        return hash((self.kind, self.value, self.lineno))
+
+    def __repr__(self):
+        return f"Token({self.type}, {self.value!r}, line {self.lineno})"
+
+
+EOF_TOKEN = Token(EOF, '', -1)
+
+
+def scan(source_code, pos=0):
+    """Yield (kind, start, end) for every significant match from pos on.
+
+    source_code may be a str or any bytes-like buffer (bytes, mmap). The
+    scanner carries no state between matches, so scanning can resume at any
+    offset that is known to be a token boundary.
+    """
+    if isinstance(source_code, str):
+        regex, words = TOKEN_REGEX, WORDS
+    else:
+        regex, words = BYTES_TOKEN_REGEX, BYTES_WORDS
+    codes = KIND_CODES
+    ignored = IGNORED
+
+    for match in regex.finditer(source_code, pos):
+        kind = match.lastgroup
+
+        if kind in ignored:
+            continue
+        elif kind == 'NAME':
+            yield words.get(match.group(), NAME), match.start(), match.end()
+        else:
+            yield codes[kind], match.start(), match.end()
+
+
+def map_file(file_path):
+    """Return a read-only memory map of file_path (b'' for an empty file)."""
+    with open(file_path, 'rb') as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return b''
+
+
+def lex_file(file_path):
+    """Yield tokens from a memory-mapped file without reading it into memory.
+
+    Only the matched token text is decoded, and lines are counted as the
+    scan passes them (as in lex_stream), so beyond the mapping itself,
+    which the OS pages in and out, memory holds only the current token.
+    Columns count bytes rather than characters.
+    """
+    source = map_file(file_path)
+    try:
+        intern = sys.intern
+        words = BYTES_WORDS
+        codes = KIND_CODES
+        lineno = 1
+        line_start = 0
+        for match in BYTES_TOKEN_REGEX.finditer(source):
+            kind = match.lastgroup
+            value = match.group()
+            if kind == 'SKIP' or kind == 'COMMENT' or kind == 'MISMATCH':
+                pass
+            elif kind == 'NAME':
+                yield Token(words.get(value, NAME), intern(value.decode('utf-8')),
+                            lineno, match.start() - line_start + 1)
+                continue
+            else:
+                code = codes[kind]
+                text = value.decode('utf-8')
+                yield Token(code, text if code == STRING or code == NUMBER else intern(text),
+                            lineno, match.start() - line_start + 1)
+            if b'\n' in value:
+                lineno += value.count(b'\n')
+                line_start = match.start() + value.rfind(b'\n') + 1
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+
+def lex_stream(source_code):
+    """Yield tokens from source_code one at a time as they are matched.
+
+    Lines are counted from the newlines in the skipped whitespace, comments
+    and strings as the scan passes them, so no line index is built.
+    """
+    intern = sys.intern
+    words = WORDS
+    lineno = 1
+    line_start = 0
+    for match in TOKEN_REGEX.finditer(source_code):
         kind = match.lastgroup
         value = match.group()
-        
-        # Handle newlines for line counting
+        if kind == 'SKIP':
+            if '\n' in value:
+                lineno += value.count('\n')
+                line_start = match.start() + value.rfind('\n') + 1
+            continue
+        start = match.start()
+        if kind == 'NAME':
+            yield Token(words.get(value, NAME), intern(value), lineno, start - line_start + 1)
+            continue
+        if kind == 'OP':
+            yield Token(OP, intern(value), lineno, start - line_start + 1)
+            continue
+        if kind == 'NUMBER':
+            yield Token(NUMBER, value, lineno, start - line_start + 1)
+            continue
+        if kind == 'STRING':
+            yield Token(STRING, value, lineno, start - line_start + 1)
+        elif kind == 'MISMATCH':
+            continue
+        # Strings and comments may span lines
         if '\n' in value:
             lineno += value.count('\n')
-        
-        token = {
-            'type': kind,
-            'value': value,
-            'raw': value,
-            'lineno': lineno
-        }
-        
+            line_start = start + value.rfind('\n') + 1
+
+
+def lexer(source_code, include_lines=False):
+    """Return the tokens of source_code as a list.
+
+    This is lex_stream() with the tokens appended in place, which saves
+    resuming a generator once per token when a whole file is lexed.
+    """
+    tokens = []
+    append = tokens.append
+    intern = sys.intern
+    words = WORDS
+    lineno = 1
+    line_start = 0
+    for match in TOKEN_REGEX.finditer(source_code):
+        kind = match.lastgroup
+        value = match.group()
         if kind == 'SKIP':
+            if '\n' in value:
+                lineno += value.count('\n')
+                line_start = match.start() + value.rfind('\n') + 1
+            continue
+        start = match.start()
+        if kind == 'NAME':
+            append(Token(words.get(value, NAME), intern(value), lineno, start - line_start + 1))
+            continue
+        if kind == 'OP':
+            append(Token(OP, intern(value), lineno, start - line_start + 1))
+            continue
+        if kind == 'NUMBER':
+            append(Token(NUMBER, value, lineno, start - line_start + 1))
             continue
-        elif kind == 'NAME' and value in keywords:
-            token['type'] = 'KEYWORD'
-            tokens.append(token)
+        if kind == 'STRING':
+            append(Token(STRING, value, lineno, start - line_start + 1))
         elif kind == 'MISMATCH':
             continue
-        else:
-            tokens.append(token)
-    
-    return tokens
\ No newline at end of file
+        # Strings and comments may span lines
+        if '\n' in value:
+            lineno += value.count('\n')
+            line_start = start + value.rfind('\n') + 1
+    return tokens
@@ -0,0 +1,76 @@
+# lora.py
+"""Compile and run Lua in-process.
+
+    import lora
+    rules = lora.load(source, "rules.lua")
+    env = rules({"limit": 10.0})   # runs the chunk, returns its globals
+    env["check"](request)
+
+load() keeps the code objects it compiles in a bounded LRU cache, so
+loading a script it has seen recently is a dictionary lookup.
+"""
+import functools
+import lua_runtime
+from compiler import compile_code
+from lua_runtime import LuaError, LuaTable
+
+# Scripts loaded again while still among the most recent this many are free
+CACHE_SIZE = 256
+
+class Chunk:
+    """A compiled Lua chunk. Each call runs it in a fresh globals dict.
+
+    mappings is None unless the chunk nests too deeply to compile directly
+    (see compiler.compile_code); its line numbers are then generated Python
+    lines, which source_map.format_exception turns back into Lua lines.
+    """
+    __slots__ = ('code', 'name', 'warnings', 'mappings')
+
+    def __init__(self, code, name, warnings, mappings=None):
+        self.code = code
+        self.name = name
+        self.warnings = warnings
+        self.mappings = mappings
+
+    def __call__(self, env=None):
+        """Run the chunk and return its globals.
+
+        env supplies extra globals (host functions, configuration). Runs
+        never share state: each gets its own copy of the runtime library.
+        """
+        namespace = runtime_globals()
+        if env:
+            namespace.update(env)
+        exec(self.code, namespace)
+        return namespace
+
+    def __repr__(self):
+        return f"Chunk({self.name!r})"
+
+def runtime_globals():
+    """A new globals dict holding the runtime library (print, pairs, table, ...)."""
+    namespace = {name: getattr(lua_runtime, name) for name in lua_runtime.__all__}
+    # The table library is itself a table; copy it so a script cannot
+    # change another's table.insert
+    namespace['table'] = LuaTable(hash=lua_runtime.table.hash)
+    return namespace
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def load(source, name="<lua>"):
+    """Compile source into a Chunk, raising LuaError if it does not parse.
+
+    name is the file name shown in tracebacks, which carry Lua line
+    numbers (except in very deeply nested chunks: see Chunk). Results are
+    cached by (source, name); errors are not.
+    """
+    try:
+        result = compile_code(source, name)
+    except SyntaxError as error:
+        # Lua the translation cannot express yet, such as a main-chunk return
+        raise LuaError(f"{name}:{error.lineno}: {error.msg}") from None
+    except RecursionError:
+        # Even the text backend's compile() has a nesting limit
+        raise LuaError(f"{name}: expression nested too deeply to compile") from None
+    if not result.ok:
+        raise LuaError(f"{name}: " + "\n".join(result.errors[:result.error_count]))
+    return Chunk(result.code, name, result.errors[result.error_count:], result.mappings)
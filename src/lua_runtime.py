@@ -0,0 +1,258 @@
+# lua_runtime.py
+"""Runtime support imported by every generated module."""
+import builtins
+
+__all__ = ['LuaTable', 'LuaError', 'print', 'tostring', 'pairs', 'ipairs', 'table', '_method', '_concat', '_len']
+
+class LuaError(Exception):
+    pass
+
+# Lua keeps true/false distinct from 1/0, but Python dicts would merge them
+class _BooleanKey:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return repr(self.value)
+
+BOOLEAN_KEYS = {True: _BooleanKey(True), False: _BooleanKey(False)}
+
+class LuaTable:
+    """A Lua table: a list-backed array part plus a dict hash part.
+
+    As in the reference implementation, t[1]..t[n] live in array (array[0]
+    is t[1]) and everything else in hash. Numbers are parsed as floats, so
+    integral float keys are normalised to int: t[2.0] is t[2].
+
+    Invariants: the array part never ends in nil, and the hash part never
+    holds the key len(array) + 1 (it is moved into the array as soon as the
+    array grows to reach it). So len(array) is always a border and #t is
+    O(1).
+    """
+    __slots__ = ('array', 'hash')
+
+    def __init__(self, array=None, hash=None):
+        self.array = list(array) if array else []
+        while self.array and self.array[-1] is None:
+            self.array.pop()
+        self.hash = {}
+        if hash:
+            for key, value in hash.items():
+                self[key] = value
+
+    @classmethod
+    def from_fields(cls, *fields, rest=()):
+        """The value of a table constructor with keyed fields.
+
+        fields are in source order (so they were evaluated in it): (key,
+        value) pairs for [k]=v and name=v, and (value,) for positional
+        items; rest holds the values of a trailing ... . As in Lua,
+        positional items take indexes 1..n whatever keyed fields say.
+        """
+        array = [field[0] for field in fields if len(field) == 1]
+        array.extend(rest)
+        t = cls(array)
+        size = len(array)
+        for field in fields:
+            if len(field) == 2:
+                key = field[0]
+                if (key.__class__ is float or key.__class__ is int) and 1 <= key <= size and key == int(key):
+                    continue
+                t[key] = field[1]
+        return t
+
+    def __getitem__(self, key):
+        cls = key.__class__
+        if cls is float and key.is_integer():
+            key = int(key)
+            cls = int
+        if cls is int:
+            array = self.array
+            if 0 < key <= len(array):
+                return array[key - 1]
+        elif cls is bool:
+            key = BOOLEAN_KEYS[key]
+        return self.hash.get(key)
+
+    def __setitem__(self, key, value):
+        cls = key.__class__
+        if cls is float:
+            if key.is_integer():
+                key = int(key)
+                cls = int
+            elif key != key:
+                raise LuaError("table index is NaN")
+        if cls is int:
+            array = self.array
+            size = len(array)
+            if 0 < key <= size:
+                array[key - 1] = value
+                if value is None and key == size:
+                    array.pop()
+                    while array and array[-1] is None:
+                        array.pop()
+                return
+            if key == size + 1:
+                if value is not None:
+                    array.append(value)
+                    self._migrate()
+                return
+        elif cls is bool:
+            key = BOOLEAN_KEYS[key]
+        elif key is None:
+            raise LuaError("table index is nil")
+        if value is None:
+            self.hash.pop(key, None)
+        else:
+            self.hash[key] = value
+
+    def _migrate(self):
+        """Move t[n+1], t[n+2], ... from the hash part into the array part."""
+        hash = self.hash
+        if hash:
+            array = self.array
+            key = len(array) + 1
+            while key in hash:
+                array.append(hash.pop(key))
+                key += 1
+
+    def __len__(self):
+        return len(self.array)
+
+    def __bool__(self):
+        return True  # every table is true in Lua, even an empty one
+
+    def insert(self, position, value):
+        size = len(self.array)
+        if not 0 < position <= size + 1:
+            raise LuaError("bad argument #2 to 'insert' (position out of bounds)")
+        if position == size + 1:
+            self[position] = value
+        else:
+            self.array.insert(position - 1, value)
+            self._migrate()
+
+    def remove(self, position=None):
+        array = self.array
+        size = len(array)
+        if position is None:
+            position = size
+        if position == size + 1 or (size == 0 and position == 0):
+            return None  # Lua allows these and returns nil
+        if not 0 < position <= size:
+            raise LuaError("bad argument #2 to 'remove' (position out of bounds)")
+        value = array.pop(position - 1)
+        while array and array[-1] is None:
+            array.pop()
+        return value
+
+    def __iter__(self):
+        """Iterate (key, value) pairs like pairs(): array part first."""
+        for index, value in enumerate(self.array, 1):
+            if value is not None:
+                yield index, value
+        # Copied so fields may be cleared during traversal, as Lua allows
+        for key, value in list(self.hash.items()):
+            if key.__class__ is _BooleanKey:
+                key = key.value
+            yield key, value
+
+    def __repr__(self):
+        return f"table: 0x{id(self):08x}"
+
+def tostring(value):
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value.__class__ is float:
+        # Lua source numbers are all parsed as floats; print whole ones as integers
+        if value.is_integer() and abs(value) < 1e16:
+            return str(int(value))
+        return "%.14g" % value
+    if callable(value) and not isinstance(value, LuaTable):
+        return f"function: 0x{id(value):08x}"
+    return str(value)
+
+def print(*args):
+    builtins.print("\t".join([tostring(arg) for arg in args]))
+
+def pairs(t):
+    return iter(t)
+
+def ipairs(t):
+    array = t.array
+    for index, value in enumerate(array, 1):
+        if value is None:
+            return
+        yield index, value
+
+def _method(obj, name, *args):
+    """obj:name(...), evaluating obj once."""
+    return obj[name](obj, *args)
+
+def _insert(t, *args):
+    if len(args) == 1:
+        t[len(t.array) + 1] = args[0]
+    elif len(args) == 2:
+        t.insert(int(args[0]), args[1])
+    else:
+        raise LuaError("wrong number of arguments to 'insert'")
+
+def _remove(t, position=None):
+    return t.remove(None if position is None else int(position))
+
+def _type_name(value):
+    if value is None:
+        return "nil"
+    if value is True or value is False:
+        return "boolean"
+    if value.__class__ is str:
+        return "string"
+    if value.__class__ is float or value.__class__ is int:
+        return "number"
+    if isinstance(value, LuaTable):
+        return "table"
+    if callable(value):
+        return "function"
+    return "userdata"
+
+def _concat_operand(value):
+    cls = value.__class__
+    if cls is str:
+        return value
+    if cls is float or cls is int:
+        return tostring(value)
+    raise LuaError(f"attempt to concatenate a {_type_name(value)} value")
+
+def _concat(left, right):
+    """left .. right: strings and numbers only, numbers written as tostring does."""
+    return _concat_operand(left) + _concat_operand(right)
+
+def _len(value):
+    """#value: a string's length in bytes (UTF-8), as in Lua, or a table's border."""
+    if value.__class__ is str:
+        return len(value.encode('utf-8'))
+    if isinstance(value, LuaTable):
+        return len(value)
+    raise LuaError(f"attempt to get length of a {_type_name(value)} value")
+
+def _table_concat(t, separator="", first=1, last=None):
+    last = len(t) if last is None else int(last)
+    parts = []
+    for index in range(int(first), last + 1):
+        value = t[index]
+        if value.__class__ is not str and value.__class__ is not float and value.__class__ is not int:
+            raise LuaError(f"invalid value (at index {index}) in table for 'concat'")
+        parts.append(tostring(value))
+    return separator.join(parts)
+
+def _unpack(t, first=1, last=None):
+    last = len(t) if last is None else int(last)
+    return tuple(t[index] for index in range(int(first), last + 1))
+
+table = LuaTable(hash={'insert': _insert, 'remove': _remove, 'concat': _table_concat, 'unpack': _unpack})
@@ -1,9 +1,28 @@
 # lua_tokenizer.py
+import os
 import re
 import json
-from lexer import lexer  # Explicit import of lexer function
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from lexer import lex_file, lex_stream, map_file, NUMBER, STRING, BOOLEAN, NIL, KEYWORD, OP, NAME
+from sources import find_sources
+
+# Lines whose first non-blank characters start a comment
+COMMENT_LINE = re.compile(r'^[ \t]*--', re.MULTILINE)
+COMMENT_LINE_BYTES = re.compile(COMMENT_LINE.pattern.encode('ascii'), re.MULTILINE)
+NEWLINE_BYTES = re.compile(b'\n')
+LITERAL_KINDS = (STRING, NUMBER, BOOLEAN, NIL)
 
 class LuaTokenizer:
+    """Token statistics for one or more Lua files.
+
+    Every occurrence is counted in a single pass over the token stream, with
+    one counter per distinct value, so memory grows with the vocabulary of
+    the input rather than its length. Tokenizing several files accumulates
+    into the same counts, and merge() adds in a tokenizer that ran
+    elsewhere (it pickles, so workers can send theirs back).
+    """
     def __init__(self):
         self.reserved_words = {
             'and', 'break', 'do', 'else', 'elseif', 'end', 'false', 'for',
@@ -14,72 +33,123 @@ class LuaTokenizer:
             '+', '-', '*', '/', '%', '^', '#', '==', '~=', '<=', '>=', '<', '>',
             '=', ';', ':', ',', '.', '..', '...'
         }
-        self.literals = []
-        self.operators_used = []
-        self.variables = {}
-        self.reserved_words_used = []
+        self.literals = Counter()
+        self.operators_used = Counter()
+        self.variables = Counter()
+        self.reserved_words_used = Counter()
         self.total_lines = 0
         self.tokens = []
 
-    def tokenize(self, file_path, include_lines=False):
-        with open(file_path, 'r') as file:
-            source = file.read()
-            lines = source.split('\n')
-            self.total_lines = len([line for line in lines if not line.strip().startswith('--')])
-            
-            if include_lines:
-                self.tokens = self._tokenize_with_lines(source)
-            else:
-                self.tokens = lexer(source)  # Now properly references the imported lexer function
+    def tokenize(self, file_path, include_lines=False, use_mmap=False, keep_tokens=False):
+        # The whole file is lexed in one pass; every token carries its line
+        # number, so include_lines no longer needs a separate per-line path.
+        # With use_mmap the file is scanned in place and never held as a str.
+        # Tokens are counted as they stream past and only kept (in
+        # self.tokens) when keep_tokens is set.
+        if use_mmap:
+            source = map_file(file_path)
+            try:
+                self.total_lines += self._count_lines(source)
+            finally:
+                if source:
+                    source.close()
+            tokens = lex_file(file_path)
+        else:
+            with open(file_path, 'r') as file:
+                source = file.read()
+            self.total_lines += self._count_lines(source)
+            tokens = lex_stream(source)
+        if keep_tokens:
+            tokens = self.tokens = list(tokens)
+        self.count(tokens)
 
-            for token in self.tokens:
-                if token["type"] in ["STRING", "NUMBER", "BOOLEAN", "NIL"]:
-                    self.literals.append(token["value"])
-                elif token["type"] == "OP":
-                    self.operators_used.append(token["value"])
-                elif token["type"] == "KEYWORD":
-                    self.reserved_words_used.append(token["value"])
-                elif token["type"] == "NAME":
-                    var = token["value"]
-                    self.variables[var] = self.variables.get(var, 0) + 1
+    def count(self, tokens):
+        """Add a stream of tokens to the statistics."""
+        literals = self.literals
+        operators_used = self.operators_used
+        reserved_words_used = self.reserved_words_used
+        variables = self.variables
+        for token in tokens:
+            kind = token.kind
+            if kind == NAME:
+                variables[token.value] += 1
+            elif kind == OP:
+                operators_used[token.value] += 1
+            elif kind == KEYWORD:
+                reserved_words_used[token.value] += 1
+            elif kind in LITERAL_KINDS:
+                literals[token.value] += 1
 
-    def _tokenize_with_lines(self, source):
-        tokens = []
-        lines = source.split('\n')
-        for line_num, line in enumerate(lines, 1):
-            if line.strip().startswith('--'):
-                continue  # Skip comments
-                
-            line_tokens = lexer(line)  # Now properly references the imported lexer function
-            for token in line_tokens:
-                token['lineno'] = line_num
-            tokens.extend(line_tokens)
-        return tokens
+    def merge(self, other):
+        """Add the statistics gathered by another LuaTokenizer to these."""
+        self.literals.update(other.literals)
+        self.operators_used.update(other.operators_used)
+        self.variables.update(other.variables)
+        self.reserved_words_used.update(other.reserved_words_used)
+        self.total_lines += other.total_lines
+        return self
+
+    def _count_lines(self, source):
+        if isinstance(source, str):
+            newlines, comments = source.count('\n'), COMMENT_LINE.finditer(source)
+        else:
+            newlines = sum(1 for _ in NEWLINE_BYTES.finditer(source))
+            comments = COMMENT_LINE_BYTES.finditer(source)
+        return newlines + 1 - sum(1 for _ in comments)
 
     def generate_report(self):
         return {
             "literals": {
-                "count": len(self.literals),
-                "values": list(set(self.literals))
+                "count": sum(self.literals.values()),
+                "values": list(self.literals)
             },
             "operators": {
-                "count": len(self.operators_used),
-                "values": list(set(self.operators_used))
+                "count": sum(self.operators_used.values()),
+                "values": list(self.operators_used)
             },
             "variables": {
                 "count": len(self.variables),
-                "values": list(self.variables.keys()),
+                "values": list(self.variables),
                 "duplicates": [var for var, count in self.variables.items() if count > 1]
             },
             "reserved_words": {
-                "count": len(self.reserved_words_used),
-                "values": list(set(self.reserved_words_used))
+                "count": sum(self.reserved_words_used.values()),
+                "values": list(self.reserved_words_used)
             },
             "total_lines_processed": self.total_lines
         }
 
-if __name__ == "__main__":
+def _tokenize_file(path):
     tokenizer = LuaTokenizer()
-    tokenizer.tokenize("src/example.lua")
-    report = tokenizer.generate_report()
-    print(json.dumps(report, indent=4))
\ No newline at end of file
+    tokenizer.tokenize(path, use_mmap=True)
+    return tokenizer
+
+def tokenize_files(paths, jobs=None):
+    """One LuaTokenizer holding the statistics of every file in paths.
+
+    Files are spread over jobs worker processes; each sends back its
+    counters, which are merged in path order.
+    """
+    paths = list(paths)
+    jobs = min(jobs or os.cpu_count() or 1, max(1, len(paths)))
+    merged = LuaTokenizer()
+    if jobs == 1:
+        for path in paths:
+            merged.tokenize(path, use_mmap=True)
+        return merged
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(jobs) as executor:
+        for tokenizer in executor.map(_tokenize_file, paths, chunksize=chunksize):
+            merged.merge(tokenizer)
+    return merged
+
+if __name__ == "__main__":
+    # python lua_tokenizer.py [file or directory ...]: one report for them all
+    paths = []
+    for argument in sys.argv[1:] or ["src/example.lua"]:
+        if os.path.isdir(argument):
+            paths.extend(os.path.join(argument, path) for path in find_sources(argument))
+        else:
+            paths.append(argument)
+    report = tokenize_files(paths).generate_report()
+    print(json.dumps(report, indent=4))
@@ -1,40 +1,113 @@
 # main.py
-from lua_tokenizer import LuaTokenizer
-from parser import Parser
+import argparse
+import asyncio
 import os
+import sys
+import time
+from cache import CompileCache
+from compile_server import serve
+from compiler import compile_file
+from instrument import Instrumentation
+from project import compile_project, install_runtime, write_module
+from watch import ProjectWatcher
 
-def main():
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+cache_dir = os.path.join(script_dir, ".lora_cache")
+
+def compile_example(args):
     lua_file = os.path.join(script_dir, "example.lua")  # Updated path
-    
-    # Tokenize with line numbers
-    tokenizer = LuaTokenizer()
-    tokenizer.tokenize(lua_file, include_lines=True)  # Use the full path
-    
-    # Rest of your code remains the same...
-    parser = Parser(tokenizer.tokens)
-    ast = parser.parse()
-    
+
+    # Unchanged sources are served from the cache without recompiling
+    cache = CompileCache(cache_dir)
+    stats = Instrumentation(trace_memory=True) if args.stats else None
+    result = compile_file(lua_file, cache, stats=stats)
+    if stats is not None:
+        write_stats(args.stats, stats)
+
     # Show symbol table and errors
-    parser.symbol_table.print_state()
-    
-    # Generate Python code
-    python_code = "\n\n".join(
-        node.translate(parser.symbol_table) 
-        for node in ast 
-        if node is not None
-    )
-    
-    # Add standard library stubs
-    stdlib = """
-# Lua standard library stubs
-def print(*args):
-    print(' '.join(str(arg) for arg in args))
-"""
-    
-    with open("output.py", "w") as f:
-        f.write(stdlib + "\n\n" + python_code)
+    result.symbol_table.print_state()
+
+    write_module("output.py", result.python_code, result.mappings, lua_file)
+    install_runtime(os.getcwd())
+    return 0
+
+def write_stats(path, stats):
+    with open(path, "w") as f:
+        f.write(stats.to_json() + "\n")
+
+def build(args):
+    result = compile_project(args.root, args.output, args.jobs, None if args.no_cache else cache_dir,
+                             instrument=bool(args.stats), max_errors=args.max_errors)
+    if result.stats is not None:
+        write_stats(args.stats, result.stats)
+    for error in result.errors:
+        print(error)
+    failed = sum(1 for file in result.files if not file.ok)
+    print(f"Compiled {len(result.files)} files ({failed} with errors) into {args.output}")
+    return 1 if failed else 0
+
+def watch(args):
+    watcher = ProjectWatcher(args.root, args.output, args.interval)
+    started = time.perf_counter()
+    changed, _ = watcher.poll()
+    print(f"Compiled {len(changed)} files in {(time.perf_counter() - started) * 1000:.0f} ms; watching {args.root}")
+
+    def report(changed, removed):
+        for path in changed:
+            print(f"Rebuilt {path}")
+            for error in watcher.errors(path):
+                print(f"  {error}")
+        for path in removed:
+            print(f"Removed {path}")
+
+    try:
+        watcher.run(report)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def run_server(args):
+    def ready(address):
+        print(f"Serving compile requests on {address}")
+
+    try:
+        asyncio.run(serve(args.socket, args.host, args.port, args.jobs, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile Lua to Python")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="write per-phase timings and counters as JSON (example and build)")
+    commands = parser.add_subparsers(dest="command")
+
+    build_parser = commands.add_parser("build", help="compile every .lua file under a directory")
+    build_parser.add_argument("root", help="project directory")
+    build_parser.add_argument("-o", "--output", default="build", help="output directory (default: build)")
+    build_parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per core)")
+    build_parser.add_argument("--no-cache", action="store_true", help="do not read or write the compile cache")
+    build_parser.add_argument("--max-errors", type=int, metavar="N",
+                              help="stop parsing a file after N syntax errors")
+    build_parser.set_defaults(run=build)
+
+    watch_parser = commands.add_parser("watch", help="recompile changed .lua files as they are saved")
+    watch_parser.add_argument("root", help="project directory")
+    watch_parser.add_argument("-o", "--output", default="build", help="output directory (default: build)")
+    watch_parser.add_argument("--interval", type=float, default=0.1, help="seconds between polls (default: 0.1)")
+    watch_parser.set_defaults(run=watch)
+
+    serve_parser = commands.add_parser("serve", help="compile requests sent over a socket (see compile_server.py)")
+    serve_parser.add_argument("--socket", metavar="PATH", help="listen on this Unix socket instead of TCP")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="TCP host (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    serve_parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per core)")
+    serve_parser.set_defaults(run=run_server)
+
+    args = parser.parse_args(argv)
+    # With no command, compile example.lua to output.py as before
+    return getattr(args, "run", compile_example)(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
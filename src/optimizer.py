@@ -0,0 +1,253 @@
+# optimizer.py
+import math
+from ast_nodes import *
+
+# Expression fields folded bottom-up, in evaluation order
+EXPRESSION_CHILDREN = {
+    BinaryOpNode: ('left', 'right'),
+    LogicalNode: ('left', 'right'),
+    UnaryOpNode: ('right',),
+    GroupingNode: ('expression',),
+    IndexNode: ('obj', 'key'),
+    CallNode: ('callee', 'args'),
+    MethodCallNode: ('obj', 'args'),
+    TableNode: ('elements',),
+    TableKeyNode: ('key', 'value'),
+    TableValueNode: ('value',),
+}
+
+NAN = float('nan')
+INF = float('inf')
+
+def lua_type(value):
+    if value is None:
+        return 'nil'
+    if value is True or value is False:
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    return 'string'
+
+def is_truthy(value):
+    """Lua truthiness: only nil and false are false (0 and "" are true)."""
+    return value is not None and value is not False
+
+def _divide(a, b):
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(INF, a) * math.copysign(1.0, b)
+    return a / b
+
+def _floor_divide(a, b):
+    quotient = _divide(a, b)
+    return float(math.floor(quotient)) if math.isfinite(quotient) else quotient
+
+def _modulo(a, b):
+    if b == 0 or math.isinf(a) or a != a or b != b:
+        return NAN
+    # Lua: the result takes the sign of the divisor
+    remainder = math.fmod(a, b)
+    if remainder * b < 0:
+        remainder += b
+    return remainder
+
+ARITHMETIC = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': _divide,
+    '//': _floor_divide,
+    '%': _modulo,
+    '^': math.pow,
+}
+ORDERING = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+def fold_binary(operator, a, b):
+    """Return (True, value) if Lua would compute operator on constants a and b.
+
+    Anything that could raise at runtime, depends on number formatting
+    (1 .. "") or on integer representation (bitwise operators) is left alone.
+    """
+    a_type, b_type = lua_type(a), lua_type(b)
+    if operator == '==' or operator == '~=':
+        equal = a_type == b_type and a == b
+        return True, equal if operator == '==' else not equal
+    if a_type == 'number' and b_type == 'number':
+        if operator in ARITHMETIC:
+            try:
+                return True, float(ARITHMETIC[operator](float(a), float(b)))
+            except (ValueError, OverflowError):
+                return False, None
+        if operator in ORDERING:
+            return True, ORDERING[operator](a, b)
+    if operator == '..' and a_type == 'string' and b_type == 'string':
+        return True, a + b
+    return False, None
+
+def fold_unary(operator, value):
+    if operator == 'not':
+        return True, not is_truthy(value)
+    if operator == '-' and lua_type(value) == 'number':
+        return True, -float(value)
+    if operator == '#' and lua_type(value) == 'string':
+        return True, len(value.encode('utf-8'))  # Lua counts bytes, as lua_runtime._len does
+    return False, None
+
+class Optimizer:
+    """Fold constants and drop dead branches from a resolved AST.
+
+    Runs after resolver.Resolver, whose bindings identify each local: a
+    local that is declared with a constant value and never assigned again
+    is replaced by that value wherever it is read. Conditions that fold to
+    a constant remove the branches (or loops) they can never run.
+
+    Statement lists are rebuilt and nodes updated in place. Expressions are
+    folded bottom-up from an explicit list, since long operator chains
+    build trees deeper than the recursion limit.
+    """
+    def __init__(self):
+        self.constants = {}
+        self.assigned = set()
+
+    def optimize(self, statements):
+        for node in walk(statements):
+            binding = getattr(node, 'binding', None)
+            if binding is not None and binding.symbol is not None and type(node) is not VariableNode:
+                if not (type(node) is FunctionNode and node.is_local):
+                    self.assigned.add(binding.symbol)
+        return self.block(statements)
+
+    def block(self, statements):
+        folded = []
+        for statement in statements:
+            if statement is None:
+                folded.append(None)  # keep parse-error placeholders in place
+            else:
+                folded.extend(self.statement(statement))
+        return folded
+
+    def statement(self, node):
+        """Return the statements node becomes (none, itself, or a branch body)."""
+        cls = type(node)
+        if cls is IfNode:
+            return self.if_statement(node)
+        if cls is WhileNode:
+            node.condition = self.expression(node.condition)
+            if isinstance(node.condition, LiteralNode) and not is_truthy(node.condition.value):
+                return []
+            node.body = self.block(node.body)
+        elif cls is VariableDeclarationNode:
+            node.initializers = [self.expression(value) for value in node.initializers]
+            for binding, value in zip(node.bindings or (), node.initializers):
+                if isinstance(value, LiteralNode) and binding.symbol not in self.assigned:
+                    self.constants[binding.symbol] = value.value
+        elif cls is FunctionNode:
+            node.body = self.block(node.body)
+        elif cls is RepeatNode:
+            node.body = self.block(node.body)
+            node.condition = self.expression(node.condition)
+        elif cls is BlockNode:
+            node.body = self.block(node.body)
+        elif cls is ForNumericNode:
+            node.start = self.expression(node.start)
+            node.end = self.expression(node.end)
+            node.step = self.expression(node.step) if node.step is not None else None
+            node.body = self.block(node.body)
+        elif cls is ForGenericNode:
+            node.iter_exprs = [self.expression(value) for value in node.iter_exprs]
+            node.body = self.block(node.body)
+        elif cls is ReturnNode:
+            node.values = [self.expression(value) for value in node.values]
+        elif cls is AssignmentNode or cls is IndexAssignmentNode:
+            if cls is IndexAssignmentNode:
+                node.target = self.expression(node.target)
+            node.value = self.expression(node.value)
+        elif cls is ExpressionStatementNode:
+            node.expression = self.expression(node.expression)
+        return [node]
+
+    def if_statement(self, node):
+        kept = []
+        else_branch = node.else_branch
+        for condition, body in [(node.condition, node.then_branch)] + list(node.elif_branches):
+            condition = self.expression(condition)
+            if not isinstance(condition, LiteralNode):
+                kept.append((condition, body))
+            elif is_truthy(condition.value):
+                # Always taken: it becomes the else, and later branches are dead
+                else_branch = body
+                break
+        if not kept:
+            return self.block(else_branch or [])
+        node.condition = kept[0][0]
+        node.then_branch = self.block(kept[0][1])
+        node.elif_branches = [(condition, self.block(body)) for condition, body in kept[1:]]
+        node.else_branch = self.block(else_branch) if else_branch else None
+        return [node]
+
+    def expression(self, root):
+        # Parents come before children in order, so walking it backwards
+        # folds every child before the node that holds it.
+        order = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            fields = EXPRESSION_CHILDREN.get(type(node), ())
+            for name in fields:
+                value = getattr(node, name)
+                if isinstance(value, list):
+                    stack.extend(value)
+                elif value is not None:
+                    stack.append(value)
+
+        folded = {}
+        for node in reversed(order):
+            cls = type(node)
+            for name in EXPRESSION_CHILDREN.get(cls, ()):
+                value = getattr(node, name)
+                if isinstance(value, list):
+                    setattr(node, name, [folded.get(id(item), item) for item in value])
+                elif value is not None:
+                    setattr(node, name, folded.get(id(value), value))
+            replacement = self.fold(node)
+            if replacement is not node:
+                folded[id(node)] = replacement
+        return folded.get(id(root), root)
+
+    def fold(self, node):
+        cls = type(node)
+        if cls is VariableNode:
+            binding = node.binding
+            if binding is not None and binding.symbol in self.constants:
+                return LiteralNode(self.constants[binding.symbol])
+        elif cls is GroupingNode:
+            if isinstance(node.expression, LiteralNode):
+                return node.expression
+        elif cls is UnaryOpNode:
+            if isinstance(node.right, LiteralNode):
+                ok, value = fold_unary(node.operator, node.right.value)
+                if ok:
+                    return LiteralNode(value)
+        elif cls is BinaryOpNode:
+            if isinstance(node.left, LiteralNode) and isinstance(node.right, LiteralNode):
+                ok, value = fold_binary(node.operator, node.left.value, node.right.value)
+                if ok:
+                    return LiteralNode(value)
+        elif cls is LogicalNode:
+            if isinstance(node.left, LiteralNode):
+                # and keeps a false left operand, or keeps a true one
+                if is_truthy(node.left.value) == (node.operator == 'or'):
+                    return node.left
+                if isinstance(node.right, (CallNode, MethodCallNode, VarargNode)):
+                    return GroupingNode(node.right)  # still truncated to one value
+                return node.right
+        elif cls is FunctionNode:
+            node.body = self.block(node.body)
+        return node
@@ -1,12 +1,71 @@
 # parser.py
+from bisect import bisect_right
 from ast_nodes import *
+from lexer import (
+    NUMBER, STRING, BOOLEAN, NIL, KEYWORD, OP, NAME, TOKEN_TYPES, EOF_TOKEN,
+    number_value, string_value
+)
 from symbol_table import SymbolTable
 
+# Binary operators in Lua precedence order, lowest first. Each entry maps to
+# (left binding power, right binding power); right-associative operators
+# bind tighter on their right so a ^ b ^ c parses as a ^ (b ^ c).
+BINARY_PRECEDENCE = [
+    (["or"], "left"),
+    (["and"], "left"),
+    (["<", ">", "<=", ">=", "~=", "=="], "left"),
+    (["|"], "left"),
+    (["~"], "left"),
+    (["&"], "left"),
+    (["<<", ">>"], "left"),
+    ([".."], "right"),
+    (["+", "-"], "left"),
+    (["*", "/", "//", "%"], "left"),
+    ([], "unary"),
+    (["^"], "right"),
+]
+BINARY_POWERS = {}
+for level, (operators, associativity) in enumerate(BINARY_PRECEDENCE, 1):
+    for operator in operators:
+        if associativity == "left":
+            BINARY_POWERS[operator] = (2 * level, 2 * level + 1)
+        else:
+            BINARY_POWERS[operator] = (2 * level + 1, 2 * level)
+UNARY_POWER = 2 * [assoc for _, assoc in BINARY_PRECEDENCE].index("unary") + 2
+UNARY_OPERATORS = frozenset({"not", "-", "#", "~"})
+
+# Keywords that close a block; a return statement stops before them
+BLOCK_END = frozenset({"end", "else", "elseif", "until"})
+
+# Error recovery resumes at one of these keywords, or just after an 'end'
+SYNC_KEYWORDS = frozenset({"function", "local", "if", "while", "for", "return"})
+
+class ParseError(RuntimeError):
+    """A syntax error; declaration() records it and resumes parsing."""
+
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, max_errors=None):
+        # Accept either a materialized token list or any iterable (such as
+        # lexer.lex_stream) that is pulled from lazily as parsing advances.
+        if isinstance(tokens, list):
+            self.tokens = tokens
+            self._pending = None
+        else:
+            self.tokens = []
+            self._pending = iter(tokens)
         self.current = 0
         self.symbol_table = SymbolTable()
+        # Stop after this many syntax errors (None: never)
+        self.max_errors = max_errors
+        self.error_count = 0
+        self.stopped = False
+        # Recovery points: indexes of tokens a statement can start at,
+        # filled in as far as tokens[:_indexed] (see synchronize)
+        self._sync_points = []
+        self._indexed = 0
+        self._after_end = False
+        # Blocks open around the statement being parsed
+        self._depth = 0
     
     def parse(self):
         statements = []
@@ -14,309 +73,389 @@ class Parser:
             statements.append(self.declaration())
         return statements
     
+    def parse_into(self, arena):
+        """Parse into a NodeArena, packing each top-level statement as it is
+        produced so the object form of the whole tree never exists at once."""
+        while not self.is_at_end():
+            arena.add_root(self.declaration())
+        return arena
+    
     def declaration(self):
+        start = self.current
         try:
-            if self.match("KEYWORD", "function"):
+            if self.check(KEYWORD, "function"):
                 return self.function_declaration()
-            elif self.match("KEYWORD", "local"):
-                if self.check("KEYWORD", "function"):
+            elif self.match(KEYWORD, "local"):
+                if self.check(KEYWORD, "function"):
                     return self.function_declaration(is_local=True)
                 return self.variable_declaration()
             return self.statement()
+        except RecursionError:
+            if self._depth:
+                raise  # let the top-level statement report it
+            self.error_count += 1
+            self.stop("Statement nested too deeply to parse, parsing stopped", self.tokens[start].lineno)
+            return None
         except Exception as e:
-            self.symbol_table.add_error(str(e), self.peek().get('lineno'))
-            self.synchronize()
+            if self.stopped:
+                return None  # unwinding after the error cap was reached
+            self.symbol_table.add_error(str(e), self.peek().lineno)
+            self.error_count += 1
+            if self.max_errors is not None and self.error_count >= self.max_errors:
+                self.stop()
+            else:
+                self.synchronize()
             return None
     
     def function_declaration(self, is_local=False):
-        start_token = self.consume("KEYWORD", "function", "Expect 'function'")
-        name = self.consume("NAME", None, "Expect function name").value
+        start_token = self.consume(KEYWORD, "function", "Expect 'function'")
+        name_token = self.consume(NAME, None, "Expect function name")
+        name = name_token.value
+        
+        # function a.b.c() / function a.b:c() assign into a table field
+        target = None
+        is_method = False
+        if not is_local:
+            while self.check(OP, ".") or self.check(OP, ":"):
+                is_method = self.advance().value == ":"
+                field = self.consume(NAME, None, "Expect field name").value
+                target = IndexNode(target or VariableNode(name), LiteralNode(field))
+                if is_method:
+                    break
         
-        # Enter function scope
-        self.symbol_table.enter_scope(is_function=True)
+        params, body, end_token = self.function_body(["self"] if is_method else [])
         
-        self.consume("OP", "(", "Expect '(' after function name")
-        params = []
-        if not self.check("OP", ")"):
-            param = self.consume("NAME", None, "Expect parameter name")
-            self.symbol_table.declare(param.value, "any", is_param=True, lineno=param.get('lineno'))
-            params.append(param.value)
-            
-            while self.match("OP", ","):
-                param = self.consume("NAME", None, "Expect parameter name")
-                self.symbol_table.declare(param.value, "any", is_param=True, lineno=param.get('lineno'))
+        if target is not None:
+            function = FunctionNode(None, params, body,
+                                    start_line=start_token.lineno,
+                                    end_line=end_token.lineno)
+            return IndexAssignmentNode(target, function, start_line=start_token.lineno)
+        return FunctionNode(name, params, body, is_local, 
+                          start_line=start_token.lineno,
+                          end_line=end_token.lineno)
+    
+    def function_body(self, params):
+        """Parse '(params) block end' after the function name (if any)."""
+        self.consume(OP, "(", "Expect '(' before parameters")
+        if not self.check(OP, ")"):
+            while True:
+                if self.match(OP, "..."):
+                    # Handle varargs
+                    params.append("...")
+                    break
+                param = self.consume(NAME, None, "Expect parameter name")
                 params.append(param.value)
+                if not self.match(OP, ","):
+                    break
         
-        self.consume("OP", ")", "Expect ')' after parameters")
-        
-        # Handle varargs
-        if self.match("OP", "..."):
-            params.append("...")
-            self.symbol_table.declare("...", "any", is_param=True)
+        self.consume(OP, ")", "Expect ')' after parameters")
         
         body = self.block("end")
-        end_token = self.consume("KEYWORD", "end", "Expect 'end' after function body")
-        
-        # Exit function scope
-        self.symbol_table.exit_scope()
-        
-        return FunctionNode(name, params, body, is_local, 
-                          start_line=start_token.get('lineno'),
-                          end_line=end_token.get('lineno'))
+        end_token = self.consume(KEYWORD, "end", "Expect 'end' after function body")
+        return params, body, end_token
     
     def variable_declaration(self):
-        names = []
         first_token = self.peek()
         
         # Collect variable names
-        name_token = self.consume("NAME", None, "Expect variable name")
-        self.symbol_table.declare(
-            name_token.value, 
-            "any", 
-            is_local=True,
-            lineno=name_token.get('lineno')
-        )
-        names.append(name_token.value)
-        
-        while self.match("OP", ","):
-            name_token = self.consume("NAME", None, "Expect variable name")
-            self.symbol_table.declare(
-                name_token.value,
-                "any",
-                is_local=True,
-                lineno=name_token.get('lineno')
-            )
-            names.append(name_token.value)
+        names = [self.consume(NAME, None, "Expect variable name").value]
+        while self.match(OP, ","):
+            names.append(self.consume(NAME, None, "Expect variable name").value)
         
         initializers = []
-        if self.match("OP", "="):
+        if self.match(OP, "="):
             initializers.append(self.expression())
-            while self.match("OP", ","):
+            while self.match(OP, ","):
                 initializers.append(self.expression())
         
-        return VariableDeclarationNode(names, initializers)
+        return VariableDeclarationNode(names, initializers, start_line=first_token.lineno)
     
     def statement(self):
-        if self.match("KEYWORD", "if"):
+        if self.match(KEYWORD, "if"):
             return self.if_statement()
-        elif self.match("KEYWORD", "while"):
+        elif self.match(KEYWORD, "while"):
             return self.while_statement()
-        elif self.match("KEYWORD", "for"):
+        elif self.match(KEYWORD, "for"):
             return self.for_statement()
-        elif self.match("KEYWORD", "return"):
+        elif self.match(KEYWORD, "repeat"):
+            return self.repeat_statement()
+        elif self.match(KEYWORD, "return"):
             return self.return_statement()
-        elif self.match("KEYWORD", "do"):
+        elif self.match(KEYWORD, "break"):
+            return BreakNode(start_line=self.previous().lineno)
+        elif self.match(KEYWORD, "do"):
+            start_token = self.previous()
             stmts = self.block("end")
-            self.consume("KEYWORD", "end", "Expect 'end' after block")
-            return BlockNode(stmts)
+            self.consume(KEYWORD, "end", "Expect 'end' after block")
+            return BlockNode(stmts, start_line=start_token.lineno)
+        elif self.match(OP, ";"):
+            return None
         else:
             return self.expression_statement()
     
     def if_statement(self):
+        start_line = self.previous().lineno
         condition = self.expression()
-        self.consume("KEYWORD", "then", "Expect 'then' after if condition")
+        self.consume(KEYWORD, "then", "Expect 'then' after if condition")
         
         then_branch = self.block("end", "elseif", "else")
         elif_branches = []
         else_branch = None
         
-        while self.match("KEYWORD", "elseif"):
+        while self.match(KEYWORD, "elseif"):
             elif_cond = self.expression()
-            self.consume("KEYWORD", "then", "Expect 'then' after elseif condition")
+            self.consume(KEYWORD, "then", "Expect 'then' after elseif condition")
             elif_body = self.block("end", "elseif", "else")
             elif_branches.append((elif_cond, elif_body))
         
-        if self.match("KEYWORD", "else"):
+        if self.match(KEYWORD, "else"):
             else_branch = self.block("end")
         
-        end_token = self.consume("KEYWORD", "end", "Expect 'end' after if statement")
-        return IfNode(condition, then_branch, elif_branches, else_branch, end_token.get('lineno'))
+        end_token = self.consume(KEYWORD, "end", "Expect 'end' after if statement")
+        return IfNode(condition, then_branch, elif_branches, else_branch,
+                      start_line=start_line, end_line=end_token.lineno)
     
     def while_statement(self):
+        start_line = self.previous().lineno
         condition = self.expression()
-        self.consume("KEYWORD", "do", "Expect 'do' after while condition")
+        self.consume(KEYWORD, "do", "Expect 'do' after while condition")
         body = self.block("end")
-        self.consume("KEYWORD", "end", "Expect 'end' after while body")
-        return WhileNode(condition, body)
+        self.consume(KEYWORD, "end", "Expect 'end' after while body")
+        return WhileNode(condition, body, start_line=start_line)
+    
+    def repeat_statement(self):
+        start_line = self.previous().lineno
+        body = self.block("until")
+        self.consume(KEYWORD, "until", "Expect 'until' after repeat body")
+        condition = self.expression()
+        return RepeatNode(body, condition, start_line=start_line)
     
     def for_statement(self):
-        var_name = self.consume("NAME", None, "Expect variable name").value
+        start_line = self.previous().lineno
+        var_name = self.consume(NAME, None, "Expect variable name").value
         
-        if self.match("OP", "="):  # Numeric for
+        if self.match(OP, "="):  # Numeric for
             start = self.expression()
-            self.consume("OP", ",", "Expect ',' after start value")
+            self.consume(OP, ",", "Expect ',' after start value")
             end = self.expression()
             
             step = None
-            if self.match("OP", ","):
+            if self.match(OP, ","):
                 step = self.expression()
             
-            self.consume("KEYWORD", "do", "Expect 'do' after for clause")
+            self.consume(KEYWORD, "do", "Expect 'do' after for clause")
             body = self.block("end")
-            self.consume("KEYWORD", "end", "Expect 'end' after for body")
-            return ForNumericNode(var_name, start, end, step, body)
+            self.consume(KEYWORD, "end", "Expect 'end' after for body")
+            return ForNumericNode(var_name, start, end, step, body, start_line=start_line)
         else:  # Generic for
-            self.consume("KEYWORD", "in", "Expect 'in' after variable")
+            var_names = [var_name]
+            while self.match(OP, ","):
+                var_names.append(self.consume(NAME, None, "Expect variable name").value)
+            self.consume(KEYWORD, "in", "Expect 'in' after variable")
             iter_exprs = [self.expression()]
-            while self.match("OP", ","):
+            while self.match(OP, ","):
                 iter_exprs.append(self.expression())
             
-            self.consume("KEYWORD", "do", "Expect 'do' after for iterators")
+            self.consume(KEYWORD, "do", "Expect 'do' after for iterators")
             body = self.block("end")
-            self.consume("KEYWORD", "end", "Expect 'end' after for body")
-            return ForGenericNode([var_name], iter_exprs, body)
+            self.consume(KEYWORD, "end", "Expect 'end' after for body")
+            return ForGenericNode(var_names, iter_exprs, body, start_line=start_line)
     
     def return_statement(self):
+        start_line = self.previous().lineno
         values = []
-        if not self.check("KEYWORD", "end") and not self.check("KEYWORD", "else"):
+        if not (self.is_at_end() or self.check(OP, ";") or self.check_any(KEYWORD, BLOCK_END)):
             values.append(self.expression())
-            while self.match("OP", ","):
+            while self.match(OP, ","):
                 values.append(self.expression())
-        return ReturnNode(values)
-    
-    
+        self.match(OP, ";")
+        return ReturnNode(values, start_line=start_line)
     
     def expression_statement(self):
-        expr = self.expression()
-        return ExpressionStatementNode(expr)
-    
-    def block(self, *end_tokens):
-        statements = []
-        while not (self.is_at_end() or any(self.check("KEYWORD", token) for token in end_tokens)):
-            statements.append(self.declaration())
-        return statements
-    
-    def expression(self):
-        return self.assignment()
-    
-    def assignment(self):
-        expr = self.logic_or()
+        start_line = self.peek().lineno
+        expr = self.suffixed_expression()
         
-        if self.match("OP", "="):
-            equals = self.previous()
-            value = self.assignment()
-            
+        if self.match(OP, "="):
+            value = self.expression()
             if isinstance(expr, VariableNode):
-                return AssignmentNode(expr.name, value)
-            
-            raise RuntimeError(f"Invalid assignment target at {equals.value}")
-        
-        return expr
-    
-    def logic_or(self):
-        expr = self.logic_and()
-        
-        while self.match("KEYWORD", "or"):
-            operator = self.previous()
-            right = self.logic_and()
-            expr = LogicalNode(expr, operator.value, right)
-        
-        return expr
-    
-    def logic_and(self):
-        expr = self.equality()
+                return AssignmentNode(expr.name, value, start_line=start_line)
+            if isinstance(expr, IndexNode):
+                return IndexAssignmentNode(expr, value, start_line=start_line)
+            raise ParseError(f"Invalid assignment target at line {start_line}")
         
-        while self.match("KEYWORD", "and"):
-            operator = self.previous()
-            right = self.equality()
-            expr = LogicalNode(expr, operator.value, right)
-        
-        return expr
-    
-    def equality(self):
-        expr = self.comparison()
-        
-        while self.match("OP", "==") or self.match("OP", "~="):
-            operator = self.previous()
-            right = self.comparison()
-            expr = BinaryOpNode(expr, operator.value, right)
-        
-        return expr
+        if not isinstance(expr, (CallNode, MethodCallNode)):
+            raise ParseError(f"Syntax error near '{self.peek().value}' at line {start_line}")
+        return ExpressionStatementNode(expr, start_line=start_line)
     
-    def comparison(self):
-        expr = self.term()
-        
-        while (self.match("OP", ">") or self.match("OP", ">=") or
-               self.match("OP", "<") or self.match("OP", "<=")):
-            operator = self.previous()
-            right = self.term()
-            expr = BinaryOpNode(expr, operator.value, right)
-        
-        return expr
-    
-    def term(self):
-        expr = self.factor()
-        
-        while self.match("OP", "+") or self.match("OP", "-"):
-            operator = self.previous()
-            right = self.factor()
-            expr = BinaryOpNode(expr, operator.value, right)
-        
-        return expr
-    
-    def factor(self):
-        expr = self.unary()
-        
-        while self.match("OP", "*") or self.match("OP", "/") or self.match("OP", "%"):
-            operator = self.previous()
-            right = self.unary()
-            expr = BinaryOpNode(expr, operator.value, right)
-        
-        return expr
+    def block(self, *end_tokens):
+        statements = []
+        self._depth += 1
+        try:
+            while not (self.is_at_end() or self.check_any(KEYWORD, end_tokens)):
+                statements.append(self.declaration())
+        finally:
+            self._depth -= 1
+        return statements
     
-    def unary(self):
-        if self.match("OP", "-") or self.match("KEYWORD", "not"):
-            operator = self.previous()
-            right = self.unary()
-            return UnaryOpNode(operator.value, right)
-        
-        return self.primary()
+    # Expressions: precedence climbing over BINARY_POWERS. Operators still
+    # waiting for their right operand are kept on an explicit stack rather
+    # than the Python one, so long right-associative chains (a .. b .. c),
+    # runs of unary operators and deeply nested parentheses parse in
+    # constant stack depth.
+    def expression(self, min_power=0):
+        pending = []
+        while True:
+            # Prefix: unary operators and opening parentheses
+            token = self.peek()
+            if token.kind == OP or token.kind == KEYWORD:
+                value = token.value
+                if value in UNARY_OPERATORS:
+                    self.advance()
+                    pending.append((UnaryOpNode, value, None, min_power))
+                    min_power = UNARY_POWER
+                    continue
+                if value == "(" and token.kind == OP:
+                    self.advance()
+                    pending.append((GroupingNode, None, None, min_power))
+                    min_power = 0
+                    continue
+            left = self.simple_expression()
+
+            while True:
+                token = self.peek()
+                if token.kind == OP or token.kind == KEYWORD:
+                    powers = BINARY_POWERS.get(token.value)
+                    if powers is not None and powers[0] >= min_power:
+                        self.advance()
+                        pending.append((BinaryOpNode, token.value, left, min_power))
+                        min_power = powers[1]
+                        break  # parse the right operand
+                if not pending:
+                    return left
+                # Nothing binds tighter here, so the innermost operator is complete
+                node_type, operator, operand, min_power = pending.pop()
+                if node_type is BinaryOpNode:
+                    if operator == "and" or operator == "or":
+                        left = LogicalNode(operand, operator, left)
+                    else:
+                        left = BinaryOpNode(operand, operator, left)
+                elif node_type is UnaryOpNode:
+                    left = UnaryOpNode(operator, left)
+                else:
+                    self.consume(OP, ")", "Expect ')' after expression")
+                    left = self.suffixes(GroupingNode(left))
+    
+    def simple_expression(self):
+        token = self.peek()
+        kind = token.kind
+        if kind == NAME:
+            # Names may be followed by calls/indexing
+            return self.suffixed_expression()
+        
+        self.advance_or_fail()
+        if kind == NUMBER:
+            return LiteralNode(number_value(token.value))
+        elif kind == STRING:
+            return LiteralNode(string_value(token.value))
+        elif kind == BOOLEAN:
+            return LiteralNode(token.value == "true")
+        elif kind == NIL:
+            return LiteralNode(None)
+        elif kind == OP:
+            if token.value == "{":
+                return self.table_constructor()
+            if token.value == "...":
+                return VarargNode()
+        elif kind == KEYWORD and token.value == "function":
+            params, body, end_token = self.function_body([])
+            return FunctionNode(None, params, body,
+                                start_line=token.lineno, end_line=end_token.lineno)
+        
+        raise ParseError(f"Expect expression at {token.value}")
     
     def primary(self):
-        if self.match("NUMBER"):
-            return LiteralNode(float(self.previous().value))
-        elif self.match("STRING"):
-            return LiteralNode(self.previous().value[1:-1])  # Remove quotes
-        elif self.match("BOOLEAN"):
-            return LiteralNode(self.previous().value == "true")
-        elif self.match("NIL"):
-            return LiteralNode(None)
-        elif self.match("NAME"):
+        if self.match(NAME):
             return VariableNode(self.previous().value)
-        elif self.match("OP", "("):
+        elif self.match(OP, "("):
             expr = self.expression()
-            self.consume("OP", ")", "Expect ')' after expression")
+            self.consume(OP, ")", "Expect ')' after expression")
             return GroupingNode(expr)
-        elif self.match("OP", "{"):
-            return self.table_constructor()
         
-        raise RuntimeError(f"Expect expression at {self.peek().value}")
+        raise ParseError(f"Expect expression at {self.peek().value}")
+    
+    def suffixed_expression(self):
+        return self.suffixes(self.primary())
+    
+    def suffixes(self, expr):
+        """Apply any field accesses, indexing and calls that follow expr."""
+        while True:
+            token = self.peek()
+            if token.kind == OP:
+                value = token.value
+                if value == ".":
+                    self.advance()
+                    name = self.consume(NAME, None, "Expect field name after '.'")
+                    expr = IndexNode(expr, LiteralNode(name.value))
+                    continue
+                elif value == "[":
+                    self.advance()
+                    key = self.expression()
+                    self.consume(OP, "]", "Expect ']' after index")
+                    expr = IndexNode(expr, key)
+                    continue
+                elif value == ":":
+                    self.advance()
+                    method = self.consume(NAME, None, "Expect method name after ':'").value
+                    expr = MethodCallNode(expr, method, self.call_arguments())
+                    continue
+                elif value == "(" or value == "{":
+                    expr = CallNode(expr, self.call_arguments())
+                    continue
+            elif token.kind == STRING:
+                expr = CallNode(expr, self.call_arguments())
+                continue
+            return expr
+    
+    def call_arguments(self):
+        token = self.advance_or_fail()
+        if token.kind == STRING:
+            return [LiteralNode(string_value(token.value))]
+        if token.kind == OP and token.value == "{":
+            return [self.table_constructor()]
+        if not (token.kind == OP and token.value == "("):
+            raise ParseError(f"Expect function arguments at line {token.lineno}")
+        args = []
+        if not self.check(OP, ")"):
+            args.append(self.expression())
+            while self.match(OP, ","):
+                args.append(self.expression())
+        self.consume(OP, ")", "Expect ')' after arguments")
+        return args
     
     def table_constructor(self):
         elements = []
-        start_token = self.peek()
+        start_token = self.previous()
         
-        if not self.check("OP", "}"):
+        if not self.check(OP, "}"):
             elements.append(self.table_element())
-            while self.match("OP", ",") or self.match("OP", ";"):
-                if self.check("OP", "}"):
+            while self.match(OP, ",") or self.match(OP, ";"):
+                if self.check(OP, "}"):
                     break
                 elements.append(self.table_element())
         
-        end_token = self.consume("OP", "}", "Expect '}' after table elements")
-        return TableNode(elements, start_line=start_token.get('lineno'), end_line=end_token.get('lineno'))
+        end_token = self.consume(OP, "}", "Expect '}' after table elements")
+        return TableNode(elements, start_line=start_token.lineno, end_line=end_token.lineno)
     
     def table_element(self):
-        if self.check("OP", "[") and self.check_next("OP", "]"):
-            self.advance()  # '['
+        if self.match(OP, "["):
             key = self.expression()
-            self.consume("OP", "]", "Expect ']' after table key")
-            self.consume("OP", "=", "Expect '=' after table key")
+            self.consume(OP, "]", "Expect ']' after table key")
+            self.consume(OP, "=", "Expect '=' after table key")
             value = self.expression()
             return TableKeyNode(key, value)
-        elif self.check("NAME") and self.check_next("OP", "="):
-            key = LiteralNode(self.consume("NAME", None, "Expect field name").value)
-            self.consume("OP", "=", "Expect '=' after field name")
+        elif self.check(NAME) and self.check_next(OP, "="):
+            key = LiteralNode(self.consume(NAME, None, "Expect field name").value)
+            self.consume(OP, "=", "Expect '=' after field name")
             value = self.expression()
             return TableKeyNode(key, value)
         else:
@@ -332,66 +471,118 @@ class Parser:
     def check(self, type_, value=None):
         if self.is_at_end():
             return False
-        token = self.peek()
-        if value is None:
-            return token["type"] == type_
-        return token["type"] == type_ and token["value"] == value
+        token = self.tokens[self.current]
+        return token.kind == type_ and (value is None or token.value == value)
+    
+    def check_any(self, type_, values):
+        if self.is_at_end():
+            return False
+        token = self.tokens[self.current]
+        return token.kind == type_ and token.value in values
     
     def check_next(self, type_, value=None):
-        if self.current + 1 >= len(self.tokens):
+        if not self._fill(self.current + 1):
             return False
         token = self.tokens[self.current + 1]
-        if value is None:
-            return token["type"] == type_
-        return token["type"] == type_ and token["value"] == value
+        return token.kind == type_ and (value is None or token.value == value)
     
     def consume(self, expected_type, expected_value=None, message=None):
         if self.is_at_end():
-            last_token = self.tokens[-1] if self.tokens else {}
-            raise RuntimeError(
-                f"{message or 'Unexpected end of input'} at line {last_token.get('lineno', '?')}"
+            lineno = self.tokens[-1].lineno if len(self.tokens) else '?'
+            raise ParseError(
+                f"{message or 'Unexpected end of input'} at line {lineno}"
             )
         
-        token = self.peek()
-        if not isinstance(token, dict) or 'type' not in token:
-            raise RuntimeError(f"Invalid token format at position {self.current}")
-        
-        if (token['type'] == expected_type and 
-            (expected_value is None or token['value'] == expected_value)):
+        token = self.tokens[self.current]
+        if (token.kind == expected_type and 
+            (expected_value is None or token.value == expected_value)):
             return self.advance()
         
-        raise RuntimeError(
-            f"{message or f'Expected {expected_type}'} at line {token.get('lineno', '?')}"
+        raise ParseError(
+            f"{message or f'Expected {TOKEN_TYPES[expected_type]}'} at line {token.lineno}"
         )
     
+    def advance_or_fail(self):
+        if self.is_at_end():
+            raise ParseError("Unexpected end of input")
+        return self.advance()
+    
     def advance(self):
         if not self.is_at_end():
             self.current += 1
         return self.previous()
     
     def is_at_end(self):
-        return self.current >= len(self.tokens)
+        return self.current >= len(self.tokens) and not self._fill(self.current)
+    
+    def _fill(self, index):
+        """Pull tokens from the pending stream until index is buffered."""
+        if index < len(self.tokens):
+            return True
+        if self._pending is None:
+            return False
+        for token in self._pending:
+            self.tokens.append(token)
+            if index < len(self.tokens):
+                return True
+        self._pending = None
+        return False
     
     def peek(self):
         if self.is_at_end():
-            return {'type': 'EOF', 'value': '', 'lineno': -1}
+            return EOF_TOKEN
         return self.tokens[self.current]
     
     def previous(self):
         return self.tokens[self.current - 1]
     
     def synchronize(self):
-        self.advance()
-        while not self.is_at_end():
-            if self.previous()["type"] == "KEYWORD" and self.previous()["value"] == "end":
-                return
-            
-            if self.peek()["type"] == "KEYWORD" and self.peek()["value"] in {
-                "function", "local", "if", "while", "for", "return"
-            }:
+        """Skip past the current token to the next place a statement can start.
+        
+        That is a SYNC_KEYWORDS token or the token after an 'end'. Such
+        positions are indexed once, in a single pass over the tokens, so
+        each recovery is a binary search rather than a token-by-token walk.
+        """
+        points = self._sync_points
+        index = bisect_right(points, self.current)
+        while index == len(points):
+            if not self._index_sync_points():
+                self.current = len(self.tokens)
                 return
-            
-            self.advance()
+            index = bisect_right(points, self.current, index)
+        self.current = points[index]
+    
+    def _index_sync_points(self):
+        """Extend the recovery index over more tokens; False at end of input."""
+        start = self._indexed
+        if not self._fill(start):
+            return False
+        tokens = self.tokens
+        if self._pending is None:
+            stop = len(tokens)
+        else:
+            # A lazy stream is indexed a statement's worth at a time, so an
+            # early error does not pull in the rest of the input
+            stop = min(len(tokens), start + 64)
+        points = self._sync_points
+        after_end = self._after_end
+        for index in range(start, stop):
+            token = tokens[index]
+            is_keyword = token.kind == KEYWORD
+            if after_end or (is_keyword and token.value in SYNC_KEYWORDS):
+                points.append(index)
+            after_end = is_keyword and token.value == "end"
+        self._after_end = after_end
+        self._indexed = stop
+        return True
+    
+    def stop(self, message=None, lineno=None):
+        """Give up after max_errors, or with message: skip the rest of the input."""
+        self.stopped = True
+        self.symbol_table.add_error(message or f"Too many errors ({self.error_count}), parsing stopped", lineno)
+        while self._fill(len(self.tokens)):
+            pass
+        self.current = len(self.tokens)
 
 def parse_tokens(tokens):
     return Parser(tokens).parse()
\ No newline at end of file
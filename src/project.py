@@ -0,0 +1,165 @@
+# project.py
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from cache import CompileCache
+from compiler import PYTHON_PRELUDE, compile_file
+from instrument import Instrumentation
+from source_map import SourceMap, map_path
+from sources import find_sources
+from symbol_table import SymbolTable
+
+class FileResult:
+    """What a worker sends back for one module: its output and diagnostics.
+
+    errors lists errors (the first error_count entries) followed by
+    resolver warnings such as unused locals. stats is an
+    Instrumentation.to_dict() when the build is instrumented.
+    """
+    __slots__ = ('path', 'output_path', 'python_code', 'errors', 'error_count', 'stats')
+
+    def __init__(self, path, output_path, python_code, errors, error_count=0, stats=None):
+        self.path = path
+        self.output_path = output_path
+        self.python_code = python_code
+        self.errors = errors
+        self.error_count = error_count
+        self.stats = stats
+
+    @property
+    def ok(self):
+        """True when the module compiled; warnings do not count."""
+        return self.error_count == 0
+
+class ProjectResult:
+    """Per-file results in path order, plus every diagnostic in one table.
+
+    stats merges the files' instrumentation, or is None if there was none.
+    """
+    __slots__ = ('root', 'files', 'symbol_table', 'stats')
+
+    def __init__(self, root, files):
+        self.root = root
+        self.files = files
+        self.symbol_table = SymbolTable()
+        self.stats = None
+        for result in files:
+            self.symbol_table.errors.extend(f"{result.path}: {error}" for error in result.errors)
+            if result.stats is not None:
+                self.stats = (self.stats or Instrumentation()).merge(result.stats)
+
+    @property
+    def errors(self):
+        return self.symbol_table.errors
+
+def output_path_for(output_dir, path):
+    """Where the module at path (relative to the project root) is written."""
+    return os.path.join(output_dir, path[:-len('.lua')] + '.py')
+
+# Lines written ahead of the generated code, which source maps skip
+CODE_OFFSET = (PYTHON_PRELUDE + "\n\n").count("\n")
+
+def write_module(output_path, python_code, mappings=None, source=None):
+    """Write a generated module, replacing any old one in a single step.
+
+    Readers (such as a hot-reloading server) never see a half-written file.
+    Given the encoded mappings of python_code and the path of its Lua
+    source, a source map is written next to it (see source_map.map_path).
+    """
+    directory = os.path.dirname(output_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    _replace(output_path, PYTHON_PRELUDE + "\n\n" + python_code)
+    if mappings is not None:
+        source = os.path.relpath(source, directory).replace(os.sep, '/')
+        _replace(map_path(output_path), SourceMap(source, mappings, CODE_OFFSET).to_json())
+
+def _replace(path, text):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+RUNTIME_DIR = os.path.dirname(os.path.abspath(__file__))
+# Modules every generated module imports
+RUNTIME_MODULES = ('lua_runtime.py', 'source_map.py')
+
+def install_runtime(output_dir):
+    """Copy the runtime modules generated code imports into output_dir.
+
+    Generated modules import them by their top-level names, so every
+    directory that receives modules gets its own copy: a module then runs
+    with only its own directory on sys.path, as it has when run as a
+    script. Returns the path of the copied lua_runtime.py.
+    """
+    targets = [os.path.join(output_dir, name) for name in RUNTIME_MODULES]
+    if os.path.abspath(output_dir) == RUNTIME_DIR:
+        return targets[0]
+    os.makedirs(output_dir, exist_ok=True)
+    for name, target in zip(RUNTIME_MODULES, targets):
+        shutil.copyfile(os.path.join(RUNTIME_DIR, name), target)
+    return targets[0]
+
+# Per-process state set up once by _start_worker
+_worker = {}
+
+def _start_worker(root, output_dir, cache_dir, instrument=False, max_errors=None):
+    _worker['root'] = root
+    _worker['output_dir'] = output_dir
+    _worker['cache'] = CompileCache(cache_dir) if cache_dir else None
+    _worker['instrument'] = instrument
+    _worker['max_errors'] = max_errors
+
+def _compile_module(path):
+    """Compile one module (path relative to the project root) in a worker."""
+    stats = Instrumentation() if _worker['instrument'] else None
+    source = os.path.join(_worker['root'], path)
+    try:
+        result = compile_file(source, _worker['cache'], stats=stats,
+                              max_errors=_worker['max_errors'])
+    except (OSError, UnicodeDecodeError) as error:
+        return FileResult(path, None, None, [f"Cannot read file: {error}"], 1)
+
+    output_path = None
+    output_dir = _worker['output_dir']
+    if output_dir is not None:
+        output_path = output_path_for(output_dir, path)
+        if stats is not None:
+            with stats.phase('write'):
+                write_module(output_path, result.python_code, result.mappings, source)
+        else:
+            write_module(output_path, result.python_code, result.mappings, source)
+    # Tokens and AST stay in the worker; only the output crosses the process boundary
+    return FileResult(path, output_path, result.python_code, list(result.errors), result.error_count,
+                      stats.to_dict() if stats is not None else None)
+
+def compile_project(root, output_dir=None, jobs=None, cache_dir=None, instrument=False, max_errors=None):
+    """Compile every .lua file under root, in parallel across jobs processes.
+
+    Each module is written to output_dir (mirroring the source tree) when one
+    is given. Results come back in sorted path order whatever order the
+    workers finish in, so output and diagnostics are deterministic. With
+    instrument, each worker times its phases and the result's stats sums them.
+    max_errors caps the syntax errors reported per file (see Parser).
+    """
+    paths = find_sources(root)
+    if output_dir is not None:
+        directories = {os.path.dirname(output_path_for(output_dir, path)) for path in paths}
+        for directory in sorted(directories | {output_dir}):
+            install_runtime(directory)
+    jobs = min(jobs or os.cpu_count() or 1, max(1, len(paths)))
+    initargs = (root, output_dir, cache_dir, instrument, max_errors)
+
+    if jobs == 1:
+        _start_worker(*initargs)
+        return ProjectResult(root, [_compile_module(path) for path in paths])
+
+    # A few chunks per worker amortises pickling without leaving cores idle at the end
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(jobs, initializer=_start_worker, initargs=initargs) as executor:
+        return ProjectResult(root, list(executor.map(_compile_module, paths, chunksize=chunksize)))
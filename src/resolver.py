@@ -0,0 +1,176 @@
+# resolver.py
+from ast_nodes import *
+from symbol_table import SymbolTable
+
+# How a name reference reaches its variable
+LOCAL, UPVALUE, GLOBAL = range(3)
+BINDING_KINDS = ('LOCAL', 'UPVALUE', 'GLOBAL')
+
+class Binding:
+    """The variable a VariableNode, AssignmentNode or named FunctionNode refers to.
+
+    depth is the function nesting level that declared the variable (0 for
+    the main chunk) and slot its index among that function's locals; both
+    are -1 for globals. symbol is the declaring Symbol (None for globals),
+    shared by every reference to the same local.
+    """
+    __slots__ = ('kind', 'name', 'depth', 'slot', 'symbol')
+
+    def __init__(self, kind, name, depth=-1, slot=-1, symbol=None):
+        self.kind = kind
+        self.name = name
+        self.depth = depth
+        self.slot = slot
+        self.symbol = symbol
+
+    def __repr__(self):
+        return f"Binding({BINDING_KINDS[self.kind]}, {self.name!r}, depth={self.depth}, slot={self.slot})"
+
+class FunctionFrame:
+    __slots__ = ('depth', 'next_slot', 'writes')
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.next_slot = 0
+        self.writes = {}  # name -> Binding of outer variables the function assigns
+
+class Resolver:
+    """Annotate an AST with resolved bindings in one pass.
+
+    Lua scoping is followed exactly: every block opens a scope, locals are
+    visible from the statement after their declaration, and repeat's
+    condition sees the loop body. Each reference gets a Binding, and each
+    function records the outer variables it assigns (outer_writes) so the
+    emitter can declare them global/nonlocal without looking anything up.
+
+    Unused locals are reported to symbol_table as their scope closes. Like
+    the emitter, the walk keeps its work on an explicit stack.
+    """
+    def __init__(self, symbol_table=None):
+        self.symbol_table = symbol_table if symbol_table is not None else SymbolTable()
+        self.frames = [FunctionFrame(0)]
+        self.globals = {}
+        self.lookups = 0
+        self.handlers = {
+            VariableDeclarationNode: self.variable_declaration,
+            FunctionNode: self.function,
+            IfNode: self.if_statement,
+            WhileNode: lambda node: [node.condition] + self.scoped(node.body),
+            RepeatNode: lambda node: [(self.enter_block, None)] + list(node.body) +
+                                     [node.condition, (self.exit_block, None)],
+            BlockNode: lambda node: self.scoped(node.body),
+            ForNumericNode: lambda node: [node.start, node.end, node.step] +
+                                         self.scoped(node.body, [node.var_name], node.start_line),
+            ForGenericNode: lambda node: list(node.iter_exprs) +
+                                         self.scoped(node.body, node.vars, node.start_line),
+            AssignmentNode: lambda node: [node.value, (self.assignment, node)],
+            VariableNode: self.variable,
+        }
+
+    def resolve(self, statements):
+        """Annotate statements (a list of top-level nodes) in place."""
+        handlers = self.handlers
+        stack = [statement for statement in reversed(statements) if statement is not None]
+        pop = stack.pop
+        while stack:
+            item = pop()
+            if item is None:
+                continue
+            if item.__class__ is tuple:
+                action, argument = item
+                action(argument)
+                continue
+            handler = handlers.get(item.__class__)
+            if handler is None:
+                items = list(iter_child_nodes(item))
+            else:
+                items = handler(item)
+                if items is None:
+                    continue
+            items.reverse()
+            stack.extend(items)
+        return statements
+
+    # Bindings
+    def binding(self, name, mark_used):
+        self.lookups += 1
+        symbol = self.symbol_table.resolve(name, mark_used)
+        if symbol is None:
+            binding = self.globals.get(name)
+            if binding is None:
+                binding = self.globals[name] = Binding(GLOBAL, name)
+            return binding
+        kind = LOCAL if symbol.depth == self.frames[-1].depth else UPVALUE
+        return Binding(kind, name, symbol.depth, symbol.slot, symbol)
+
+    def write(self, name):
+        """Binding for an assignment to name, noted on the enclosing function."""
+        binding = self.binding(name, False)
+        frame = self.frames[-1]
+        if binding.kind != LOCAL and frame.depth:
+            frame.writes.setdefault(name, binding)
+        return binding
+
+    def declare(self, names, lineno, is_param=False):
+        frame = self.frames[-1]
+        for name in names:
+            symbol = self.symbol_table.declare(name, "any", is_local=True, is_param=is_param, lineno=lineno)
+            symbol.depth = frame.depth
+            symbol.slot = frame.next_slot
+            frame.next_slot += 1
+
+    def enter_block(self, names_and_line):
+        self.symbol_table.enter_scope()
+        if names_and_line is not None:
+            # Loop control variables are bound by the loop itself, so like
+            # parameters they are never reported as unused
+            self.declare(*names_and_line, is_param=True)
+
+    def exit_block(self, _):
+        self.symbol_table.exit_scope()
+
+    def scoped(self, body, names=None, lineno=None):
+        declared = (names, lineno) if names is not None else None
+        return [(self.enter_block, declared)] + list(body) + [(self.exit_block, None)]
+
+    # Nodes
+    def variable(self, node):
+        node.binding = self.binding(node.name, True)
+
+    def assignment(self, node):
+        node.binding = self.write(node.name)
+
+    def variable_declaration(self, node):
+        # Initializers still see any outer variable the declaration shadows
+        return list(node.initializers) + [(self.declare_locals, node)]
+
+    def declare_locals(self, node):
+        self.declare(node.names, node.start_line)
+        node.bindings = [self.binding(name, False) for name in node.names]
+
+    def function(self, node):
+        if node.name is not None:
+            if node.is_local:
+                # Declared first so the body can call itself
+                self.declare([node.name], node.start_line)
+                node.binding = self.binding(node.name, False)
+            else:
+                node.binding = self.write(node.name)
+        return [(self.enter_function, node)] + list(node.body) + [(self.exit_function, node)]
+
+    def enter_function(self, node):
+        self.frames.append(FunctionFrame(self.frames[-1].depth + 1))
+        self.symbol_table.enter_scope(is_function=True)
+        self.declare(node.parameters, node.start_line, is_param=True)
+
+    def exit_function(self, node):
+        self.symbol_table.exit_scope()
+        node.outer_writes = tuple(self.frames.pop().writes.values())
+
+    def if_statement(self, node):
+        items = [node.condition] + self.scoped(node.then_branch)
+        for condition, body in node.elif_branches:
+            items += [condition] + self.scoped(body)
+        if node.else_branch:
+            items += self.scoped(node.else_branch)
+        return items
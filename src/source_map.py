@@ -0,0 +1,167 @@
+# source_map.py
+"""Map lines of generated Python back to the Lua lines they came from.
+
+The emitter records, for each generated line that starts a statement, the
+Lua line of that statement. encode() packs those pairs as base64 VLQ
+deltas (the encoding of JavaScript source maps), usually two characters
+per statement, and a SourceMap only decodes them when a line is looked up.
+
+Generated modules import this file, so it must not depend on the compiler.
+install() hooks sys.excepthook so that uncaught exceptions from them are
+reported at Lua locations; nothing is read until a traceback is printed.
+"""
+import json
+import linecache
+import os
+import sys
+import traceback
+from bisect import bisect_right
+
+BASE64_DIGITS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+BASE64_VALUES = {digit: value for value, digit in enumerate(BASE64_DIGITS)}
+# Each digit carries five bits of the value plus a continuation bit
+VLQ_SHIFT = 5
+VLQ_CONTINUE = 1 << VLQ_SHIFT
+VLQ_MASK = VLQ_CONTINUE - 1
+
+MAP_SUFFIX = '.map'
+
+def encode(line_map):
+    """Encode (python_line, lua_line) pairs, in python_line order, as a string."""
+    out = []
+    previous_python = previous_lua = 0
+    for python_line, lua_line in line_map:
+        for delta in (python_line - previous_python, lua_line - previous_lua):
+            value = (-delta << 1) | 1 if delta < 0 else delta << 1
+            while True:
+                digit = value & VLQ_MASK
+                value >>= VLQ_SHIFT
+                if value:
+                    out.append(BASE64_DIGITS[digit | VLQ_CONTINUE])
+                else:
+                    out.append(BASE64_DIGITS[digit])
+                    break
+        previous_python, previous_lua = python_line, lua_line
+    return "".join(out)
+
+def decode(mappings):
+    """Return the (python_line, lua_line) pairs encode() packed into mappings."""
+    values = []
+    value = shift = 0
+    for digit in mappings:
+        digit = BASE64_VALUES[digit]
+        value += (digit & VLQ_MASK) << shift
+        if digit & VLQ_CONTINUE:
+            shift += VLQ_SHIFT
+            continue
+        values.append(-(value >> 1) if value & 1 else value >> 1)
+        value = shift = 0
+    line_map = []
+    python_line = lua_line = 0
+    for index in range(0, len(values) - 1, 2):
+        python_line += values[index]
+        lua_line += values[index + 1]
+        line_map.append((python_line, lua_line))
+    return line_map
+
+class SourceMap:
+    """The Lua file a generated module came from and its encoded line map.
+
+    offset is the number of lines written ahead of the emitted code (the
+    prelude), which the mappings do not count.
+    """
+    __slots__ = ('source', 'mappings', 'offset', '_python_lines', '_lua_lines')
+
+    def __init__(self, source, mappings, offset=0):
+        self.source = source
+        self.mappings = mappings
+        self.offset = offset
+        self._python_lines = None
+        self._lua_lines = None
+
+    def lua_line(self, python_line):
+        """The Lua line of the statement generated at or above python_line."""
+        if self._python_lines is None:
+            line_map = decode(self.mappings)
+            self._python_lines = [python + self.offset for python, _ in line_map]
+            self._lua_lines = [lua for _, lua in line_map]
+        index = bisect_right(self._python_lines, python_line)
+        return self._lua_lines[index - 1] if index else None
+
+    def to_json(self):
+        return json.dumps({"version": 1, "source": self.source, "offset": self.offset,
+                           "mappings": self.mappings})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data["source"], data["mappings"], data.get("offset", 0))
+
+def map_path(python_path):
+    """Where the map of the module written to python_path lives."""
+    return python_path + MAP_SUFFIX
+
+# Maps by generated file name; None marks a file known to have no map
+_maps = {}
+
+def register(filename, source_map):
+    """Use source_map for code compiled under filename (such as exec'd code)."""
+    _maps[filename] = source_map
+
+def find_map(filename):
+    """The SourceMap for a generated file: registered, or read from beside it."""
+    try:
+        return _maps[filename]
+    except KeyError:
+        pass
+    source_map = None
+    if filename.endswith('.py'):
+        try:
+            with open(map_path(filename), 'r') as file:
+                source_map = SourceMap.from_json(file.read())
+        except (OSError, ValueError, KeyError):
+            pass
+    _maps[filename] = source_map
+    return source_map
+
+def lua_frame(frame):
+    """A FrameSummary pointing at Lua source, or frame itself if it has no map."""
+    source_map = find_map(frame.filename)
+    if source_map is None or frame.lineno is None:
+        return frame
+    line = source_map.lua_line(frame.lineno)
+    if line is None:
+        return frame
+    source = source_map.source
+    if not os.path.isabs(source):
+        # Sources are recorded relative to the generated module
+        source = os.path.normpath(os.path.join(os.path.dirname(frame.filename), source))
+    text = linecache.getline(source, line).strip()
+    return traceback.FrameSummary(source, line, frame.name, lookup_line=False, line=text)
+
+def rewrite(exception):
+    """Point every frame of a TracebackException (and its causes) at Lua lines."""
+    pending = [exception]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        current.stack = traceback.StackSummary.from_list([lua_frame(frame) for frame in current.stack])
+        pending += [current.__cause__, current.__context__]
+    return exception
+
+def format_exception(error):
+    """Format error and its traceback like traceback.format_exception, at Lua lines."""
+    exception = traceback.TracebackException(type(error), error, error.__traceback__)
+    return "".join(rewrite(exception).format())
+
+def _excepthook(error_type, error, tb):
+    exception = traceback.TracebackException(error_type, error, tb)
+    sys.stderr.write("".join(rewrite(exception).format()))
+
+def install():
+    """Report uncaught exceptions at Lua locations. Safe to call repeatedly."""
+    if sys.excepthook is sys.__excepthook__:
+        sys.excepthook = _excepthook
@@ -0,0 +1,15 @@
+# sources.py
+"""Finding Lua sources, kept apart from the build so tools can import it cheaply."""
+import os
+
+def find_sources(root):
+    """Return the .lua files under root as sorted, '/'-separated relative paths."""
+    paths = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith('.')]
+        for name in files:
+            if name.endswith('.lua'):
+                relative = os.path.relpath(os.path.join(directory, name), root)
+                paths.append(relative.replace(os.sep, '/'))
+    paths.sort()
+    return paths
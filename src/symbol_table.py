@@ -1,18 +1,12 @@
 # symbol_table.py
-class SymbolTable:
-    def declare(self, name, symbol_type, value=None, is_local=False, is_param=False, lineno=None):
-        if isinstance(name, dict):
-            name_value = name.get('value') or name.get('raw')
-            lineno = name.get('lineno', lineno)
-            if not name_value:
-                self.add_error("Invalid token format - missing name", lineno)
-                return None
-            name = str(name_value)
-        
-        # Rest of the method remains the same
-        if not isinstance(name, str):
-            self.add_error(f"Invalid symbol name: {name}", lineno)
-            return None
+from lexer import Token
+
+class Symbol:
+    """One declared name: its binding in a single scope."""
+    __slots__ = ('name', 'type', 'value', 'is_local', 'is_param', 'is_used', 'lineno', 'meta',
+                 'depth', 'slot')
+    
+    def __init__(self, name, symbol_type, value=None, is_local=False, is_param=False, lineno=None):
         self.name = name
         self.type = symbol_type  # 'number', 'string', 'boolean', 'table', 'function', 'any'
         self.value = value
@@ -20,21 +14,36 @@ class SymbolTable:
         self.is_param = is_param
         self.is_used = False
         self.lineno = lineno
-        self.meta = {}  # For table metatables
+        self.meta = None  # For table metatables
+        self.depth = 0  # function nesting level that declared it (0 = main chunk)
+        self.slot = -1  # index among that function's locals
+    
+    def __repr__(self):
+        return f"Symbol({self.name!r}, {self.type!r}, line {self.lineno})"
 
 class SymbolTable:
+    """Scoped symbols with O(1) declare, lookup and (amortised) exit.
+    
+    bindings maps each name to a stack of its Symbols, innermost last, so a
+    lookup is one dict probe however deep the nesting. Each scope keeps an
+    undo log of the Symbols declared in it; leaving the scope pops exactly
+    those off their stacks, which is also when unused locals are reported.
+    """
     def __init__(self):
-        self.scopes = [{}]
-        self.current_scope_level = 0
+        self.bindings = {}
+        self.scopes = [[]]
         self.function_scopes = []
         self.errors = []
     
+    @property
+    def current_scope_level(self):
+        return len(self.scopes) - 1
+    
     def add_error(self, message, lineno=None):
         self.errors.append(f"Line {lineno}: {message}" if lineno else message)
     
     def enter_scope(self, is_function=False):
-        self.scopes.append({})
-        self.current_scope_level += 1
+        self.scopes.append([])
         if is_function:
             self.function_scopes.append(self.current_scope_level)
     
@@ -42,39 +51,64 @@ class SymbolTable:
         if len(self.scopes) == 1:
             self.add_error("Cannot exit global scope")
             return
-        
+    
         # Check for unused locals
-        for name, sym in self.scopes[-1].items():
+        declared = self.scopes[-1]
+        for sym in declared:
             if sym.is_local and not sym.is_used and not sym.is_param:
-                self.add_error(f"Unused local variable '{name}'", sym.lineno)
+                self.add_error(f"Unused local variable '{sym.name}'", sym.lineno)
         
-        if self.function_scopes and self.function_scopes[-1] == self.current_scope_level:
+        # Undo the scope's declarations, uncovering any bindings they shadowed
+        bindings = self.bindings
+        for sym in reversed(self.scopes.pop()):
+            stack = bindings[sym.name]
+            stack.pop()
+            if not stack:
+                del bindings[sym.name]
+        if self.function_scopes and self.function_scopes[-1] > self.current_scope_level:
             self.function_scopes.pop()
-        
-        self.scopes.pop()
-        self.current_scope_level -= 1
     
     def declare(self, name, symbol_type, value=None, is_local=False, is_param=False, lineno=None):
-        if isinstance(name, dict):  # Handle token objects
+        if isinstance(name, (dict, Token)):  # Handle token objects
             name_value = name.get('value') or name.get('raw')
-            lineno = name.get('lineno')
+            lineno = name.get('lineno', lineno)
             if not name_value:
                 self.add_error("Invalid token format - missing name", lineno)
                 return None
-            name = name_value
+            name = str(name_value)
+    
+        if not isinstance(name, str):
+            self.add_error(f"Invalid symbol name: {name}", lineno)
+            return None
+        sym = Symbol(name, symbol_type, value, is_local, is_param, lineno)
+        stack = self.bindings.get(name)
+        if stack is None:
+            self.bindings[name] = [sym]
+        else:
+            stack.append(sym)  # shadows the outer binding until this scope exits
+        self.scopes[-1].append(sym)
+        return sym
+    
+    def resolve(self, name, mark_used=True):
+        """Return the innermost Symbol for name, or None if it is a global."""
+        stack = self.bindings.get(name)
+        if stack is None:
+            return None
+        sym = stack[-1]
+        if mark_used and not sym.is_param:
+            sym.is_used = True
+        return sym
     
     def lookup(self, name, mark_used=True, lineno=None):
-        for scope in reversed(self.scopes):
-            if name in scope:
-                if mark_used and not scope[name].is_param:
-                    scope[name].is_used = True
-                return scope[name]
-        self.add_error(f"Undefined variable '{name}'", lineno)
-        return Symbol(name, 'any')  # Return dummy symbol
+        sym = self.resolve(name, mark_used)
+        if sym is None:
+            self.add_error(f"Undefined variable '{name}'", lineno)
+            return Symbol(name, 'any')  # Return dummy symbol
+        return sym
     
     def assign(self, name, value, lineno=None):
         symbol = self.lookup(name, lineno=lineno)
-        
+    
         # Type checking
         if symbol.type != 'any' and value is not None:
             type_ok = (
@@ -88,7 +122,7 @@ class SymbolTable:
                     f"Type mismatch: cannot assign {type(value)} to {symbol.type} '{name}'",
                     lineno
                 )
-        
+    
         symbol.value = value
         return symbol
     
@@ -100,15 +134,15 @@ class SymbolTable:
         print("-------------------")
         for i, scope in enumerate(self.scopes):
             print(f"Scope Level {i}:")
-            for name, sym in scope.items():
+            for sym in scope:
                 flags = []
                 if sym.is_local: flags.append("local")
                 if sym.is_param: flags.append("param")
                 if sym.is_used: flags.append("used")
                 flag_str = f" ({', '.join(flags)})" if flags else ""
-                print(f"  {name}: {sym.type} = {sym.value}{flag_str}")
+                print(f"  {sym.name}: {sym.type} = {sym.value}{flag_str}")
         if self.errors:
             print("\nErrors/Warnings:")
             for error in self.errors:
                 print(f"  {error}")
-        print("-------------------\n")
\ No newline at end of file
+        print("-------------------\n")
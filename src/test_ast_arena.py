@@ -0,0 +1,53 @@
+import os
+from ast_arena import NodeArena, NODE_TYPES
+from ast_nodes import FunctionNode, IfNode, LiteralNode
+from lexer import lexer
+from parser import Parser
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example.lua")
+
+def parse(source):
+    return Parser(lexer(source)).parse()
+
+def test_nodes_have_no_instance_dict():
+    for cls in NODE_TYPES:
+        assert not hasattr(cls.__new__(cls), "__dict__"), cls.__name__
+
+def test_round_trip_preserves_translation():
+    with open(EXAMPLE) as f:
+        ast = parse(f.read())
+    arena = NodeArena.from_nodes(ast)
+    restored = arena.to_nodes()
+    assert [n.translate() if n else None for n in restored] == [n.translate() if n else None for n in ast]
+
+def test_field_access_without_materialising():
+    ast = parse("if x then y = 1 elseif z then y = 2 end")
+    arena = NodeArena.from_nodes(ast)
+    root = arena.roots[0] >> 2
+    assert arena.kind(root) is IfNode
+    elif_branches = arena.field(root, "elif_branches")
+    assert isinstance(elif_branches[0], tuple)
+    assert arena.count_by_kind()["AssignmentNode"] == 2
+
+def test_constants_keep_their_type():
+    arena = NodeArena.from_nodes([LiteralNode(1.0), LiteralNode(True), LiteralNode(1)])
+    assert [type(n.value) for n in arena.to_nodes()] == [float, bool, int]
+
+def test_parse_into_arena():
+    source = "function f(a) return a end\nlocal x = f(1)"
+    arena = Parser(lexer(source)).parse_into(NodeArena())
+    assert len(arena.roots) == 2
+    assert isinstance(arena.to_nodes()[0], FunctionNode)
+
+def test_deep_expressions_round_trip():
+    source = "local x = " + " + ".join(["a"] * 1500)
+    arena = Parser(lexer(source)).parse_into(NodeArena())
+    restored = arena.to_nodes()
+    assert arena.count_by_kind()["BinaryOpNode"] == 1499
+    assert NodeArena.from_nodes(restored).count_by_kind() == arena.count_by_kind()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
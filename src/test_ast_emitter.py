@@ -0,0 +1,90 @@
+import io
+import traceback
+from contextlib import redirect_stdout
+import source_map
+from compiler import PYTHON_PRELUDE, compile_code, compile_source
+
+PROGRAM = """
+local function fact(n)
+  if n <= 1 then return 1 end
+  return n * fact(n - 1)
+end
+local t = {10, 20, name = "x"}
+local total = 0
+for i, v in ipairs(t) do total = total + v end
+local pick = function(a, ...) local rest = {...} return #rest end
+local twice = function() return function(x) return x * 2 end end
+print(fact(5), total, t.name, #t, twice()(4), pick(1, 2, 3))
+repeat total = total - 7 until total < 0
+do local z = "z" .. 1 print(z) end
+for i = 10, 1, -4 do print(i) end
+local count = 0
+local function counter()
+  local n = 0
+  return function() n = n + 1 count = count + 1 return n end
+end
+local next_value = counter()
+next_value()
+print(next_value(), count, not nil, 2 ^ 3 ^ 2, 7 // 2, (1 < 2) == true)
+if count > 5 then print("big") elseif count > 1 then print("mid") else print("small") end
+local a, b, c = 1, 2
+print(a, b, c, total)
+local box = {n = 0}
+function box.bump(self) self.n = self.n + 1 return self end
+print(box:bump():bump().n)
+"""
+
+def run(code):
+    namespace = {}
+    exec(PYTHON_PRELUDE, namespace)
+    output = io.StringIO()
+    with redirect_stdout(output):
+        exec(code, namespace)
+    return output.getvalue()
+
+def test_matches_source_backend():
+    for optimize in (True, False):
+        text = compile_source(PROGRAM, optimize=optimize).python_code
+        result = compile_code(PROGRAM, optimize=optimize)
+        assert result.errors == []
+        assert run(result.code) == run(text)
+    assert run(compile_code(PROGRAM).code).startswith("120\t30\tx\t2\t8\t2\n")
+
+def test_line_numbers_are_lua_lines():
+    source = "local x = 1\n\nlocal function f(y)\n  return y + nil\nend\nprint(f(x))\n"
+    code = compile_code(source, "script.lua").code
+    try:
+        run(code)
+    except TypeError as error:
+        frames = traceback.extract_tb(error.__traceback__)[2:]
+    else:
+        assert False, "expected a TypeError"
+    assert [(frame.filename, frame.lineno) for frame in frames] == [("script.lua", 6), ("script.lua", 4)]
+
+def test_deep_expressions_still_compile():
+    source = "x = 1" + " + y" * 1500
+    namespace = {"y": 1.0}
+    result = compile_code(source)
+    exec(result.code, namespace)
+    assert namespace["x"] == 1501.0
+    assert compile_code("x = 1").mappings is None
+
+def test_deep_expressions_map_back_to_lua_lines():
+    source = "x = 1\n\nx = x" + " + 1" * 1500 + "\nx = x + nil\n"
+    result = compile_code(source, "deep.lua")
+    assert result.mappings is not None
+    try:
+        run(result.code)
+    except TypeError as error:
+        python_line = traceback.extract_tb(error.__traceback__)[-1].lineno
+        formatted = source_map.format_exception(error)
+    else:
+        assert False, "expected a TypeError"
+    assert source_map.SourceMap("deep.lua", result.mappings).lua_line(python_line) == 4
+    assert 'File "deep.lua", line 4, in <module>' in formatted
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import cache as cache_module
+from cache import CompileCache
+from compiler import compile_source
+
+SOURCE = "local x = 1\nprint(x + 2)"
+
+def test_hit_returns_stored_result():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(directory)
+        first = compile_source(SOURCE, cache)
+        second = compile_source(SOURCE, cache)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert second.python_code == first.python_code
+        assert [t.value for t in second.tokens] == [t.value for t in first.tokens]
+        assert len(second.ast) == len(first.ast)
+
+def test_results_too_deep_to_pickle_are_not_cached():
+    source = "print(" + " + ".join(["a"] * 1500) + ")"
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(directory)
+        result = compile_source(source, cache)
+        assert result.python_code == compile_source(source).python_code
+        assert cache.get(source) is None and cache.total_bytes == 0
+
+def test_key_depends_on_source_and_version():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(directory)
+        key = cache.key(SOURCE)
+        assert cache.key(SOURCE + " ") != key
+        original = cache_module.COMPILER_VERSION
+        cache_module.COMPILER_VERSION = original + "-next"
+        try:
+            assert cache.key(SOURCE) != key
+        finally:
+            cache_module.COMPILER_VERSION = original
+
+def test_least_recently_used_entries_are_evicted():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(directory)
+        sources = [f"x = {i}" for i in range(3)]
+        for i, source in enumerate(sources):
+            compile_source(source, cache)
+            path = os.path.join(directory, cache.key(source) + ".pickle")
+            os.utime(path, (1000 + i, 1000 + i))
+        entry_size = cache.total_bytes // 3
+        assert cache.get(sources[0]) is not None  # now the most recently used
+        cache.max_bytes = entry_size * 3
+        compile_source("x = 99", cache)
+        assert cache.get(sources[1]) is None
+        assert cache.get(sources[0]) is not None
+        assert cache.total_bytes <= cache.max_bytes
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,61 @@
+import asyncio
+import json
+import os
+import tempfile
+from compile_server import CompileServer
+from compiler import compile_source
+
+async def send(reader, writer, *requests):
+    writer.write(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+    await writer.drain()
+    replies = [json.loads(await reader.readline()) for _ in requests]
+    return {reply["id"]: reply for reply in replies}
+
+def test_tcp_requests_are_compiled_and_deduplicated():
+    async def run():
+        server = CompileServer(jobs=1)
+        host, port = await server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            replies = await send(reader, writer,
+                                 {"id": 1, "source": "local x = 1 + 2\nprint(x)"},
+                                 {"id": 2, "source": "local x = 1 + 2\nprint(x)"},
+                                 {"id": 3, "source": "local x = = 1", "max_errors": 1},
+                                 {"id": 4, "text": "print(1)"},
+                                 "not a request")
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            await server.close()
+        return server, replies
+    server, replies = asyncio.run(run())
+    expected = compile_source("local x = 1 + 2\nprint(x)")
+    assert replies[1]["ok"] and replies[1]["python_code"] == expected.python_code
+    assert replies[1]["mappings"] == expected.mappings
+    assert replies[2] == dict(replies[1], id=2)
+    assert not replies[3]["ok"] and replies[3]["errors"][-1] == "Too many errors (1), parsing stopped"
+    assert replies[4]["error"] == "missing field 'source'"
+    assert "error" in replies[None]
+    assert (server.requests, server.compiles, server.deduplicated) == (3, 2, 1)
+
+def test_unix_socket():
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lora.sock")
+            server = CompileServer(jobs=1)
+            assert await server.start(path) == path
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                replies = await send(reader, writer, {"id": "a", "source": "return 1", "optimize": False})
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                await server.close()
+        return replies
+    replies = asyncio.run(run())
+    assert replies["a"]["python_code"] == compile_source("return 1", optimize=False).python_code
+
+if __name__ == "__main__":
+    for test in [test_tcp_requests_are_compiled_and_deduplicated, test_unix_socket]:
+        test()
+        print(f"{test.__name__} passed")
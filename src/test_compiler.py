@@ -0,0 +1,47 @@
+from concurrent.futures import ProcessPoolExecutor
+from compiler import compile_many, compile_source
+
+SNIPPETS = [
+    "local limit = 10\nreturn limit * 2",
+    "local x = = 1",
+    "function allow(req)\n  local unused = 1\n  return req\nend",
+    "local limit = 10\nreturn limit * 2",
+]
+
+def test_compile_many_matches_compile_source():
+    results = compile_many(SNIPPETS)
+    assert len(results) == len(SNIPPETS)
+    for source, result in zip(SNIPPETS, results):
+        expected = compile_source(source)
+        assert result.python_code == expected.python_code
+        assert result.mappings == expected.mappings
+        assert result.errors == expected.errors
+    assert results[0] is results[3]  # duplicates are compiled once
+    assert [result.ok for result in results] == [True, False, True, True]
+    assert results[1].error_count == 1
+    assert results[2].ok and "unused" in results[2].errors[0]
+
+def test_compile_many_in_worker_processes():
+    sources = SNIPPETS + [f"return {index} + 1" for index in range(20)]
+    serial = compile_many(sources, max_errors=1)
+    parallel = compile_many(sources, max_errors=1, jobs=2)
+    assert [r.python_code for r in parallel] == [r.python_code for r in serial]
+    assert [r.errors for r in parallel] == [r.errors for r in serial]
+
+def test_compile_many_with_an_executor_needs_jobs():
+    sources = [f"return {index} * 2" for index in range(8)]
+    with ProcessPoolExecutor(2) as executor:
+        try:
+            compile_many(sources, executor=executor)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+        results = compile_many(sources, jobs=2, executor=executor)
+    assert [r.python_code for r in results] == [r.python_code for r in compile_many(sources)]
+
+if __name__ == "__main__":
+    for test in [test_compile_many_matches_compile_source, test_compile_many_in_worker_processes,
+                 test_compile_many_with_an_executor_needs_jobs]:
+        test()
+        print(f"{test.__name__} passed")
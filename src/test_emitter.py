@@ -0,0 +1,93 @@
+from lexer import lexer
+from parser import Parser
+from emitter import Emitter
+from compiler import PYTHON_PRELUDE
+from ast_nodes import BinaryOpNode, IfNode, LiteralNode, VariableNode, ReturnNode
+
+def compile_lua(source):
+    parser = Parser(lexer(source))
+    ast = parser.parse()
+    assert parser.symbol_table.errors == []
+    return Emitter().emit(ast)
+
+def run_lua(source):
+    namespace = {}
+    exec(PYTHON_PRELUDE + compile_lua(source), namespace)
+    return namespace
+
+def test_nested_blocks_are_indented():
+    code = compile_lua("""
+    function f(n)
+        if n > 0 then
+            while n > 10 do n = n - 1 end
+            return n
+        elseif n == 0 then
+            return 0
+        else
+            return -n
+        end
+    end
+    """)
+    assert "        while n > 10.0:\n            n = n - 1.0\n" in code
+
+def test_functions_in_elseif_bodies_stay_in_their_branch():
+    code = compile_lua("""
+    if a then x = 1
+    elseif f(function() return 2 end) then
+        local function g() return 3 end
+        local h = function() return 4 end
+        y = g() + h()
+    end
+    """)
+    assert code.count("def g(") == 1
+    assert code.index("def _fn1") < code.index("if a")  # the elseif condition's function
+    assert code.index("elif") < code.index("def _fn2") < code.index("h = _fn2")
+
+def test_method_receiver_is_evaluated_once():
+    ns = run_lua("""
+    local made = {count = 0}
+    local obj = {n = 5}
+    function obj.get(self, k) return self.n + k end
+    local function make() made.count = made.count + 1 return obj end
+    result = make():get(1)
+    """)
+    assert ns["result"] == 6.0 and ns["made"]["count"] == 1.0
+
+def test_generated_code_runs():
+    ns = run_lua("""
+    local function fact(n)
+        if n <= 1 then return 1 end
+        return n * fact(n - 1)
+    end
+    local t = {10, 20, name = "x"}
+    local total = 0
+    for i = 1, 2 do total = total + t[i] end
+    for i = 3, 1, -1 do total = total + i end
+    local add = function(a, b) return a + b end
+    result = add(fact(5), total) .. t.name
+    """)
+    assert ns["result"] == "156x"
+
+def test_deep_nesting_does_not_recurse():
+    expr = VariableNode("x")
+    for _ in range(50000):
+        expr = BinaryOpNode(expr, "+", LiteralNode(1))
+    code = Emitter().emit([ReturnNode([expr])])
+    assert code.startswith("return x + 1 + 1")
+
+    statement = ReturnNode([LiteralNode(1)])
+    for _ in range(5000):
+        statement = IfNode(VariableNode("c"), [statement])
+    code = Emitter().emit([statement])
+    assert code.count("\n") == 5001
+    assert code.splitlines()[-1] == "    " * 5000 + "return 1"
+
+def test_python_keywords_are_renamed():
+    code = compile_lua("local class = 1\nprint(class)")
+    assert code == "class_ = 1.0\nprint(class_)\n"
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
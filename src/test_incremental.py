@@ -0,0 +1,117 @@
+import random
+from compiler import compile_source
+from incremental import IncrementalCompiler
+
+SOURCE = """-- header
+function add(a, b)
+    return a + b
+end
+
+local x = 10
+local s = [[multi
+line]]
+
+function twice(n)
+    return add(n, n)
+end
+
+if x > 5 then
+    print(twice(x))
+end
+"""
+
+def assert_matches_full_compile(incremental):
+    full = compile_source(incremental.source, optimize=False)
+    assert incremental.tokens == full.tokens
+    assert [(t.lineno, t.col) for t in incremental.tokens] == [(t.lineno, t.col) for t in full.tokens]
+    assert incremental.errors == full.errors
+    assert incremental.python_code() == full.python_code
+    assert incremental.mappings() == full.mappings
+
+FUNCTIONS = """local f = function(a) return function() return a end end
+local t = {cb = function() return 1 end, function(x) return x end}
+x = 1 y = 2
+function g(h)
+    return h(function(z) return z * 2 end)
+end
+if f(1) then print(g(function(q) return q end)) elseif function() end then end
+"""
+
+def test_initial_parse_matches_full_compile():
+    assert_matches_full_compile(IncrementalCompiler(SOURCE))
+
+def test_edit_inside_one_function_reparses_locally():
+    incremental = IncrementalCompiler(SOURCE)
+    start = SOURCE.index("add(n, n)")
+    incremental.edit(start, start + len("add(n, n)"), "add(n,\n n) * 2")
+    assert incremental.last_reparsed <= 2
+    assert_matches_full_compile(incremental)
+
+def test_edit_shifts_lines_of_reused_statements():
+    incremental = IncrementalCompiler(SOURCE)
+    incremental.edit(0, 0, "\n\n\n")
+    assert_matches_full_compile(incremental)
+
+def test_edit_that_opens_a_comment_relexes_the_rest():
+    incremental = IncrementalCompiler(SOURCE)
+    start = SOURCE.index("local x")
+    incremental.edit(start, start, "--[[")
+    assert_matches_full_compile(incremental)
+    incremental.edit(start, start + 4, "")
+    assert_matches_full_compile(incremental)
+
+def test_edit_that_closes_an_earlier_long_bracket():
+    incremental = IncrementalCompiler("local s = [[\nx = 1\n\ny = 2\n")
+    incremental.edit(len(incremental.source), len(incremental.source), "]]")
+    assert_matches_full_compile(incremental)
+    start = incremental.source.index("y")
+    incremental.edit(start, start, "]")
+    assert_matches_full_compile(incremental)
+
+def test_errors_follow_edits():
+    incremental = IncrementalCompiler(SOURCE)
+    start = SOURCE.index("local x = 10")
+    incremental.edit(start, start + len("local x = 10"), "local x = = 10")
+    assert incremental.errors
+    assert_matches_full_compile(incremental)
+    incremental.edit(0, 0, "\n")
+    assert_matches_full_compile(incremental)
+
+def test_random_edits_match_full_compile():
+    rng = random.Random(470)
+    incremental = IncrementalCompiler(SOURCE)
+    fragments = ["x", " ", "\n", "end", "(", ")", "local y = 1\n", "--", "\"", "\\", "[[", "]]", "=", "function f() "]
+    for _ in range(200):
+        source = incremental.source
+        start = rng.randrange(len(source) + 1)
+        end = min(len(source), start + rng.randrange(4))
+        incremental.edit(start, end, rng.choice(fragments))
+        assert_matches_full_compile(incremental)
+
+def test_set_source_diffs_the_text():
+    incremental = IncrementalCompiler(SOURCE)
+    incremental.set_source(SOURCE.replace("x > 5", "x > 50"))
+    assert incremental.last_reparsed == 2
+    assert_matches_full_compile(incremental)
+
+def test_hoisted_functions_are_numbered_across_statements():
+    incremental = IncrementalCompiler(FUNCTIONS)
+    assert_matches_full_compile(incremental)
+    incremental.edit(0, 0, "local first = function() end\n")
+    assert "def _fn8(q):" in incremental.python_code()
+    assert_matches_full_compile(incremental)
+    rng = random.Random(9)
+    fragments = ["x", " ", "\n", "end", "(", ")", "--", "=", " y = 3 ",
+                 "function() return 1 end", "g(function(a) return a end)\n", "local q = function() end\n"]
+    for _ in range(200):
+        source = incremental.source
+        start = rng.randrange(len(source) + 1)
+        end = min(len(source), start + rng.randrange(4))
+        incremental.edit(start, end, rng.choice(fragments))
+        assert_matches_full_compile(incremental)
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,55 @@
+import json
+import os
+import pickle
+import tempfile
+from compiler import compile_source
+from instrument import Instrumentation
+from project import compile_project
+
+SOURCE = """
+local function add(a, b) return a + b end
+print(add(1, 2))
+x = = 1
+"""
+
+def test_phases_and_counters():
+    stats = Instrumentation()
+    compile_source(SOURCE, stats=stats)
+    assert list(stats.phases) == ["lex", "parse", "resolve", "optimize", "emit"]
+    assert all(record["calls"] == 1 and record["seconds"] >= 0 for record in stats.phases.values())
+    assert "peak_bytes" not in stats.phases["lex"]
+    counters = stats.counters
+    assert counters["files"] == 1 and counters["errors"] == 1 and counters["tokens"] > 20
+    assert counters["symbol_lookups"] == 5  # add (declared and called), a, b and print
+    assert stats.node_types["FunctionNode"] == 1
+    assert counters["ast_nodes"] == sum(stats.node_types.values())
+
+    traced = Instrumentation(trace_memory=True)
+    compile_source(SOURCE, optimize=False, stats=traced)
+    assert "optimize" not in traced.phases
+    assert traced.phases["parse"]["peak_bytes"] > 0
+
+def test_merge_and_json():
+    first, second = Instrumentation(), Instrumentation()
+    compile_source(SOURCE, stats=first)
+    compile_source(SOURCE, stats=second)
+    merged = Instrumentation().merge(first).merge(pickle.loads(pickle.dumps(second.to_dict())))
+    assert merged.counters["files"] == 2
+    assert merged.phases["lex"]["calls"] == 2
+    assert json.loads(merged.to_json())["node_types"]["FunctionNode"] == 2
+
+def test_project_stats():
+    with tempfile.TemporaryDirectory() as root:
+        for name in ("a.lua", "b.lua"):
+            with open(os.path.join(root, name), "w") as file:
+                file.write("print(1)\n")
+        assert compile_project(root, jobs=1).stats is None
+        result = compile_project(root, os.path.join(root, "out"), jobs=1, instrument=True)
+        assert result.stats.counters["files"] == 2
+        assert result.stats.phases["write"]["calls"] == 2
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
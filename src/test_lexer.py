@@ -0,0 +1,76 @@
+import os
+import tempfile
+import types
+from lexer import (
+    lexer, lex_stream, lex_file, string_value, number_value,
+    KEYWORD, NAME, STRING
+)
+from parser import Parser
+
+def test_lex_stream_is_lazy():
+    stream = lex_stream("local x = 10")
+    assert isinstance(stream, types.GeneratorType)
+    first = next(stream)
+    assert first["type"] == "KEYWORD" and first["value"] == "local"
+    assert first.kind == KEYWORD
+
+def test_lex_stream_matches_lexer():
+    source = "local x = 10\nlocal y = \"hello\"\nif x > 5 then end"
+    assert list(lex_stream(source)) == lexer(source)
+
+def test_line_numbers():
+    tokens = lexer("a\n\nb")
+    assert [t["lineno"] for t in tokens] == [1, 3]
+
+def test_comments_are_skipped():
+    tokens = lexer("-- line comment\nx --[[ block\ncomment ]] = --[==[ ]] ]==] 1")
+    assert [t.value for t in tokens] == ["x", "=", "1"]
+    assert [t.lineno for t in tokens] == [2, 3, 3]
+
+def test_multiline_strings():
+    source = 'a = [[first\nsecond]]\nb = "esc\\\nnext" c = [==[x]]y]==]'
+    tokens = lexer(source)
+    strings = [t for t in tokens if t.kind == STRING]
+    assert [string_value(t.value) for t in strings] == ["first\nsecond", "esc\nnext", "x]]y"]
+    assert [t.lineno for t in tokens if t.kind == NAME] == [1, 3, 4]
+
+def test_columns():
+    tokens = lexer("local x\n  y = 0x1F")
+    assert [(t.lineno, t.col) for t in tokens] == [(1, 1), (1, 7), (2, 3), (2, 5), (2, 7)]
+    assert number_value(tokens[-1].value) == 31.0
+
+def test_positions_after_multiline_tokens():
+    source = 'a = [[x\ny]] b\n--[[c\nd]] e "f\\\ng" h\n  nil true'
+    tokens = lexer(source)
+    assert [(t.value, t.lineno, t.col) for t in tokens if t.kind != STRING] == [
+        ("a", 1, 1), ("=", 1, 3), ("b", 2, 5), ("e", 4, 5), ("h", 5, 4), ("nil", 6, 3), ("true", 6, 7)]
+    assert [t.type for t in tokens[-2:]] == ["NIL", "BOOLEAN"]
+    assert list(lex_stream(source)) == tokens
+    assert [(t.lineno, t.col) for t in lex_stream(source)] == [(t.lineno, t.col) for t in tokens]
+
+def test_mmap_input_matches_str_input():
+    source = 'local s = [[a\nb]] -- note\nx = "\\u{e9} é" .. 1\n--[[\n]] y = true\n'
+    with tempfile.NamedTemporaryFile("w", suffix=".lua", delete=False, encoding="utf-8") as f:
+        f.write(source)
+    try:
+        tokens = lexer(source)
+        assert list(lex_file(f.name)) == tokens
+        mapped = list(lex_file(f.name))
+        assert [t.lineno for t in mapped] == [t.lineno for t in tokens]
+        # Columns count bytes, so they only agree on ASCII lines
+        assert [t.col for t in mapped if t.lineno != 3] == [t.col for t in tokens if t.lineno != 3]
+    finally:
+        os.unlink(f.name)
+
+def test_parser_pulls_tokens_lazily():
+    parser = Parser(lex_stream("x = 1"))
+    assert parser.tokens == []
+    assert parser.check(NAME)
+    assert len(parser.tokens) == 1
+    assert not parser.is_at_end()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
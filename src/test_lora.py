@@ -0,0 +1,66 @@
+import traceback
+import lora
+import source_map
+from lua_runtime import LuaError
+
+SCRIPT = """
+doubled = limit * 2
+function double(x)
+  local unused = 1
+  return x * 2
+end
+table.insert = nil
+"""
+
+def test_load_caches_code():
+    lora.load.cache_clear()
+    chunk = lora.load(SCRIPT, "rules.lua")
+    assert lora.load(SCRIPT, "rules.lua") is chunk
+    assert lora.load.cache_info().hits == 1
+    assert chunk.warnings == ["Line 4: Unused local variable 'unused'"]
+
+def test_runs_are_isolated():
+    chunk = lora.load(SCRIPT)
+    first = chunk({"limit": 1.0})
+    second = chunk({"limit": 21.0})
+    assert first["doubled"] == 2.0 and second["doubled"] == 42.0
+    assert second["double"](21.0) == 42.0
+    assert second["table"]["insert"] is None
+    # The script removed table.insert from its own copy only
+    env = lora.load("local t = {} table.insert(t, 'x') n = #t")()
+    assert env["n"] == 1
+
+def test_errors():
+    for source in ("local = 1", "return 1", "x = " + " + ".join(["a"] * 5000)):
+        try:
+            lora.load(source, "bad.lua")
+        except LuaError as error:
+            assert str(error).startswith("bad.lua:")
+        else:
+            assert False, f"{source!r} loaded"
+
+    chunk = lora.load("local x = nil\n\nx = x + 1\n", "broken.lua")
+    try:
+        chunk()
+    except TypeError as error:
+        frame = traceback.extract_tb(error.__traceback__)[-1]
+        assert (frame.filename, frame.lineno) == ("broken.lua", 3)
+    else:
+        assert False, "expected a TypeError"
+
+def test_deep_chunks_say_their_lines_are_mapped():
+    assert lora.load(SCRIPT).mappings is None
+    chunk = lora.load("x = 1\n\nx = x" + " + 1" * 1500 + "\nx = x + nil\n", "deep.lua")
+    assert chunk.mappings is not None
+    try:
+        chunk()
+    except TypeError as error:
+        assert 'File "deep.lua", line 4, in <module>' in source_map.format_exception(error)
+    else:
+        assert False, "expected a TypeError"
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
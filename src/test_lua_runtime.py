@@ -0,0 +1,118 @@
+import io
+from contextlib import redirect_stdout
+from compiler import PYTHON_PRELUDE, compile_code, compile_source
+from lua_runtime import LuaTable, LuaError, ipairs, pairs, table, tostring
+
+def run(source):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        exec(PYTHON_PRELUDE + compile_source(source).python_code, {})
+    return output.getvalue()
+
+def run_code(source):
+    namespace = {}
+    exec(PYTHON_PRELUDE, namespace)
+    output = io.StringIO()
+    with redirect_stdout(output):
+        exec(compile_code(source).code, namespace)
+    return output.getvalue()
+
+def test_keys_go_to_array_or_hash():
+    t = LuaTable([10.0, 20.0], {'name': 'x', 5.0: 'five'})
+    assert t.array == [10.0, 20.0]
+    assert t.hash == {'name': 'x', 5: 'five'}
+    assert t[1.0] is t[1] and t[2] == 20.0 and t[5] == 'five'
+    assert t[3] is None and t['missing'] is None
+
+    t[3] = 30.0
+    t[4] = 40.0  # reaches 5, which moves over from the hash part
+    assert t.array == [10.0, 20.0, 30.0, 40.0, 'five']
+    assert t.hash == {'name': 'x'}
+
+    t[True] = 'yes'
+    t[1] = 'one'
+    assert t[True] == 'yes' and t[1] == 'one'
+    for key in (None, float('nan')):
+        try:
+            t[key] = 1.0
+        except LuaError:
+            pass
+        else:
+            assert False, f"{key!r} accepted as a key"
+
+def test_length_is_a_border():
+    t = LuaTable()
+    assert len(t) == 0 and t
+    for i in range(1, 101):
+        t[float(i)] = i
+    assert len(t) == 100
+    t[100] = None
+    t[99] = None
+    assert len(t) == 98
+    t[50] = None  # a hole in the middle: 98 is still a valid border
+    assert len(t) == 98
+    assert len(LuaTable([1.0, None, None])) == 1
+
+def test_table_library():
+    t = LuaTable()
+    table['insert'](t, 'b')
+    table['insert'](t, 'c')
+    table['insert'](t, 1.0, 'a')
+    assert table['concat'](t, ', ') == 'a, b, c'
+    assert table['remove'](t, 1.0) == 'a'
+    assert table['remove'](t) == 'c'
+    assert table['unpack'](t) == ('b',)
+    assert table['remove'](LuaTable()) is None
+    assert tostring(3.0) == '3' and tostring(0.5) == '0.5' and tostring(None) == 'nil'
+
+def test_pairs_and_ipairs():
+    t = LuaTable([1.0, 2.0, None, 4.0], {'k': 'v', False: 0.0})
+    assert list(ipairs(t)) == [(1, 1.0), (2, 2.0)]
+    assert list(pairs(t)) == [(1, 1.0), (2, 2.0), (4, 4.0), ('k', 'v'), (False, 0.0)]
+    for key, _ in pairs(t):
+        t[key] = None  # clearing fields while traversing is allowed
+    assert list(pairs(t)) == []
+
+def test_generated_code_uses_tables():
+    source = """
+    local t = {1, 2, 3, n = "three"}
+    t[#t + 1] = 4
+    table.insert(t, 5)
+    print(#t, t.n, t[2], table.concat(t, "-"))
+    """
+    assert run(source) == "5\tthree\t2\t1-2-3-4-5\n"
+
+def test_constructor_fields_keep_lua_semantics():
+    source = """
+    local t = {[true] = "t", [1] = "one", x = 1, [2.0] = "two"}
+    print(t[true], t[1], t[2], t.x, #t)
+    local u = {[1] = "a", "b"}
+    print(u[1], #u)
+    local order = {}
+    local function f(v) order[#order + 1] = v return v end
+    local w = {f(1), k = f(2), f(3)}
+    print(order[1], order[2], order[3], w[1], w[2], w.k)
+    local function pack(...) return {n = 1, ...} end
+    local p = pack(7, 8, 9)
+    print(#p, p[3], p.n)
+    """
+    expected = "t\tone\ttwo\t1\t2\nb\t1\n1\t2\t3\t1\t3\t2\n3\t9\t1\n"
+    assert run(source) == expected
+    assert run_code(source) == expected
+
+def test_concatenation_formats_numbers_like_tostring():
+    source = 'print("n=" .. 10, 1 .. 2, 1.5 .. "")'
+    assert run(source) == run_code(source) == "n=10\t12\t1.5\n"
+    for backend in (run, run_code):
+        try:
+            backend('print("x" .. nil)')
+        except LuaError as error:
+            assert str(error) == "attempt to concatenate a nil value"
+        else:
+            assert False, "concatenating nil did not raise"
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,72 @@
+import os
+import pickle
+import tempfile
+from lexer import lexer
+from lua_tokenizer import LuaTokenizer, tokenize_files
+
+FILES = {
+    "a.lua": 'local x = 10\nprint(x, "hi")\n',
+    "b.lua": '-- comment\nlocal y = 10 + x\nreturn y\n',
+}
+
+def write_files(directory):
+    paths = []
+    for name, text in FILES.items():
+        path = os.path.join(directory, name)
+        with open(path, "w") as file:
+            file.write(text)
+        paths.append(path)
+    return paths
+
+def test_counts_without_keeping_tokens():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_files(directory)[0]
+        tokenizer = LuaTokenizer()
+        tokenizer.tokenize(path)
+        assert tokenizer.tokens == []
+        report = tokenizer.generate_report()
+        assert report["literals"] == {"count": 2, "values": ["10", '"hi"']}
+        assert report["variables"] == {"count": 2, "values": ["x", "print"], "duplicates": ["x"]}
+        assert report["operators"]["count"] == 4
+        tokenizer.tokenize(path, keep_tokens=True)
+        assert len(tokenizer.tokens) == 10
+        assert tokenizer.generate_report()["literals"]["count"] == 4
+
+def test_merged_reports_match_one_pass():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory)
+        together = LuaTokenizer()
+        for path in paths:
+            together.tokenize(path)
+        merged = LuaTokenizer()
+        for path in paths:
+            tokenizer = LuaTokenizer()
+            tokenizer.tokenize(path, use_mmap=True)
+            merged.merge(pickle.loads(pickle.dumps(tokenizer)))
+        report = merged.generate_report()
+        assert report == together.generate_report()
+        assert report["variables"]["duplicates"] == ["x", "y"]  # x is used once in each file
+        assert report["total_lines_processed"] == 6
+        assert tokenize_files(paths, jobs=2).generate_report() == report
+
+def test_tokens_are_only_kept_on_request():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_files(directory)[1]
+        expected = lexer(FILES["b.lua"])
+        for use_mmap in (False, True):
+            counting = LuaTokenizer()
+            counting.tokenize(path, use_mmap=use_mmap)
+            assert counting.tokens == []
+            keeping = LuaTokenizer()
+            keeping.tokenize(path, use_mmap=use_mmap, keep_tokens=True)
+            assert keeping.tokens == expected
+            assert keeping.generate_report() == counting.generate_report()
+            # Each call keeps the tokens of its own file only
+            keeping.tokenize(write_files(directory)[0], use_mmap=use_mmap, keep_tokens=True)
+            assert keeping.tokens == lexer(FILES["a.lua"])
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
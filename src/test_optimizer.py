@@ -0,0 +1,79 @@
+import math
+from compiler import PYTHON_PRELUDE, compile_code, compile_source
+from optimizer import fold_binary, fold_unary
+
+def python_of(source):
+    return compile_source(source).python_code
+
+def run(source):
+    namespace = {}
+    exec(compile_source(source).python_code, namespace)
+    return namespace
+
+def test_constant_expressions_are_folded():
+    assert python_of("local SIZE = 64 * 1024") == "SIZE = 65536.0\n"
+    assert python_of('x = "a" .. "b" .. "c"') == "x = 'abc'\n"
+    assert python_of("x = -(2 ^ 10) // 3") == "x = -342.0\n"
+    assert python_of('x = #"héllo"') == "x = 6\n"
+
+def test_lua_semantics_are_kept():
+    assert fold_binary("==", 1.0, True) == (True, False)
+    assert fold_binary("~=", "1", 1.0) == (True, True)
+    assert fold_binary("%", -5.0, 3.0) == (True, 1.0)
+    assert fold_binary("/", 1.0, 0.0) == (True, math.inf)
+    assert math.isnan(fold_binary("%", 1.0, 0.0)[1])
+    assert fold_binary("<", "a", 1.0) == (False, None)  # an error at runtime
+    assert fold_binary("..", 1.0, "x") == (False, None)
+    assert fold_unary("not", 0.0) == (True, False)  # 0 is true in Lua
+    assert python_of("x = 0 and 5") == "x = 5.0\n"
+    assert python_of("x = nil or y") == "x = y\n"
+
+def test_constant_locals_are_propagated():
+    code = python_of("local DEBUG = false\nlocal LIMIT = 10\nfunction f(n) return n * LIMIT end")
+    assert "return n * 10.0" in code
+    # Locals assigned after their declaration keep their reads
+    code = python_of("local n = 1\nfunction bump() n = n + 1 end\nprint(n)")
+    assert "print(n)" in code and "n = n + 1" in code
+
+def test_dead_branches_are_dropped():
+    code = python_of("""
+    local DEBUG = false
+    if DEBUG == true then print("debug") elseif x then print("x") else print("release") end
+    if not DEBUG then print("on") else print("off") end
+    while DEBUG do print("never") end
+    """)
+    assert "debug" not in code and "never" not in code and "off" not in code
+    assert "if x:" in code and "else:" in code
+    assert "print('on')" in code and "if True" not in code
+
+def test_folded_program_still_runs():
+    ns = run("""
+    local KB = 1024
+    local SIZE = 64 * KB
+    local MODE = "fast"
+    if MODE == "slow" then result = 0 else result = SIZE / KB end
+    """)
+    assert ns["result"] == 64.0
+
+def test_long_operator_chains_fold_without_recursion():
+    source = "x = 1" + " + 1" * 20000
+    assert python_of(source) == "x = 20001.0\n"
+
+def test_string_length_is_the_same_folded_or_not():
+    source = 'local s = "héllo"\nfolded = #"héllo"\nlocal_length = #s\n' \
+             'function length(v) return #v end\nat_runtime = length("é") + length({1, 2})'
+    expected = {"folded": 6, "local_length": 6, "at_runtime": 4}
+    for optimize in (True, False):
+        namespace = {}
+        exec(PYTHON_PRELUDE + compile_source(source, optimize=optimize).python_code, namespace)
+        assert {name: namespace[name] for name in expected} == expected
+        namespace = {}
+        exec(PYTHON_PRELUDE, namespace)
+        exec(compile_code(source, optimize=optimize).code, namespace)
+        assert {name: namespace[name] for name in expected} == expected
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
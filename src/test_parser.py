@@ -0,0 +1,121 @@
+from lexer import lexer, lex_stream
+from parser import Parser
+from ast_nodes import (
+    BinaryOpNode, LogicalNode, UnaryOpNode, CallNode, MethodCallNode, IndexNode,
+    IndexAssignmentNode, FunctionNode, ExpressionStatementNode, VariableDeclarationNode, GroupingNode
+)
+
+def parse_expression(source):
+    return Parser(lexer(source)).expression()
+
+def test_precedence():
+    expr = parse_expression("1 + 2 * 3")
+    assert isinstance(expr, BinaryOpNode) and expr.operator == "+"
+    assert expr.right.operator == "*"
+
+def test_right_associative_operators():
+    expr = parse_expression("a ^ b ^ c")
+    assert expr.operator == "^" and expr.right.operator == "^"
+    expr = parse_expression("a .. b .. c")
+    assert expr.operator == ".." and expr.right.operator == ".."
+    expr = parse_expression("a - b - c")
+    assert expr.operator == "-" and expr.left.operator == "-"
+
+def test_unary_binds_below_power():
+    expr = parse_expression("-x ^ 2")
+    assert isinstance(expr, UnaryOpNode) and expr.right.operator == "^"
+    expr = parse_expression("not a == b")
+    assert isinstance(expr, BinaryOpNode) and isinstance(expr.left, UnaryOpNode)
+    expr = parse_expression("#t + 1")
+    assert expr.operator == "+" and expr.left.operator == "#"
+
+def test_logical_operators():
+    expr = parse_expression("a or b and c")
+    assert isinstance(expr, LogicalNode) and expr.operator == "or"
+    assert expr.right.operator == "and"
+
+def test_translation_preserves_grouping():
+    assert parse_expression("a < b < c").translate() == "(a < b) < c"
+    assert parse_expression("a - (b - c)").translate() == "a - (b - c)"
+    assert parse_expression("(a + b) * c").translate() == "(a + b) * c"
+    assert parse_expression("2 ^ 3 ^ 2").translate() == "2.0 ** 3.0 ** 2.0"
+    assert parse_expression("'n=' .. n").translate() == "_concat('n=', n)"
+    assert parse_expression("a ~= b").translate() == "a != b"
+
+def test_postfix_expressions():
+    expr = parse_expression("a.b[c](1, 2)")
+    assert isinstance(expr, CallNode) and len(expr.args) == 2
+    assert isinstance(expr.callee, IndexNode)
+    expr = parse_expression("obj:method 'x'")
+    assert isinstance(expr, MethodCallNode) and expr.method == "method"
+
+def test_statements():
+    source = """
+    function M.util:run(x) return x end
+    local function f(...) return ... end
+    print(f(1))
+    t.x = function() end
+    """
+    parser = Parser(lexer(source))
+    ast = parser.parse()
+    assert parser.symbol_table.errors == []
+    assert isinstance(ast[0], IndexAssignmentNode)
+    assert ast[0].value.parameters == ["self", "x"]
+    assert isinstance(ast[1], FunctionNode) and ast[1].is_local
+    assert isinstance(ast[2], ExpressionStatementNode)
+    assert isinstance(ast[3].value, FunctionNode)
+
+def test_syntax_errors_are_recorded():
+    parser = Parser(lexer("local x = = 1\nlocal y = 1"))
+    ast = parser.parse()
+    assert parser.symbol_table.errors
+    assert isinstance(ast[-1], VariableDeclarationNode)
+
+def test_recovery_resumes_at_statement_starts():
+    source = "x += 1 y = 2\nlocal a = = 1\nz = 3\nend w = 4\nreturn a"
+    parser = Parser(lexer(source))
+    ast = parser.parse()
+    assert len(parser.symbol_table.errors) == 2
+    # Each error skips to the next keyword that starts a statement, or past an
+    # 'end': the second one skips z = 3 and resumes at w = 4
+    assert [type(node).__name__ for node in ast] == ["NoneType", "NoneType", "AssignmentNode", "ReturnNode"]
+
+    # A lazily lexed stream is only read as far as recovery needs
+    parser = Parser(lex_stream("x += 1\nlocal y = 1\n" + "f(y)\n" * 1000))
+    parser.declaration()
+    assert isinstance(parser.declaration(), VariableDeclarationNode)
+    assert len(parser.tokens) < 100
+
+def test_error_cap_stops_parsing():
+    source = "local x = = 1\n" * 50 + "local y = 1"
+    parser = Parser(lexer(source), max_errors=3)
+    ast = parser.parse()
+    errors = parser.symbol_table.errors
+    assert len(errors) == 4 and errors[-1] == "Too many errors (3), parsing stopped"
+    assert ast == [None, None, None]
+    assert len(Parser(lexer(source)).parse()) == 51
+
+def test_deep_expressions_parse_without_recursion():
+    expr = parse_expression(" .. ".join(f"v{i}" for i in range(5000)))
+    for i in range(4999):
+        assert expr.operator == ".." and expr.left.name == f"v{i}"
+        expr = expr.right
+    assert expr.name == "v4999"
+    expr = parse_expression("(" * 3000 + "x" + ")" * 3000 + ".y")
+    assert isinstance(expr, IndexNode)
+    for _ in range(3001):
+        expr = expr.expression if isinstance(expr, GroupingNode) else expr.obj
+    assert expr.name == "x"
+    assert isinstance(parse_expression("not " * 3000 + "a"), UnaryOpNode)
+
+def test_too_deep_statements_are_reported():
+    parser = Parser(lexer("x = 1\n" + "if a then\n" * 3000 + "end\n" * 3000 + "y = 2"))
+    ast = parser.parse()
+    assert ast[1:] == [None]
+    assert parser.symbol_table.errors == ["Line 2: Statement nested too deeply to parse, parsing stopped"]
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
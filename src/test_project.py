@@ -0,0 +1,79 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from compiler import compile_source
+from main import main
+from project import compile_project, find_sources
+
+MODULES = {
+    "main.lua": "local util = 1\nprint(util)",
+    "lib/strings.lua": "function upper(s)\n    return s\nend",
+    "lib/broken.lua": "local x = = 1",
+    "lib/deep/math.lua": "function add(a, b)\n    return a + b\nend",
+    ".hidden/skip.lua": "x = 1",
+    "notes.txt": "not lua",
+}
+
+def write_project(root):
+    for path, source in MODULES.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as file:
+            file.write(source)
+
+def test_find_sources_is_sorted_and_skips_hidden_directories():
+    with tempfile.TemporaryDirectory() as root:
+        write_project(root)
+        assert find_sources(root) == ["lib/broken.lua", "lib/deep/math.lua", "lib/strings.lua", "main.lua"]
+
+def test_parallel_build_matches_serial_build():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        write_project(root)
+        serial = compile_project(root, jobs=1)
+        parallel = compile_project(root, output, jobs=2)
+        assert [f.path for f in parallel.files] == [f.path for f in serial.files]
+        assert [f.python_code for f in parallel.files] == [f.python_code for f in serial.files]
+        assert parallel.errors == serial.errors
+        for file in parallel.files:
+            expected = compile_source(MODULES[file.path]).python_code
+            assert file.python_code == expected
+            with open(file.output_path) as generated:
+                assert generated.read().endswith(expected)
+        assert os.path.exists(os.path.join(output, "lib", "deep", "math.py"))
+
+def test_diagnostics_are_aggregated_per_file():
+    with tempfile.TemporaryDirectory() as root:
+        write_project(root)
+        result = compile_project(root, jobs=2)
+        assert [f.path for f in result.files if not f.ok] == ["lib/broken.lua"]
+        assert result.errors and all(e.startswith("lib/broken.lua: ") for e in result.errors)
+
+def test_warnings_do_not_fail_a_build():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        with open(os.path.join(root, "main.lua"), "w") as file:
+            file.write("do\n    local unused = 1\nend\n")
+        result = compile_project(root, jobs=1)
+        assert result.errors and "unused" in result.errors[0]
+        assert [f.ok for f in result.files] == [True]
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = main(["build", root, "-o", output, "-j", "1", "--no-cache"])
+        assert status == 0 and "(0 with errors)" in out.getvalue()
+
+def test_modules_in_subdirectories_run_as_scripts():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        write_project(root)
+        compile_project(root, output, jobs=1)
+        script = os.path.join(output, "lib", "deep", "math.py")
+        run = subprocess.run([sys.executable, script], capture_output=True, text=True, cwd=root)
+        assert run.returncode == 0, run.stderr
+        assert os.path.exists(os.path.join(output, "lib", "deep", "lua_runtime.py"))
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,76 @@
+from ast_nodes import walk, AssignmentNode, FunctionNode, VariableNode
+from compiler import compile_source
+from lexer import lexer
+from parser import Parser
+from resolver import Resolver, LOCAL, UPVALUE, GLOBAL
+
+def resolve(source):
+    parser = Parser(lexer(source))
+    ast = parser.parse()
+    Resolver(parser.symbol_table).resolve(ast)
+    return ast, parser.symbol_table
+
+def references(ast, name):
+    return [(node.binding.kind, node.binding.depth, node.binding.slot) for node in walk(ast)
+            if isinstance(node, (VariableNode, AssignmentNode)) and node.name == name]
+
+def test_bindings_follow_lua_scoping():
+    ast, _ = resolve("""
+    local x = 1
+    function f(a)
+        local x = a
+        return function() return x + y end
+    end
+    print(x)
+    """)
+    assert references(ast, "a") == [(LOCAL, 1, 0)]
+    # the inner function sees f's x as an upvalue, the last line the chunk's x
+    assert references(ast, "x") == [(UPVALUE, 1, 1), (LOCAL, 0, 0)]
+    assert references(ast, "y") == [(GLOBAL, -1, -1)]
+    assert ast[1].binding.kind == GLOBAL
+
+def test_declaration_is_visible_after_its_statement():
+    ast, _ = resolve("local x = 1\ndo local x = x + 1 end\nrepeat local y = 1 until y")
+    assert references(ast, "x") == [(LOCAL, 0, 0)]
+    assert references(ast, "y") == [(LOCAL, 0, 2)]
+
+def test_functions_record_outer_writes():
+    ast, _ = resolve("""
+    local count = 0
+    function outer()
+        local n = 0
+        local function inner() n = n + 1; total = n end
+        count = count + 1
+        inner()
+    end
+    """)
+    outer = ast[1]
+    inner = next(node for node in walk(outer) if isinstance(node, FunctionNode) and node.name == "inner")
+    assert [(b.name, b.kind) for b in outer.outer_writes] == [("count", UPVALUE)]
+    assert [(b.name, b.kind) for b in inner.outer_writes] == [("n", UPVALUE), ("total", GLOBAL)]
+
+def test_unused_locals_are_reported_per_block():
+    _, table = resolve("function f(a)\n    local x = a\n    if a then local y = 1 end\n    for i = 1, 2 do end\n    return x\nend")
+    assert table.errors == ["Line 3: Unused local variable 'y'"]
+
+def test_generated_code_assigns_outer_variables():
+    code = compile_source("""
+    local count = 0
+    function make()
+        local n = 0
+        return function() n = n + 1; count = count + 1; return n end
+    end
+    local next_value = make()
+    next_value()
+    result = next_value() + count
+    """).python_code
+    assert "nonlocal n" in code and "global count" in code
+    namespace = {}
+    exec(code, namespace)
+    assert namespace["result"] == 4
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
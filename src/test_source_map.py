@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import tempfile
+from compiler import compile_source
+from project import compile_project
+from source_map import SourceMap, decode, encode
+
+SOURCE = """local function check(limit)
+  local f = function(x)
+    return x + limit
+  end
+  return f(1)
+end
+
+print(check(nil))
+"""
+
+def test_mappings_round_trip():
+    line_map = [(1, 1), (2, 2), (3, 3), (4, 2), (9, 8), (10, 100000), (40, 3)]
+    mappings = encode(line_map)
+    assert decode(mappings) == line_map
+    assert encode([]) == "" and decode("") == []
+    source_map = SourceMap("a.lua", mappings, offset=5)
+    assert [source_map.lua_line(line) for line in (5, 6, 7, 13, 14, 15, 44, 45, 99)] == [
+        None, 1, 2, 2, 8, 100000, 100000, 3, 3]
+
+def test_every_statement_is_mapped():
+    result = compile_source(SOURCE)
+    assert "# line" not in result.python_code
+    source_map = SourceMap("a.lua", result.mappings)
+    lines = result.python_code.split("\n")
+    # Each generated line maps to the Lua line its statement came from
+    assert lines[2].strip() == "return x + limit" and source_map.lua_line(3) == 3
+    assert lines[-2].startswith("print(") and source_map.lua_line(len(lines) - 1) == 8
+
+def test_tracebacks_point_at_lua_lines():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        with open(os.path.join(root, "check.lua"), "w") as file:
+            file.write(SOURCE)
+        result = compile_project(root, output, jobs=1)
+        assert result.errors == []
+        run = subprocess.run([sys.executable, os.path.join(output, "check.py")],
+                             capture_output=True, text=True, cwd=output)
+        assert "TypeError" in run.stderr
+        lua_path = os.path.join(root, "check.lua")
+        assert f'File "{lua_path}", line 3, in _fn1\n    return x + limit' in run.stderr
+        assert f'File "{lua_path}", line 8, in <module>\n    print(check(nil))' in run.stderr
+        assert "check.py" not in run.stderr
+
+if __name__ == "__main__":
+    for test in [test_mappings_round_trip, test_every_statement_is_mapped, test_tracebacks_point_at_lua_lines]:
+        test()
+        print(f"{test.__name__} passed")
@@ -0,0 +1,48 @@
+from symbol_table import Symbol, SymbolTable
+
+def test_inner_binding_shadows_until_its_scope_exits():
+    table = SymbolTable()
+    outer = table.declare("x", "number", is_local=True, lineno=1)
+    table.enter_scope(is_function=True)
+    inner = table.declare("x", "string", is_local=True, lineno=2)
+    assert table.lookup("x") is inner
+    table.exit_scope()
+    assert table.lookup("x") is outer
+    assert table.bindings == {"x": [outer]}
+    assert table.errors == []
+
+def test_unused_locals_are_reported_on_exit():
+    table = SymbolTable()
+    table.enter_scope(is_function=True)
+    table.declare("used", "any", is_local=True, lineno=3)
+    table.declare("unused", "any", is_local=True, lineno=4)
+    table.declare("param", "any", is_param=True, lineno=2)
+    table.resolve("used")
+    table.exit_scope()
+    assert table.errors == ["Line 4: Unused local variable 'unused'"]
+    assert not table.is_in_function_scope()
+
+def test_lookup_of_undefined_name_reports_it():
+    table = SymbolTable()
+    symbol = table.lookup("missing", lineno=7)
+    assert isinstance(symbol, Symbol) and symbol.type == "any"
+    assert table.errors == ["Line 7: Undefined variable 'missing'"]
+    assert table.resolve("missing") is None
+
+def test_deep_nesting_keeps_one_binding_stack_per_name():
+    table = SymbolTable()
+    table.declare("x", "any", is_local=True)
+    for depth in range(1000):
+        table.enter_scope()
+        table.declare(f"v{depth}", "any", is_local=True)
+    assert table.current_scope_level == 1000
+    assert len(table.bindings["x"]) == 1
+    for _ in range(1000):
+        table.exit_scope()
+    assert list(table.bindings) == ["x"] and table.scopes == [[table.bindings["x"][0]]]
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from compiler import compile_source
+from watch import ProjectWatcher
+
+def write(root, path, source, mtime=None):
+    full_path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "w") as file:
+        file.write(source)
+    if mtime is not None:
+        os.utime(full_path, ns=(mtime, mtime))
+
+def read_output(output, path):
+    with open(os.path.join(output, path)) as file:
+        return file.read()
+
+def test_first_poll_compiles_everything():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        write(root, "a.lua", "x = 1")
+        write(root, "lib/b.lua", "local y = = 2")
+        watcher = ProjectWatcher(root, output)
+        assert watcher.poll() == (["a.lua", "lib/b.lua"], [])
+        assert read_output(output, "a.py").endswith(compile_source("x = 1", optimize=False).python_code)
+        assert watcher.errors("lib/b.lua")
+        assert watcher.poll() == ([], [])
+
+def test_only_changed_files_are_rebuilt():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        write(root, "a.lua", "w = 0\nx = 1\ny = 2\nz = 3\n", mtime=10**9)
+        write(root, "b.lua", "z = 3", mtime=10**9)
+        watcher = ProjectWatcher(root, output)
+        watcher.poll()
+        compiler = watcher.files["a.lua"].compiler
+        write(root, "a.lua", "w = 0\nx = 1\ny = 20\nz = 3\n", mtime=2 * 10**9)
+        assert watcher.poll() == (["a.lua"], [])
+        # The warm compiler was edited in place, not rebuilt
+        assert watcher.files["a.lua"].compiler is compiler
+        assert compiler.last_reparsed <= 2
+        assert read_output(output, "a.py").endswith(compile_source("w = 0\nx = 1\ny = 20\nz = 3\n", optimize=False).python_code)
+
+def test_new_and_deleted_files_are_picked_up():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        write(root, "a.lua", "x = 1")
+        watcher = ProjectWatcher(root, output)
+        watcher.poll()
+        write(root, "sub/new.lua", "y = 2")
+        os.utime(root, ns=(3 * 10**9, 3 * 10**9))  # coarse mtimes may not tick
+        assert watcher.poll() == (["sub/new.lua"], [])
+        assert os.path.exists(os.path.join(output, "sub", "lua_runtime.py"))
+        os.remove(os.path.join(root, "a.lua"))
+        assert watcher.poll() == ([], ["a.lua"])
+        assert not os.path.exists(os.path.join(output, "a.py"))
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"✅ {name}")
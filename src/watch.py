@@ -0,0 +1,142 @@
+# watch.py
+import os
+import time
+from incremental import IncrementalCompiler
+from project import install_runtime, output_path_for, write_module
+from source_map import map_path
+
+class WatchedFile:
+    """A source file's last seen (mtime, size) and its warm compiler state."""
+    __slots__ = ('stamp', 'compiler', 'output_path')
+
+    def __init__(self, output_path):
+        self.stamp = None
+        self.compiler = None
+        self.output_path = output_path
+
+class ProjectWatcher:
+    """Recompile changed .lua files under root by polling their mtimes.
+
+    Every file keeps an IncrementalCompiler between polls, so a change
+    reparses only the statements it touched instead of the whole module.
+    Directories are relisted only when their own mtime changes, which is
+    how new, renamed and deleted files show up.
+    """
+    def __init__(self, root, output_dir, interval=0.1):
+        self.root = root
+        self.output_dir = output_dir
+        self.interval = interval
+        self.directories = {}
+        self.files = {}
+        # Output directories the runtime has been copied into
+        self.runtimes = set()
+
+    def poll(self):
+        """Recompile what changed since the last poll.
+
+        Returns (changed, removed): the paths rebuilt and the paths whose
+        source disappeared (their outputs are deleted too).
+        """
+        if not self.directories:
+            self._install_runtime(self.output_dir)
+            self._list_directory('')
+        else:
+            for directory, stamp in list(self.directories.items()):
+                if directory not in self.directories:
+                    continue  # dropped with a removed parent
+                try:
+                    current = os.stat(self._full_path(directory)).st_mtime_ns
+                except OSError:
+                    self._forget_directory(directory)
+                    continue
+                if current != stamp:
+                    self._list_directory(directory)
+
+        changed, removed = [], []
+        for path, watched in list(self.files.items()):
+            try:
+                stat = os.stat(self._full_path(path))
+            except OSError:
+                removed.append(path)
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp != watched.stamp and self._rebuild(path, watched, stamp):
+                changed.append(path)
+        for path in removed:
+            self._remove(path)
+        changed.sort()
+        removed.sort()
+        return changed, removed
+
+    def run(self, on_change=None):
+        """Poll forever (until interrupted), calling on_change(changed, removed)."""
+        while True:
+            started = time.perf_counter()
+            changed, removed = self.poll()
+            if on_change is not None and (changed or removed):
+                on_change(changed, removed)
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def errors(self, path):
+        watched = self.files.get(path)
+        if watched is None or watched.compiler is None:
+            return []
+        return watched.compiler.errors
+
+    def _full_path(self, path):
+        return os.path.join(self.root, path) if path else self.root
+
+    def _list_directory(self, directory):
+        full_path = self._full_path(directory)
+        try:
+            self.directories[directory] = os.stat(full_path).st_mtime_ns
+            entries = list(os.scandir(full_path))
+        except OSError:
+            self._forget_directory(directory)
+            return
+        prefix = directory + '/' if directory else ''
+        for entry in entries:
+            path = prefix + entry.name
+            if entry.is_dir():
+                if not entry.name.startswith('.') and path not in self.directories:
+                    self._list_directory(path)
+            elif entry.name.endswith('.lua') and path not in self.files:
+                output_path = output_path_for(self.output_dir, path)
+                self._install_runtime(os.path.dirname(output_path))
+                self.files[path] = WatchedFile(output_path)
+
+    def _install_runtime(self, directory):
+        # Every output directory with modules gets a copy (see install_runtime)
+        if directory not in self.runtimes:
+            install_runtime(directory)
+            self.runtimes.add(directory)
+
+    def _forget_directory(self, directory):
+        prefix = directory + '/'
+        for name in [name for name in self.directories if name == directory or name.startswith(prefix)]:
+            del self.directories[name]
+
+    def _rebuild(self, path, watched, stamp):
+        try:
+            with open(self._full_path(path), 'r') as file:
+                source = file.read()
+        except (OSError, UnicodeDecodeError):
+            return False  # mid-write or unreadable; try again next poll
+        watched.stamp = stamp
+        if watched.compiler is None:
+            watched.compiler = IncrementalCompiler(source)
+        elif source == watched.compiler.source:
+            return False  # touched but not changed
+        else:
+            watched.compiler.set_source(source)
+        write_module(watched.output_path, watched.compiler.python_code(), watched.compiler.mappings(),
+                     self._full_path(path))
+        return True
+
+    def _remove(self, path):
+        watched = self.files.pop(path)
+        for output_path in (watched.output_path, map_path(watched.output_path)):
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass